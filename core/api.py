@@ -0,0 +1,154 @@
+"""
+Shared building blocks of the read-only REST API (/api/v1/).
+
+- UpdatedCursorPagination walks a queryset in (updated_at, id) order, so an
+  integration can keep the last cursor and later fetch only what changed
+- SparseFieldsetMixin restricts the serialized fields to ?fields=a,b,c
+- ConditionalGetMixin answers If-None-Match with 304 using an ETag built
+  from updated_at, before anything is serialized
+- ChangeFeedView serves the change log (core.changelog) after a cursor
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.http import parse_etags
+from rest_framework import permissions, serializers, viewsets
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from . import changelog
+
+
+class RolePermission(permissions.BasePermission):
+    """Authenticated users passing any of the role checks named in roles"""
+
+    roles = ()
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and any(getattr(user, check)() for check in self.roles))
+
+
+class IsClinicStaff(RolePermission):
+    """Doctors, lab operators and administrators"""
+
+    roles = ('is_doctor', 'is_lab_operator', 'is_admin')
+
+
+class IsDoctorOrLabOperator(RolePermission):
+    """Doctors and lab operators, as the patient views"""
+
+    roles = ('is_doctor', 'is_lab_operator')
+
+
+class IsLabOperator(RolePermission):
+    """Lab operators, as the laboratory views"""
+
+    roles = ('is_lab_operator',)
+
+
+class UpdatedCursorPagination(CursorPagination):
+    ordering = ('updated_at', 'id')
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class SparseFieldsetMixin:
+    """Serializer mixin: keep only the fields listed in ?fields="""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        requested = request.query_params.get('fields') if request else None
+        if requested:
+            wanted = {name.strip() for name in requested.split(',')}
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
+
+
+def _etag(*parts):
+    return '"%s"' % hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+class ConditionalGetMixin:
+    """
+    ViewSet mixin adding ETag / If-None-Match to list and retrieve.
+    The list ETag comes from MAX(updated_at) and COUNT(*) of the filtered
+    queryset (one aggregate query); the detail ETag from the object's
+    updated_at. Both include the query string, so a different page or
+    fieldset gets a different tag.
+    """
+
+    def _not_modified(self, request, etag):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+            return Response(status=304, headers={'ETag': etag})
+        return None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        state = queryset.order_by().aggregate(last_update=Max('updated_at'), total=Count('id'))
+        etag = _etag(request.version, request.get_full_path(), state['last_update'], state['total'])
+        response = self._not_modified(request, etag) or super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = _etag(request.version, request.get_full_path(), instance.pk, instance.updated_at)
+        response = self._not_modified(request, etag)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+        response['ETag'] = etag
+        return response
+
+
+class ReadOnlyAPIViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Base viewset of the API: cursor paginated, conditional GET. Staff only by
+    default; each viewset narrows permission_classes and get_queryset to
+    what the matching HTML views allow.
+    """
+
+    permission_classes = [IsClinicStaff]
+    pagination_class = UpdatedCursorPagination
+
+
+class ChangeFeedQuerySerializer(serializers.Serializer):
+    after = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, max_value=changelog.MAX_BATCH, default=500)
+    model = serializers.CharField(required=False)
+
+
+class ChangeFeedView(APIView):
+    """
+    Changes after a cursor, oldest first:
+    GET /api/v1/changes/?after=<cursor>&limit=500&model=laboratory.oocyte,laboratory.embryo
+    Keep the returned cursor and pass it as after on the next call; has_more
+    tells whether to call again right away.
+    """
+    
+    permission_classes = [IsClinicStaff]
+    
+    def get(self, request):
+        params = ChangeFeedQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        models = [label.strip() for label in params.validated_data.get('model', '').split(',') if label.strip()]
+        entries, has_more = changelog.changes_after(
+            params.validated_data['after'], params.validated_data['limit'], models,
+        )
+        return Response({
+            'results': [
+                {
+                    'sequence': entry.id,
+                    'model': entry.model,
+                    'object_id': entry.object_id,
+                    'action': entry.action,
+                    'changed_at': entry.created_at,
+                }
+                for entry in entries
+            ],
+            'cursor': entries[-1].id if entries else params.validated_data['after'],
+            'has_more': has_more,
+        })
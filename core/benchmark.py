@@ -0,0 +1,215 @@
+"""
+View benchmarks.
+
+run() requests every named URL of the clinic apps once per role against a
+synthetic dataset (core.synthetic) and measures, per (role, URL name):
+- status code, or the exception raised by the view
+- SQL query count
+- best and median wall time over a few repetitions; regressions are judged
+  on the best one, the least affected by machine noise (as timeit does)
+- peak memory allocated while serving the request (tracemalloc)
+check() compares the results with the query budgets below and with a JSON
+baseline from a previous run. Query counts must not exceed the budget nor
+the baseline; wall time and memory may grow up to a relative tolerance.
+Budgets do not depend on the dataset size: a view whose query count grows
+with the data (an N+1) goes over budget as soon as the dataset is large.
+Failures already present in the baseline (a view that errors, or one over
+budget) are known debt: they are reported by over_budget() but only fail
+when they get worse.
+"""
+import json
+import statistics
+import time
+import tracemalloc
+from importlib import import_module
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from . import querycache
+
+APPS = ['core', 'users', 'patients', 'treatments', 'laboratory']
+ROLES = ['admin', 'director', 'doctor', 'lab_operator', 'patient']
+
+DEFAULT_QUERY_BUDGET = 12
+# URL name -> max queries for any role, for views that legitimately need more
+QUERY_BUDGETS = {
+    'treatment_detail': 14,
+    'puncture_detail': 14,
+}
+
+# Views that write on GET; requesting them would change the dataset
+SKIPPED = {
+    'toggle_user_status': 'activa/desactiva al usuario con un GET',
+}
+
+# Extra query string per URL name
+QUERY_STRINGS = {
+    'clinical_search': {'q': 'hormonal'},
+}
+
+# Differences below these floors are noise, whatever the tolerance
+LATENCY_FLOOR_MS = 5.0
+MEMORY_FLOOR_KIB = 64
+
+
+def url_patterns():
+    """(name, pattern) of every named URL of the benchmarked apps, in urls.py order"""
+    for app in APPS:
+        for pattern in import_module(f'{app}.urls').urlpatterns:
+            if isinstance(pattern, URLPattern) and pattern.name:
+                yield pattern.name, pattern
+
+
+def fixtures(dataset):
+    """
+    Users per role and URL kwargs: a treatment of the benchmarked doctor with
+    a puncture, an oocyte that became an embryo and a transfer, so every
+    detail page has content. The patient role is that treatment's patient.
+    """
+    from laboratory.models import Embryo
+
+    doctor = dataset.doctors[0]
+    embryo = (
+        Embryo.objects.filter(oocyte__puncture__treatment__doctor=doctor)
+        .select_related('oocyte__puncture__treatment__patient__user')
+        .order_by('id')
+        .first()
+    )
+    if embryo is None:
+        raise ValueError('El dataset no tiene embriones del médico evaluado; aumente la cantidad de pacientes.')
+    puncture = embryo.oocyte.puncture
+    treatment = puncture.treatment
+    users = {
+        'admin': dataset.admin,
+        'director': dataset.director,
+        'doctor': doctor,
+        'lab_operator': dataset.lab_operators[0],
+        'patient': treatment.patient.user,
+    }
+    kwargs = {
+        'treatment_id': treatment.id,
+        'patient_id': treatment.patient_id,
+        'puncture_id': puncture.id,
+        'oocyte_id': embryo.oocyte_id,
+        'embryo_id': embryo.id,
+        'user_id': treatment.patient.user_id,
+        'tank_code': dataset.rack.tank.code,
+        'rack_code': dataset.rack.code,
+    }
+    return users, kwargs
+
+
+def measure(client, url, data, repeat):
+    """Measurements of one URL; the first request only warms up caches"""
+    try:
+        client.get(url, data)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, data)
+    except Exception as exc:
+        return {'status': type(exc).__name__}
+    # Read now: the next request resets the connection's query log
+    query_count = len(queries.captured_queries)
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        client.get(url, data)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        client.get(url, data)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'status': response.status_code,
+        'queries': query_count,
+        'best_ms': round(min(timings), 2),
+        'median_ms': round(statistics.median(timings), 2),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def run(dataset, repeat=5, only=None, progress=None):
+    """{'<role>:<url name>': measurements} for every role and URL name"""
+    users, kwargs = fixtures(dataset)
+    results = {}
+    for name, pattern in url_patterns():
+        if name in SKIPPED or (only and name not in only):
+            continue
+        url = reverse(name, kwargs={key: kwargs[key] for key in pattern.pattern.regex.groupindex})
+        for role in ROLES:
+            cache.clear()
+            querycache.clear()
+            client = Client()
+            # Logged in again for every URL: logout_view ends the session
+            client.force_login(users[role])
+            key = f'{role}:{name}'
+            results[key] = measure(client, url, QUERY_STRINGS.get(name), repeat)
+            if progress:
+                progress(key, results[key])
+    return results
+
+
+def budget_for(name):
+    return QUERY_BUDGETS.get(name, DEFAULT_QUERY_BUDGET)
+
+
+def over_budget(results):
+    """Results over their query budget, as messages"""
+    return [
+        f"{key}: {result['queries']} consultas, presupuesto {budget_for(key.split(':', 1)[1])}"
+        for key, result in results.items()
+        if result.get('queries', 0) > budget_for(key.split(':', 1)[1])
+    ]
+
+
+def _regressed(current, base, tolerance, floor):
+    return current > base * (1 + tolerance) and current - base > floor
+
+
+def check(results, baseline=None, tolerance=0.5, queries_only=False):
+    """List of regression messages, empty when everything is within limits"""
+    problems = []
+    baseline = baseline or {}
+    for key, result in results.items():
+        name = key.split(':', 1)[1]
+        base = baseline.get(key)
+        if 'queries' not in result:
+            if base is None or base.get('status') != result['status']:
+                problems.append(f"{key}: la vista falló con {result['status']}")
+            continue
+
+        budget = budget_for(name)
+        known_debt = base and base.get('queries', 0) > budget
+        if result['queries'] > budget and not known_debt:
+            problems.append(f"{key}: {result['queries']} consultas, presupuesto {budget}")
+        if not base or 'queries' not in base:
+            continue
+        if result['status'] != base['status']:
+            problems.append(f"{key}: respondió {result['status']}, antes {base['status']}")
+        if result['queries'] > base['queries']:
+            problems.append(f"{key}: {result['queries']} consultas, antes {base['queries']}")
+        if queries_only:
+            continue
+        if _regressed(result['best_ms'], base['best_ms'], tolerance, LATENCY_FLOOR_MS):
+            problems.append(f"{key}: {result['best_ms']} ms, antes {base['best_ms']} ms")
+        if _regressed(result['peak_kib'], base['peak_kib'], tolerance, MEMORY_FLOOR_KIB):
+            problems.append(f"{key}: {result['peak_kib']} KiB, antes {base['peak_kib']} KiB")
+    return problems
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_baseline(path, parameters, results):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'parameters': parameters, 'results': results}, file, indent=2, sort_keys=True)
+        file.write('\n')
@@ -0,0 +1,72 @@
+"""
+Change feed for downstream systems (billing, registry extracts, BI).
+
+Every create, update and delete of a tracked model appends a ChangeLogEntry:
+from model signals for regular saves (see core.signals) and by calling
+record() from bulk operations that bypass signals. Consumers keep the id of
+the last entry they processed and pull the next batch with changes_after(),
+so a sync costs O(changes) no matter how big the tables are. Entries only
+name the row; current data is read from the API (deleted rows are gone).
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from .models import ChangeLogEntry
+
+TRACKED_MODELS = [
+    'patients.Patient',
+    'patients.MedicalHistory',
+    'patients.Partner',
+    'treatments.Treatment',
+    'treatments.MonitoringDay',
+    'treatments.StudyResult',
+    'treatments.MedicalOrder',
+    'treatments.Payment',
+    'laboratory.Puncture',
+    'laboratory.Oocyte',
+    'laboratory.Embryo',
+    'laboratory.EmbryoTransfer',
+]
+
+MAX_BATCH = 1000
+
+
+def settle_delay():
+    """
+    How long new entries are held back before consumers see them.
+    With concurrent writers (PostgreSQL) ids are handed out at insert time,
+    so a transaction still open may commit a lower id after a consumer moved
+    its cursor past it. CHANGELOG_SETTLE_SECONDS is a heuristic bound on how
+    long such a transaction stays open, not a guarantee: one running longer
+    loses its entries for that consumer. SQLite needs no delay, since every
+    write transaction starts IMMEDIATE and holds the database lock from the
+    insert to the commit, so ids become visible strictly in order.
+    """
+    if connection.vendor == 'sqlite':
+        return timedelta(0)
+    return timedelta(seconds=settings.CHANGELOG_SETTLE_SECONDS)
+
+
+def record(model, object_ids, action):
+    """Append one entry per id (for bulk operations that send no signals)"""
+    label = model._meta.label.lower()
+    ChangeLogEntry.objects.bulk_create(
+        [ChangeLogEntry(model=label, object_id=object_id, action=action) for object_id in object_ids],
+        batch_size=MAX_BATCH,
+    )
+
+
+def changes_after(cursor=0, limit=MAX_BATCH, models=None):
+    """
+    Entries with an id greater than cursor, oldest first, at most limit.
+    Returns (entries, has_more).
+    """
+    entries = ChangeLogEntry.objects.filter(
+        id__gt=cursor,
+        created_at__lte=timezone.now() - settle_delay(),
+    ).order_by('id')
+    if models:
+        entries = entries.filter(model__in=[label.lower() for label in models])
+    rows = list(entries[:limit + 1])
+    return rows[:limit], len(rows) > limit
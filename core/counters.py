@@ -0,0 +1,108 @@
+"""
+Materialized dashboard counters.
+
+Each counter is a filtered COUNT(*) over one model. Instead of running the
+count on every dashboard load, the value is stored in DashboardCounter and
+adjusted with an F() update whenever a matching row is created, changed or
+deleted: from model signals once the save commits (see core.signals) and by
+calling record_change() inside the transaction of bulk operations that
+bypass signals.
+The recompute_counters command rebuilds them from scratch.
+"""
+from django.apps import apps
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import DashboardCounter
+
+PENDING_OOCYTE_STATES = ['VERY_IMMATURE', 'IMMATURE', 'MATURE']
+
+# name -> (model label, filter kwargs)
+COUNTERS = {
+    'pending_oocytes': ('laboratory.Oocyte', {'current_state__in': PENDING_OOCYTE_STATES}),
+    'developing_embryos': ('laboratory.Embryo', {'current_state': 'DEVELOPING'}),
+    'total_users': ('users.User', {}),
+    'total_patients': ('patients.Patient', {}),
+    'active_treatments': ('treatments.Treatment', {'status': 'ACTIVE'}),
+}
+
+
+def tracked_models():
+    return {model_label for model_label, filters in COUNTERS.values()}
+
+
+def tracked_fields(model_label):
+    """Fields whose value decides whether a row of the model is counted"""
+    fields = set()
+    for counter_model, filters in COUNTERS.values():
+        if counter_model == model_label:
+            fields.update(lookup.split('__')[0] for lookup in filters)
+    return sorted(fields)
+
+
+def _matches(filters, values):
+    if values is None:
+        return 0
+    for lookup, expected in filters.items():
+        field, _, operator = lookup.partition('__')
+        if operator == 'in':
+            if values[field] not in expected:
+                return 0
+        elif values[field] != expected:
+            return 0
+    return 1
+
+
+def compute(name):
+    model_label, filters = COUNTERS[name]
+    return apps.get_model(model_label).objects.filter(**filters).count()
+
+
+def recompute(names=None):
+    """Recount the given counters (all by default) and store the result"""
+    values = {}
+    for name in names or COUNTERS:
+        values[name] = compute(name)
+        DashboardCounter.objects.update_or_create(name=name, defaults={'value': values[name]})
+    return values
+
+
+def _add(name, delta):
+    return DashboardCounter.objects.filter(name=name).update(
+        value=F('value') + delta,
+        updated_at=timezone.now(),
+    )
+
+
+def adjust(name, delta):
+    if not delta or _add(name, delta):
+        return
+    # First use: the recount already includes the change
+    value = compute(name)
+    try:
+        with transaction.atomic():
+            DashboardCounter.objects.create(name=name, value=value)
+    except IntegrityError:
+        # Another process created the row in the meantime
+        _add(name, delta)
+
+
+def record_change(model, before, after, count=1):
+    """
+    Apply a change of count rows of model to the counters.
+    before/after map the tracked fields to their values; before is None for
+    created rows, after is None for deleted rows.
+    """
+    model_label = model._meta.label
+    for name, (counter_model, filters) in COUNTERS.items():
+        if counter_model == model_label:
+            adjust(name, (_matches(filters, after) - _matches(filters, before)) * count)
+
+
+def get_counters(*names):
+    """Read the requested counters with a single query"""
+    values = dict(DashboardCounter.objects.filter(name__in=names).values_list('name', 'value'))
+    missing = [name for name in names if name not in values]
+    if missing:
+        values.update(recompute(missing))
+    return values
@@ -0,0 +1,43 @@
+"""
+Shared django-filter building blocks
+"""
+from datetime import datetime, time, timedelta
+
+import django_filters
+from django import forms
+from django.utils import timezone
+
+
+def start_of_day(value):
+    """Aware datetime for the first instant of the given date"""
+    return timezone.make_aware(datetime.combine(value, time.min))
+
+
+class CreatedDateRangeFilterSet(django_filters.FilterSet):
+    """
+    FilterSet with a created_at date range.
+    Bounds are converted to datetimes so the created_at index stays usable.
+    """
+
+    created_from = django_filters.DateFilter(
+        method='filter_created_from',
+        label='Desde',
+        widget=forms.DateInput(attrs={'type': 'date'}),
+    )
+    created_to = django_filters.DateFilter(
+        method='filter_created_to',
+        label='Hasta',
+        widget=forms.DateInput(attrs={'type': 'date'}),
+    )
+
+    def filter_created_from(self, queryset, name, value):
+        return queryset.filter(created_at__gte=start_of_day(value))
+
+    def filter_created_to(self, queryset, name, value):
+        return queryset.filter(created_at__lt=start_of_day(value + timedelta(days=1)))
+
+
+class UpdatedSinceFilterSet(django_filters.FilterSet):
+    """FilterSet for incremental API syncs: rows changed at or after updated_since"""
+
+    updated_since = django_filters.IsoDateTimeFilter(field_name='updated_at', lookup_expr='gte')
@@ -0,0 +1,91 @@
+"""
+Generation numbers of the models behind cached fragments and query results.
+
+Every create, update and delete of a tracked model increments its
+generation: from model signals for regular saves (see core.signals) and by
+calling bump() from bulk operations that bypass signals. A cached fragment
+or query result (see core.querycache) puts the generations of the models
+it reads in its key, so any change makes the old entries unreachable and
+nothing has to be deleted; they simply expire.
+
+Generations live in the database, next to the rows they describe, and a
+bump is only applied once the transaction that changed the rows commits:
+a rolled-back change leaves them alone, and the generation rows are not
+held locked for the rest of the transaction. During a request they are
+read once, all together, and remembered until the request finishes or
+bumps one of them; reads inside a transaction always go to the database.
+"""
+from contextvars import ContextVar
+from functools import partial
+
+from django.db import connection, transaction
+from django.db.models import F
+from .models import ModelGeneration
+
+TRACKED_MODELS = [
+    'users.User',
+    'patients.Patient',
+    'treatments.Treatment',
+    'treatments.MedicalOrder',
+    'laboratory.Puncture',
+    'laboratory.Oocyte',
+    'laboratory.Embryo',
+]
+
+# Saves that only touch these fields change nothing a fragment shows
+IGNORED_UPDATE_FIELDS = {'last_login'}
+
+# {label: generation} read during the current request, None outside requests
+_request_generations = ContextVar('request_generations', default=None)
+
+
+def start_request(**kwargs):
+    _request_generations.set({})
+
+
+def finish_request(**kwargs):
+    _request_generations.set(None)
+
+
+def _read(labels):
+    values = dict(ModelGeneration.objects.filter(label__in=labels).values_list('label', 'value'))
+    return {label: values.get(label, 0) for label in labels}
+
+
+def bump(*models):
+    """
+    Increment the generation of each model (classes or labels) when the
+    current transaction commits, right away outside one
+    """
+    labels = [model if isinstance(model, str) else model._meta.label for model in models]
+    transaction.on_commit(partial(_increment, labels))
+
+
+def _increment(labels):
+    for label in labels:
+        memo = _request_generations.get()
+        if memo is not None:
+            memo.pop(label, None)
+        if ModelGeneration.objects.filter(label=label).update(value=F('value') + 1):
+            continue
+        generation, created = ModelGeneration.objects.get_or_create(label=label, defaults={'value': 1})
+        if not created:
+            # Created concurrently between the update and the insert
+            ModelGeneration.objects.filter(label=label).update(value=F('value') + 1)
+
+
+def current(*labels):
+    """{label: generation} in at most one query; models never bumped are at 0"""
+    memo = _request_generations.get()
+    if memo is None or connection.in_atomic_block:
+        # Never remember values read in a transaction, it may roll back
+        return _read(labels)
+    if not memo.keys() >= set(labels):
+        memo.update(_read(sorted(set(TRACKED_MODELS) | set(labels))))
+    return {label: memo[label] for label in labels}
+
+
+def token(*labels):
+    """The generations of the given models as one cache key part, e.g. '12.4.7'"""
+    values = current(*labels)
+    return '.'.join(str(values[label]) for label in labels)
@@ -0,0 +1,250 @@
+"""
+Concurrent load test against a running server.
+
+Each virtual user is a thread with its own HTTP session: it logs in through
+the login form like a browser (CSRF cookie included) and repeats the
+scenario of its role until the deadline. Every request is recorded under
+"<METHOD> <url name>" and summarized with throughput, error rate and
+latency percentiles. The accounts and records the scenarios use are read
+from the database the server runs on, typically one filled by
+generate_synthetic_data (every synthetic user shares one password).
+"""
+import math
+import queue
+import random
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from django.urls import resolve, reverse
+
+REQUEST_TIMEOUT = 30
+OOCYTES_PER_PUNCTURE = 8
+OOCYTE_CHECKBOX_RE = re.compile(r'name="oocyte_ids" value="(\d+)"')
+
+
+class ScenarioAborted(Exception):
+    """The virtual user cannot go on (failed login, no data left)"""
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def record(self, label, milliseconds, ok):
+        with self._lock:
+            self._samples.setdefault(label, []).append((milliseconds, ok))
+
+    def summary(self, elapsed):
+        """One row per label plus a TOTAL row"""
+        with self._lock:
+            samples = {label: list(values) for label, values in self._samples.items()}
+        samples['TOTAL'] = [sample for values in samples.values() for sample in values]
+        rows = []
+        for label in sorted(samples, key=lambda label: (label == 'TOTAL', label)):
+            values = samples[label]
+            timings = sorted(milliseconds for milliseconds, ok in values)
+            errors = sum(1 for milliseconds, ok in values if not ok)
+            rows.append({
+                'label': label,
+                'requests': len(values),
+                'errors': errors,
+                'error_rate': errors / len(values) if values else 0.0,
+                'throughput': len(values) / elapsed if elapsed else 0.0,
+                'p50_ms': percentile(timings, 0.50),
+                'p95_ms': percentile(timings, 0.95),
+                'p99_ms': percentile(timings, 0.99),
+                'max_ms': timings[-1] if timings else 0.0,
+            })
+        return rows
+
+
+class VirtualUser:
+    def __init__(self, base_url, username, password, recorder, think_time=0.0):
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.recorder = recorder
+        self.think_time = think_time
+        self.session = requests.Session()
+
+    def request(self, method, name, kwargs=None, data=None, expect=200):
+        """Timed request to a named URL; returns the response, None on connection errors"""
+        url = self.base_url + reverse(name, kwargs=kwargs)
+        headers = {'Referer': url}
+        if method == 'POST':
+            headers['X-CSRFToken'] = self.session.cookies.get('csrftoken', '')
+        start = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, url, data=data, headers=headers, allow_redirects=False, timeout=REQUEST_TIMEOUT,
+            )
+        except requests.RequestException:
+            response = None
+        elapsed = (time.perf_counter() - start) * 1000
+        self.recorder.record(f'{method} {name}', elapsed, response is not None and response.status_code == expect)
+        if self.think_time:
+            time.sleep(random.uniform(0.5, 1.5) * self.think_time)
+        return response
+
+    def login(self):
+        self.request('GET', 'login')
+        response = self.request('POST', 'login', data={
+            'username': self.username,
+            'password': self.password,
+            'csrfmiddlewaretoken': self.session.cookies.get('csrftoken', ''),
+        }, expect=302)
+        if response is None or response.status_code != 302:
+            raise ScenarioAborted(f'No se pudo iniciar sesión como {self.username}')
+
+    def redirect_kwargs(self, response, name):
+        """kwargs of the URL a 302 response points to, when it is the named URL"""
+        if response is None or response.status_code != 302:
+            return None
+        match = resolve(urlsplit(response.headers['Location']).path)
+        return match.kwargs if match.url_name == name else None
+
+
+def doctor_scenario(user, data):
+    """Dashboard, patient list and the detail of one of the doctor's treatments"""
+    user.request('GET', 'dashboard')
+    user.request('GET', 'patient_list')
+    treatments = data['doctor_treatments'].get(user.username)
+    if treatments:
+        user.request('GET', 'treatment_detail', {'treatment_id': random.choice(treatments)})
+
+
+def lab_operator_scenario(user, data):
+    """Register a puncture, add its oocytes in a batch and mature them"""
+    try:
+        treatment_id = data['free_treatments'].get_nowait()
+    except queue.Empty:
+        raise ScenarioAborted('No quedan tratamientos sin punción para registrar')
+
+    response = user.request('POST', 'register_puncture', {'treatment_id': treatment_id}, data={
+        'date': time.strftime('%Y-%m-%dT%H:%M'),
+        'operating_room': '1',
+    }, expect=302)
+    kwargs = user.redirect_kwargs(response, 'puncture_detail')
+    if kwargs is None:
+        return
+
+    user.request('POST', 'puncture_detail', kwargs, data={
+        'id_prefix': f'LT-{kwargs["puncture_id"]}-',
+        'count': OOCYTES_PER_PUNCTURE,
+        'initial_state': 'IMMATURE',
+    }, expect=302)
+    response = user.request('GET', 'puncture_detail', kwargs)
+    oocyte_ids = OOCYTE_CHECKBOX_RE.findall(response.text) if response is not None else []
+    if oocyte_ids:
+        user.request('POST', 'transition_puncture_oocytes', kwargs, data={
+            'oocyte_ids': oocyte_ids,
+            'from_state': 'IMMATURE',
+            'to_state': 'MATURE',
+        }, expect=302)
+
+
+def patient_scenario(user, data):
+    """The pages of the patient portal"""
+    user.request('GET', 'dashboard')
+    user.request('GET', 'my_treatments')
+    user.request('GET', 'my_orders')
+    user.request('GET', 'my_biological_products')
+
+
+SCENARIOS = {
+    'doctor': doctor_scenario,
+    'lab_operator': lab_operator_scenario,
+    'patient': patient_scenario,
+}
+
+
+def load_scenario_data(prefix='', sample=200):
+    """
+    Accounts per role and the records the scenarios need: treatments of
+    each doctor, and active treatments without a puncture for the lab
+    operators to register.
+    """
+    from django.contrib.auth import get_user_model
+    from treatments.models import Treatment
+
+    User = get_user_model()
+    users = User.objects.filter(is_active=True, username__startswith=prefix)
+    accounts = {
+        'doctor': list(users.filter(role='DOCTOR').values_list('username', flat=True)[:sample]),
+        'lab_operator': list(users.filter(role='LAB_OPERATOR').values_list('username', flat=True)[:sample]),
+        'patient': list(
+            users.filter(role='PATIENT', patient_profile__treatments__isnull=False)
+            .distinct().values_list('username', flat=True)[:sample]
+        ),
+    }
+    doctor_treatments = {}
+    for treatment_id, username in (
+        Treatment.objects.filter(doctor__username__in=accounts['doctor'])
+        .order_by('-created_at').values_list('id', 'doctor__username')[:sample * 50]
+    ):
+        doctor_treatments.setdefault(username, []).append(treatment_id)
+
+    free_treatments = queue.Queue()
+    for treatment_id in Treatment.objects.filter(status='ACTIVE', puncture__isnull=True).values_list('id', flat=True)[:10000]:
+        free_treatments.put(treatment_id)
+
+    return {
+        'accounts': accounts,
+        'doctor_treatments': doctor_treatments,
+        'free_treatments': free_treatments,
+    }
+
+
+def _run_user(user, scenario, data, deadline, problems):
+    try:
+        user.login()
+        while time.monotonic() < deadline:
+            scenario(user, data)
+    except ScenarioAborted as exc:
+        problems.append(str(exc))
+    except Exception as exc:
+        problems.append(f'{user.username}: {type(exc).__name__}: {exc}')
+
+
+def run(base_url, mix, data, password, duration=60, ramp_up=0.0, think_time=0.0):
+    """
+    Run sum(mix.values()) virtual users, mix being {role: count}, for
+    duration seconds. Returns (summary rows, elapsed seconds, problems).
+    """
+    recorder = Recorder()
+    problems = []
+    threads = []
+    total = sum(mix.values())
+    start = time.monotonic()
+    deadline = start + ramp_up + duration
+    index = 0
+    for role, count in mix.items():
+        accounts = data['accounts'][role]
+        if count and not accounts:
+            raise ScenarioAborted(f'No hay usuarios activos con rol {role}')
+        for number in range(count):
+            user = VirtualUser(base_url, accounts[number % len(accounts)], password, recorder, think_time)
+            thread = threading.Thread(
+                target=_run_user, args=(user, SCENARIOS[role], data, deadline, problems), daemon=True,
+            )
+            threads.append(thread)
+            thread.start()
+            index += 1
+            if ramp_up and index < total:
+                time.sleep(ramp_up / total)
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+    return recorder.summary(elapsed), elapsed, sorted(set(problems))
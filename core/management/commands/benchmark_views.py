@@ -0,0 +1,95 @@
+"""
+Benchmark every view per role on a synthetic dataset, in a throwaway database
+Run with: python manage.py benchmark_views [--patients 2000] [--update-baseline]
+
+Wall time and memory depend on the machine: measure the baseline with
+--update-baseline where the comparison runs, or use --queries-only against
+the committed one.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from core import benchmark
+from core.synthetic import generate
+
+DEFAULT_BASELINE = settings.BASE_DIR / 'benchmarks' / 'views.json'
+
+
+class Command(BaseCommand):
+    help = 'Measure queries, latency and memory of every view per role and fail on regressions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=2000, help='Patients in the dataset (default: 2000)')
+        parser.add_argument('--oocytes-per-puncture', type=int, default=12)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--repeat', type=int, default=5, help='Timed requests per view and role')
+        parser.add_argument('--tolerance', type=float, default=0.5,
+                            help='Allowed relative growth of latency and memory (default: 0.5)')
+        parser.add_argument('--queries-only', action='store_true',
+                            help='Compare query counts and status only, for a baseline measured on another machine')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument('--update-baseline', action='store_true',
+                            help='Write the results as the new baseline instead of comparing')
+        parser.add_argument('--only', nargs='*', help='URL names to benchmark (default: all)')
+
+    def handle(self, *args, **options):
+        parameters = {
+            'patients': options['patients'],
+            'oocytes_per_puncture': options['oocytes_per_puncture'],
+            'seed': options['seed'],
+        }
+        if options['update_baseline'] and options['only']:
+            raise CommandError('--update-baseline mide todas las vistas; no se combina con --only')
+        baseline = None
+        if not options['update_baseline']:
+            try:
+                baseline = benchmark.load_baseline(options['baseline'])
+            except FileNotFoundError:
+                self.stdout.write(f"Sin línea base en {options['baseline']}: solo se controlan los presupuestos")
+            else:
+                if baseline['parameters'] != parameters:
+                    raise CommandError(
+                        f"La línea base se midió con {baseline['parameters']}; "
+                        f"repita con esos parámetros o use --update-baseline"
+                    )
+
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f"Generando datos ({options['patients']} pacientes)...")
+            dataset = generate(
+                seed=options['seed'],
+                patients=options['patients'],
+                oocytes_per_puncture=options['oocytes_per_puncture'],
+            )
+            results = benchmark.run(dataset, repeat=options['repeat'], only=options['only'],
+                                    progress=self.report)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['update_baseline']:
+            benchmark.save_baseline(options['baseline'], parameters, results)
+            self.stdout.write(f"✓ Línea base guardada en {options['baseline']}")
+            return
+
+        for debt in benchmark.over_budget(results):
+            self.stdout.write(f'! {debt}')
+        problems = benchmark.check(
+            results, baseline and baseline['results'], options['tolerance'], options['queries_only'],
+        )
+        if problems:
+            for problem in problems:
+                self.stderr.write(f'✗ {problem}')
+            raise CommandError(f'{len(problems)} regresiones')
+        self.stdout.write(f'✓ {len(results)} vistas dentro de los presupuestos')
+
+    def report(self, key, result):
+        if 'queries' in result:
+            self.stdout.write(
+                f"  {key:<48} {result['status']:>3} {result['queries']:>4} q "
+                f"{result['best_ms']:>8.1f} ms {result['peak_kib']:>9.1f} KiB"
+            )
+        else:
+            self.stdout.write(f"  {key:<48} {result['status']}")
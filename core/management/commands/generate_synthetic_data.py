@@ -0,0 +1,76 @@
+"""
+Generate a large deterministic synthetic dataset for performance work
+Run with: python manage.py generate_synthetic_data --patients 100000 [--seed 1]
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from core.synthetic import STAFF_PASSWORD, generate
+
+
+def rate(value):
+    value = float(value)
+    if not 0 <= value <= 1:
+        raise ValueError(value)
+    return value
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create a reproducible clinic of the given size (staff, patients, treatments, lab records)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=10000)
+        parser.add_argument('--treatments-per-patient', type=int, default=1)
+        parser.add_argument('--puncture-rate', type=rate, default=2 / 3,
+                            help='Fraction of treatments with a puncture (default: 0.67)')
+        parser.add_argument('--oocytes-per-puncture', type=int, default=10,
+                            help='Mean oocytes retrieved per puncture, ±50%% (default: 10)')
+        parser.add_argument('--fertilization-rate', type=rate, default=0.5,
+                            help='Fraction of mature oocytes that become embryos (default: 0.5)')
+        parser.add_argument('--transfer-rate', type=rate, default=0.4,
+                            help='Fraction of embryos transferred (default: 0.4)')
+        parser.add_argument('--pregnancy-rate', type=rate, default=0.45,
+                            help='Fraction of transfers with a positive beta (default: 0.45)')
+        parser.add_argument('--doctors', type=int, default=5)
+        parser.add_argument('--lab-operators', type=int, default=3)
+        parser.add_argument('--months', type=int, default=24, help='History spread over this many months')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--prefix', default='syn', help='Prefix of usernames and sample ids')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Patients per transaction')
+
+    def handle(self, *args, **options):
+        from django.contrib.auth import get_user_model
+
+        if options['patients'] < 1 or options['chunk_size'] < 1 or options['treatments_per_patient'] < 1:
+            raise CommandError('--patients, --chunk-size y --treatments-per-patient deben ser positivos')
+        if get_user_model().objects.filter(username=f"{options['prefix']}_admin").exists():
+            raise CommandError(f"Ya existe un dataset con el prefijo {options['prefix']!r}; use otro --prefix")
+
+        started = time.monotonic()
+
+        def progress(done, total):
+            self.stdout.write(f'  {done}/{total} pacientes ({time.monotonic() - started:.0f} s)')
+
+        dataset = generate(
+            seed=options['seed'],
+            patients=options['patients'],
+            treatments_per_patient=options['treatments_per_patient'],
+            puncture_rate=options['puncture_rate'],
+            oocytes_per_puncture=options['oocytes_per_puncture'],
+            fertilization_rate=options['fertilization_rate'],
+            transfer_rate=options['transfer_rate'],
+            pregnancy_rate=options['pregnancy_rate'],
+            doctors=options['doctors'],
+            lab_operators=options['lab_operators'],
+            months=options['months'],
+            chunk_size=options['chunk_size'],
+            prefix=options['prefix'],
+            progress=progress,
+        )
+        for label, count in dataset.counts.items():
+            self.stdout.write(f'✓ {label}: {count}')
+        self.stdout.write(
+            f"✓ Datos generados en {time.monotonic() - started:.0f} s; "
+            f"usuarios {options['prefix']}_admin, {options['prefix']}_director, {options['prefix']}_doctor0... "
+            f"/ {STAFF_PASSWORD}"
+        )
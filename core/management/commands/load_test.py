@@ -0,0 +1,90 @@
+"""
+Load test a running server with concurrent role-based virtual users
+Run with: python manage.py load_test --base-url http://127.0.0.1:8000 --users 20 --duration 60
+
+Start the server on a database filled by generate_synthetic_data first; the
+lab operator scenario registers punctures and oocytes in it.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from core import loadtest
+from core.synthetic import STAFF_PASSWORD
+
+DEFAULT_MIX = 'doctor=4,lab_operator=2,patient=4'
+
+
+def parse_mix(value):
+    """'doctor=4,patient=2' -> {'doctor': 4, 'patient': 2}"""
+    mix = {}
+    for part in value.split(','):
+        role, _, weight = part.partition('=')
+        role = role.strip()
+        if role not in loadtest.SCENARIOS or not weight.strip().isdigit():
+            raise ValueError(part)
+        mix[role] = int(weight)
+    return mix
+
+
+def split_users(total, weights):
+    """Distribute total users proportionally to the weights (largest remainder)"""
+    weight_sum = sum(weights.values())
+    exact = {role: total * weight / weight_sum for role, weight in weights.items()}
+    counts = {role: int(value) for role, value in exact.items()}
+    for role in sorted(exact, key=lambda role: exact[role] - counts[role], reverse=True)[:total - sum(counts.values())]:
+        counts[role] += 1
+    return counts
+
+
+class Command(BaseCommand):
+    help = 'Replay doctor, lab operator and patient scenarios concurrently and report latency per URL name'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--users', type=int, default=10, help='Concurrent virtual users')
+        parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                            help=f'Relative weight of each role (default: {DEFAULT_MIX})')
+        parser.add_argument('--duration', type=float, default=60, help='Seconds of load after ramp-up')
+        parser.add_argument('--ramp-up', type=float, default=5, help='Seconds to start all users')
+        parser.add_argument('--think-time', type=float, default=0,
+                            help='Mean pause between requests of a user, in seconds')
+        parser.add_argument('--prefix', default='syn_', help='Only use accounts whose username starts with this')
+        parser.add_argument('--password', default=STAFF_PASSWORD)
+        parser.add_argument('--json', help='Also write the summary to this file')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('--users debe ser positivo')
+        mix = split_users(options['users'], options['mix'])
+        data = loadtest.load_scenario_data(options['prefix'])
+
+        self.stdout.write(
+            f"Carga sobre {options['base_url']}: "
+            + ', '.join(f'{count} {role}' for role, count in mix.items())
+            + f" durante {options['duration']:.0f} s"
+        )
+        try:
+            rows, elapsed, problems = loadtest.run(
+                options['base_url'], mix, data, options['password'],
+                duration=options['duration'], ramp_up=options['ramp_up'], think_time=options['think_time'],
+            )
+        except loadtest.ScenarioAborted as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(
+            f"\n{'URL':<40} {'req':>7} {'err%':>6} {'req/s':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7}  (ms)"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['label']:<40} {row['requests']:>7} {row['error_rate'] * 100:>6.1f} "
+                f"{row['throughput']:>7.1f} {row['p50_ms']:>7.0f} {row['p95_ms']:>7.0f} "
+                f"{row['p99_ms']:>7.0f} {row['max_ms']:>7.0f}"
+            )
+        for problem in problems:
+            self.stdout.write(f'! {problem}')
+
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as file:
+                json.dump({'elapsed': elapsed, 'users': mix, 'results': rows}, file, indent=2)
+            self.stdout.write(f"✓ Resumen guardado en {options['json']}")
+        self.stdout.write(f'✓ {rows[-1]["requests"]} requests en {elapsed:.0f} s')
@@ -0,0 +1,14 @@
+"""
+Rebuild the full-text search entries from medical histories and study results
+Run with: python manage.py rebuild_search_index
+"""
+from django.core.management.base import BaseCommand
+from core.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the clinical full-text search index from scratch'
+
+    def handle(self, *args, **options):
+        total = rebuild_index()
+        self.stdout.write(f'✓ Registros indexados: {total}')
@@ -0,0 +1,22 @@
+"""
+Rebuild the materialized dashboard counters from the source tables
+Run with: python manage.py recompute_counters [name ...]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from core.counters import COUNTERS, recompute
+
+
+class Command(BaseCommand):
+    help = 'Recompute the dashboard counters from scratch to repair drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Counters to recompute (default: all)')
+
+    def handle(self, *args, **options):
+        names = options['names'] or list(COUNTERS)
+        unknown = [name for name in names if name not in COUNTERS]
+        if unknown:
+            raise CommandError(f"Contadores desconocidos: {', '.join(unknown)}")
+        
+        for name, value in recompute(names).items():
+            self.stdout.write(f'✓ {name}: {value}')
@@ -144,7 +144,8 @@ class Command(BaseCommand):
                 user=user,
                 defaults={
                     'occupation': 'Empleada',
-                    'medical_coverage': 'OSDE',
+                    'medical_coverage_id': 1,
+                    'medical_coverage_name': 'OSDE',
                     'member_number': f'OSDE-{dni}',
                 }
             )
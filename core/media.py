@@ -0,0 +1,115 @@
+"""
+Responses for protected media files.
+
+When a front-end server is configured (settings.MEDIA_OFFLOAD) the view only
+checks permissions and hands the transfer over with X-Accel-Redirect (nginx)
+or X-Sendfile (Apache); the front end then deals with ranges itself.
+Otherwise files are streamed with FileResponse (sendfile through the WSGI
+file wrapper) and single byte ranges are answered with 206 responses.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
+from .storage import PREFIX as CONTENT_ADDRESSED_PREFIX
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+# Content-addressed files never change
+IMMUTABLE_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'private, no-cache'
+
+
+def file_etag(name, stat):
+    if name.startswith(CONTENT_ADDRESSED_PREFIX):
+        return '"%s"' % os.path.splitext(os.path.basename(name))[0]
+    return '"%x-%x"' % (int(stat.st_mtime), stat.st_size)
+
+
+def parse_range(header, size):
+    """(start, end) of a single byte range, None to send the whole file"""
+    match = RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    start, end = match.groups()
+    if not start:
+        # Suffix range: the last N bytes
+        return max(size - int(end), 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    return start, end
+
+
+def _range_chunks(path, start, length):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _offload_response(name, full_path):
+    response = HttpResponse()
+    if settings.MEDIA_OFFLOAD == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + quote(name)
+    else:
+        response['X-Sendfile'] = full_path
+    # Let the front end fill in the type from the file
+    del response['Content-Type']
+    return response
+
+
+def file_response(request, name, full_path):
+    """Conditional, range-aware response for a media file"""
+    stat = os.stat(full_path)
+    etag = file_etag(name, stat)
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        if settings.MEDIA_OFFLOAD:
+            response = _offload_response(name, full_path)
+        else:
+            response = _stream_response(request, full_path, stat.st_size, etag)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = (
+        IMMUTABLE_CACHE_CONTROL if name.startswith(CONTENT_ADDRESSED_PREFIX) else REVALIDATE_CACHE_CONTROL
+    )
+    return response
+
+
+def _stream_response(request, full_path, size, etag):
+    byte_range = None
+    if 'HTTP_RANGE' in request.META:
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if not if_range or etag in parse_etags(if_range):
+            byte_range = parse_range(request.META['HTTP_RANGE'], size)
+
+    if byte_range is None:
+        response = FileResponse(open(full_path, 'rb'))
+    else:
+        start, end = byte_range
+        if start >= size or start > end:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        content_type, encoding = mimetypes.guess_type(full_path)
+        response = StreamingHttpResponse(
+            _range_chunks(full_path, start, end - start + 1),
+            status=206,
+            content_type=content_type or 'application/octet-stream',
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,233 @@
+"""
+Per-view performance metrics.
+
+MetricsMiddleware measures every request and aggregates the samples in
+memory per URL name:
+- wall time of the request
+- number and total time of SQL queries (through a connection execute wrapper)
+- template render time (through InstrumentedDjangoTemplates, the template
+  backend configured in settings)
+- response size
+Samples go into fixed-bucket histograms, from which p50/p95/p99 are
+estimated. The metrics view renders everything in the Prometheus text
+format. Values are per process: with several workers, scrape each of them
+or aggregate the histograms in Prometheus.
+"""
+import threading
+import time
+from contextvars import ContextVar
+
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+QUANTILES = (0.5, 0.95, 0.99)
+
+# metric name -> (help text, buckets)
+METRICS = {
+    'django_view_duration_seconds': ('Wall time of the request', DURATION_BUCKETS),
+    'django_view_db_queries': ('SQL queries per request', QUERY_BUCKETS),
+    'django_view_db_duration_seconds': ('Time spent in SQL queries per request', DURATION_BUCKETS),
+    'django_view_template_duration_seconds': ('Time spent rendering templates per request', DURATION_BUCKETS),
+    'django_view_response_bytes': ('Response body size', SIZE_BUCKETS),
+}
+
+UNRESOLVED_VIEW = '<unresolved>'
+
+# Template time of the request being served, None outside a request
+_template_time = ContextVar('template_time', default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as in the Prometheus data model"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            index = len(self.buckets)
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+    def quantile(self, q):
+        """Estimate by linear interpolation inside the bucket holding the rank"""
+        if not self.count:
+            return float('nan')
+        rank = q * self.count
+        lower, seen = 0, 0
+        for bound, count in zip(self.buckets, self.counts):
+            if seen + count >= rank:
+                return lower + (bound - lower) * (rank - seen) / count
+            lower, seen = bound, seen + count
+        # In the overflow bucket: the largest finite bound is the best estimate
+        return self.buckets[-1]
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+        self._responses = {}
+
+    def record(self, view, status, samples):
+        with self._lock:
+            histograms = self._views.get(view)
+            if histograms is None:
+                histograms = self._views[view] = {
+                    name: Histogram(buckets) for name, (help_text, buckets) in METRICS.items()
+                }
+            for name, value in samples.items():
+                histograms[name].observe(value)
+            key = (view, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+            self._responses.clear()
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            lines = [
+                '# HELP django_view_responses_total Responses per view and status code',
+                '# TYPE django_view_responses_total counter',
+            ]
+            for (view, status), count in sorted(self._responses.items()):
+                lines.append(f'django_view_responses_total{{view="{_escape(view)}",status="{status}"}} {count}')
+
+            for name, (help_text, buckets) in METRICS.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for view, histograms in sorted(self._views.items()):
+                    histogram = histograms[name]
+                    label = f'view="{_escape(view)}"'
+                    for bound, total in histogram.cumulative():
+                        le = '+Inf' if bound == float('inf') else _number(bound)
+                        lines.append(f'{name}_bucket{{{label},le="{le}"}} {total}')
+                    lines.append(f'{name}_sum{{{label}}} {_number(histogram.sum)}')
+                    lines.append(f'{name}_count{{{label}}} {histogram.count}')
+
+                lines.append(f'# HELP {name}_quantile {help_text}, estimated quantiles')
+                lines.append(f'# TYPE {name}_quantile gauge')
+                for view, histograms in sorted(self._views.items()):
+                    for q in QUANTILES:
+                        value = histograms[name].quantile(q)
+                        lines.append(
+                            f'{name}_quantile{{view="{_escape(view)}",quantile="{q}"}} {_number(value)}'
+                        )
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+
+
+class _QueryTimer:
+    """Execute wrapper counting the queries of a request and their time"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """Record wall, SQL and template time and response size per URL name"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = _QueryTimer()
+        template_time = [0.0]
+        token = _template_time.set(template_time)
+        start = time.perf_counter()
+        try:
+            wrappers = [connection.execute_wrapper(timer) for connection in connections.all()]
+            for wrapper in wrappers:
+                wrapper.__enter__()
+            try:
+                response = self.get_response(request)
+            finally:
+                for wrapper in reversed(wrappers):
+                    wrapper.__exit__(None, None, None)
+        finally:
+            _template_time.reset(token)
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = match.view_name if match else UNRESOLVED_VIEW
+        if view == 'metrics':
+            return response
+        registry.record(view, response.status_code, {
+            'django_view_duration_seconds': duration,
+            'django_view_db_queries': timer.count,
+            'django_view_db_duration_seconds': timer.duration,
+            'django_view_template_duration_seconds': template_time[0],
+            'django_view_response_bytes': _response_size(response),
+        })
+        return response
+
+
+def _response_size(response):
+    if not response.streaming:
+        return len(response.content)
+    # Streamed bodies are not buffered; rely on the declared length
+    return int(response.get('Content-Length') or 0)
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        spent = _template_time.get()
+        if spent is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            spent[0] += time.perf_counter() - start
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """Django template backend whose templates report their render time"""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return InstrumentedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
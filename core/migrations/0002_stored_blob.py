@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Nombre')),
+                ('size', models.BigIntegerField(verbose_name='Tamaño')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='Referencias')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archivo Almacenado',
+                'verbose_name_plural': 'Archivos Almacenados',
+            },
+        ),
+    ]
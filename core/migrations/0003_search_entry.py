@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class RunSQLOn(migrations.RunSQL):
+    """RunSQL applied only on one database vendor"""
+
+    def __init__(self, vendor, *args, **kwargs):
+        self.vendor = vendor
+        super().__init__(*args, **kwargs)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+# Inlined so later changes to core.search cannot alter this migration
+SQLITE_SETUP = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS core_searchentry_fts USING fts5(
+        body, content='core_searchentry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS core_searchentry_fts_insert AFTER INSERT ON core_searchentry BEGIN
+        INSERT INTO core_searchentry_fts(rowid, body) VALUES (new.id, new.body);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS core_searchentry_fts_delete AFTER DELETE ON core_searchentry BEGIN
+        INSERT INTO core_searchentry_fts(core_searchentry_fts, rowid, body) VALUES ('delete', old.id, old.body);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS core_searchentry_fts_update AFTER UPDATE OF body ON core_searchentry BEGIN
+        INSERT INTO core_searchentry_fts(core_searchentry_fts, rowid, body) VALUES ('delete', old.id, old.body);
+        INSERT INTO core_searchentry_fts(rowid, body) VALUES (new.id, new.body);
+    END""",
+    "INSERT INTO core_searchentry_fts(core_searchentry_fts) VALUES ('rebuild')",
+]
+SQLITE_TEARDOWN = [
+    'DROP TRIGGER IF EXISTS core_searchentry_fts_insert',
+    'DROP TRIGGER IF EXISTS core_searchentry_fts_delete',
+    'DROP TRIGGER IF EXISTS core_searchentry_fts_update',
+    'DROP TABLE IF EXISTS core_searchentry_fts',
+]
+POSTGRESQL_SETUP = [
+    "CREATE INDEX IF NOT EXISTS core_searchentry_body_gin ON core_searchentry "
+    "USING gin (to_tsvector('spanish', body))",
+]
+POSTGRESQL_TEARDOWN = ['DROP INDEX IF EXISTS core_searchentry_body_gin']
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_stored_blob'),
+        ('patients', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('MEDICAL_HISTORY', 'Historia Clínica'), ('STUDY_RESULT', 'Resultado de Estudio')], max_length=20, verbose_name='Tipo')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=200, verbose_name='Título')),
+                ('body', models.TextField(verbose_name='Texto')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='patients.patient')),
+            ],
+            options={
+                'verbose_name': 'Entrada de Búsqueda',
+                'verbose_name_plural': 'Entradas de Búsqueda',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='core_search_unique_object')],
+            },
+        ),
+        RunSQLOn('sqlite', SQLITE_SETUP, SQLITE_TEARDOWN),
+        RunSQLOn('postgresql', POSTGRESQL_SETUP, POSTGRESQL_TEARDOWN),
+    ]
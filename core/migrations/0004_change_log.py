@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_search_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50, verbose_name='Modelo')),
+                ('object_id', models.BigIntegerField(verbose_name='ID del Registro')),
+                ('action', models.CharField(choices=[('CREATE', 'Alta'), ('UPDATE', 'Modificación'), ('DELETE', 'Baja')], max_length=10, verbose_name='Acción')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Registro de Cambio',
+                'verbose_name_plural': 'Registro de Cambios',
+                'indexes': [models.Index(fields=['model', 'id'], name='core_changelog_model_idx')],
+            },
+        ),
+    ]
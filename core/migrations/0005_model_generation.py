@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelGeneration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=100, unique=True, verbose_name='Modelo')),
+                ('value', models.PositiveBigIntegerField(default=0, verbose_name='Generación')),
+            ],
+            options={
+                'verbose_name': 'Generación de Modelo',
+                'verbose_name_plural': 'Generaciones de Modelos',
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations
+
+# Copied from core.search.SOURCES so later changes there cannot alter this migration
+MEDICAL_HISTORY_FIELDS = [
+    'clinical_background', 'surgical_background', 'personal_background', 'family_background',
+    'gynecological_background', 'physical_exam', 'phenotype',
+]
+STUDY_RESULT_FIELDS = ['study_name', 'result_text']
+
+
+def _body(instance, fields):
+    return '\n'.join(getattr(instance, field) for field in fields if getattr(instance, field))
+
+
+def index_existing_records(apps, schema_editor):
+    """Index the medical histories and study results written before search existed"""
+    SearchEntry = apps.get_model('core', 'SearchEntry')
+    MedicalHistory = apps.get_model('patients', 'MedicalHistory')
+    StudyResult = apps.get_model('treatments', 'StudyResult')
+
+    SearchEntry.objects.all().delete()
+    entries = [
+        SearchEntry(
+            kind='MEDICAL_HISTORY',
+            object_id=history.pk,
+            patient_id=history.patient_id,
+            title='Historia Clínica',
+            body=_body(history, MEDICAL_HISTORY_FIELDS),
+        )
+        for history in MedicalHistory.objects.iterator(chunk_size=1000)
+    ]
+    SearchEntry.objects.bulk_create(entries, batch_size=1000)
+    entries = [
+        SearchEntry(
+            kind='STUDY_RESULT',
+            object_id=result.pk,
+            patient_id=result.treatment.patient_id,
+            title=result.study_name[:200],
+            body=_body(result, STUDY_RESULT_FIELDS),
+        )
+        for result in StudyResult.objects.select_related('treatment').iterator(chunk_size=1000)
+    ]
+    SearchEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_model_generation'),
+        ('patients', '0001_initial'),
+        ('treatments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_existing_records, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,118 @@
+from django.db import models
+
+
+class DashboardCounter(models.Model):
+    """
+    Materialized count shown on the dashboards.
+    Kept up to date incrementally by core.counters.
+    """
+    
+    name = models.CharField(max_length=50, unique=True, verbose_name='Nombre')
+    value = models.BigIntegerField(default=0, verbose_name='Valor')
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+    
+    class Meta:
+        verbose_name = 'Contador del Dashboard'
+        verbose_name_plural = 'Contadores del Dashboard'
+
+
+class StoredBlob(models.Model):
+    """
+    A file kept by core.storage.ContentAddressedStorage.
+    ref_count is the number of file fields pointing at it; the file is
+    removed from disk when it drops to zero.
+    """
+    
+    name = models.CharField(max_length=255, unique=True, verbose_name='Nombre')
+    size = models.BigIntegerField(verbose_name='Tamaño')
+    ref_count = models.PositiveIntegerField(default=0, verbose_name='Referencias')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+    
+    class Meta:
+        verbose_name = 'Archivo Almacenado'
+        verbose_name_plural = 'Archivos Almacenados'
+
+
+class SearchEntry(models.Model):
+    """
+    Searchable copy of the clinical narrative of one record.
+    Kept in sync by core.signals; the full-text index over body is created
+    per database backend in the migrations (see core.search).
+    """
+    
+    KIND_CHOICES = [
+        ('MEDICAL_HISTORY', 'Historia Clínica'),
+        ('STUDY_RESULT', 'Resultado de Estudio'),
+    ]
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name='Tipo')
+    object_id = models.PositiveBigIntegerField()
+    patient = models.ForeignKey('patients.Patient', on_delete=models.CASCADE, related_name='search_entries')
+    title = models.CharField(max_length=200, verbose_name='Título')
+    body = models.TextField(verbose_name='Texto')
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.title}"
+    
+    class Meta:
+        verbose_name = 'Entrada de Búsqueda'
+        verbose_name_plural = 'Entradas de Búsqueda'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='core_search_unique_object'),
+        ]
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Append-only record of a create, update or delete of a clinical row.
+    The id is the sequence downstream systems sync from (see core.changelog).
+    """
+    
+    ACTION_CHOICES = [
+        ('CREATE', 'Alta'),
+        ('UPDATE', 'Modificación'),
+        ('DELETE', 'Baja'),
+    ]
+    
+    model = models.CharField(max_length=50, verbose_name='Modelo')
+    object_id = models.BigIntegerField(verbose_name='ID del Registro')
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, verbose_name='Acción')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"#{self.id} {self.action} {self.model} {self.object_id}"
+    
+    class Meta:
+        verbose_name = 'Registro de Cambio'
+        verbose_name_plural = 'Registro de Cambios'
+        indexes = [
+            models.Index(fields=['model', 'id'], name='core_changelog_model_idx'),
+        ]
+
+
+class ModelGeneration(models.Model):
+    """
+    Number of times the rows of one model changed.
+    Bumped by core.generations; cached fragments put it in their key.
+    """
+    
+    label = models.CharField(max_length=100, unique=True, verbose_name='Modelo')
+    value = models.PositiveBigIntegerField(default=0, verbose_name='Generación')
+    
+    def __str__(self):
+        return f"{self.label}: {self.value}"
+    
+    class Meta:
+        verbose_name = 'Generación de Modelo'
+        verbose_name_plural = 'Generaciones de Modelos'
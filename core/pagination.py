@@ -0,0 +1,124 @@
+"""
+Keyset (cursor) pagination helpers for large list views
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded"""
+
+
+def encode_cursor(created_at, pk):
+    """Encode the (created_at, id) position of a row as an opaque cursor"""
+    raw = f'{created_at.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor into (created_at, id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        created_at, pk = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated queryset.
+    Iterable like a list; exposes querystrings for the neighbouring pages.
+    """
+
+    def __init__(self, object_list, has_next, has_previous, params, field):
+        self.object_list = object_list
+        self.has_next = has_next and bool(object_list)
+        self.has_previous = has_previous and bool(object_list)
+        self._params = params
+        self._field = field
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def _querystring(self, direction, obj):
+        params = self._params.copy()
+        params.pop('after', None)
+        params.pop('before', None)
+        params[direction] = encode_cursor(getattr(obj, self._field), obj.pk)
+        return params.urlencode()
+
+    @property
+    def next_querystring(self):
+        if not self.has_next:
+            return ''
+        return self._querystring('after', self.object_list[-1])
+
+    @property
+    def previous_querystring(self):
+        if not self.has_previous:
+            return ''
+        return self._querystring('before', self.object_list[0])
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset newest-first on (field, id) without OFFSET.
+
+    Each page is a single indexed range scan, so the cost of a page does not
+    depend on how deep into the table it is. Cursors are read from the
+    ``after`` / ``before`` request parameters; an invalid cursor falls back
+    to the first page.
+    """
+
+    def __init__(self, queryset, per_page=50, field='created_at'):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+
+    def get_page(self, params):
+        after = params.get('after')
+        before = params.get('before')
+
+        try:
+            if before:
+                return self._page_before(decode_cursor(before), params)
+            if after:
+                return self._page_after(decode_cursor(after), params)
+        except InvalidCursor:
+            pass
+        return self._page_after(None, params)
+
+    def _page_after(self, cursor, params):
+        queryset = self.queryset.order_by(f'-{self.field}', '-id')
+        if cursor is not None:
+            value, pk = cursor
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__lt': value}) |
+                Q(**{self.field: value, 'id__lt': pk})
+            )
+        rows = list(queryset[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return KeysetPage(rows[:self.per_page], has_next, cursor is not None, params, self.field)
+
+    def _page_before(self, cursor, params):
+        value, pk = cursor
+        queryset = self.queryset.order_by(self.field, 'id').filter(
+            Q(**{f'{self.field}__gt': value}) |
+            Q(**{self.field: value, 'id__gt': pk})
+        )
+        rows = list(queryset[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return KeysetPage(rows, True, has_previous, params, self.field)
@@ -0,0 +1,173 @@
+"""
+Generational cache of query results.
+
+A function decorated with @cached(*model_labels) keeps its result per
+arguments under a key that includes the current generations of those
+models (see core.generations). Any save, delete or bulk change of one of
+them makes the old results unreachable, so callers never invalidate by
+hand. Results must be picklable; a returned QuerySet is evaluated into a
+list. Nothing is stored from inside a transaction, which may still roll
+back.
+
+QUERY_CACHE_BACKEND in settings selects where results live: 'local' keeps
+them in each process, evicting the least recently used beyond
+QUERY_CACHE_MAX_ENTRIES; 'shared' stores them in the default Django cache
+(Redis or Memcached in production), which evicts on its own. stats()
+reports hits and misses per function for the /metrics/ endpoint.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.db.models.query import QuerySet
+from . import generations
+
+SHARED_TIMEOUT = 3600
+
+_MISSING = object()
+
+
+class LocalMemoryBackend:
+    """In-process LRU dictionary"""
+
+    def __init__(self, max_entries=2000):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is not _MISSING:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SharedCacheBackend:
+    """A Django cache shared by every process"""
+
+    def __init__(self, alias='default', timeout=SHARED_TIMEOUT):
+        self.alias = alias
+        self.timeout = timeout
+
+    def get(self, key):
+        return caches[self.alias].get(f'querycache:{key}', _MISSING)
+
+    def set(self, key, value):
+        caches[self.alias].set(f'querycache:{key}', value, self.timeout)
+
+    def clear(self):
+        # Entries of older generations are never read again and expire
+        pass
+
+
+BACKENDS = {
+    'local': lambda: LocalMemoryBackend(settings.QUERY_CACHE_MAX_ENTRIES),
+    'shared': SharedCacheBackend,
+}
+
+_backend = None
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = BACKENDS[settings.QUERY_CACHE_BACKEND]()
+    return _backend
+
+
+def _record(name, hit):
+    with _stats_lock:
+        counts = _stats.setdefault(name, {'hits': 0, 'misses': 0})
+        counts['hits' if hit else 'misses'] += 1
+
+
+def stats():
+    """{function name: {'hits': n, 'misses': n}} since the process started"""
+    with _stats_lock:
+        return {name: dict(counts) for name, counts in _stats.items()}
+
+
+def clear():
+    """Drop the local entries and the stats"""
+    get_backend().clear()
+    with _stats_lock:
+        _stats.clear()
+
+
+def cached(*models):
+    """
+    Cache the result of the decorated function per arguments until a row of
+    one of the models (labels from core.generations.TRACKED_MODELS) changes
+    """
+    untracked = set(models) - set(generations.TRACKED_MODELS)
+    if untracked:
+        raise ValueError(f'Models without generations: {sorted(untracked)}')
+
+    def decorator(function):
+        name = f'{function.__module__}.{function.__qualname__}'
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            arguments = hashlib.sha1(repr((args, sorted(kwargs.items()))).encode()).hexdigest()
+            key = f'{name}:{generations.token(*models)}:{arguments}'
+            backend = get_backend()
+            value = backend.get(key)
+            _record(name, value is not _MISSING)
+            if value is _MISSING:
+                value = function(*args, **kwargs)
+                if isinstance(value, QuerySet):
+                    value = list(value)
+                if not connection.in_atomic_block:
+                    backend.set(key, value)
+            return value
+
+        wrapper.models = models
+        return wrapper
+
+    return decorator
+
+
+def render_metrics():
+    """Hit and miss counters in the Prometheus text exposition format"""
+    counts = stats()
+    lines = []
+    for kind in ('hits', 'misses'):
+        metric = f'django_query_cache_{kind}_total'
+        lines.append(f'# HELP {metric} Generational query cache {kind} per cached function')
+        lines.append(f'# TYPE {metric} counter')
+        for name in sorted(counts):
+            lines.append(f'{metric}{{function="{name}"}} {counts[name][kind]}')
+    backend = get_backend()
+    if isinstance(backend, LocalMemoryBackend):
+        lines += [
+            '# HELP django_query_cache_entries Results held by the local query cache',
+            '# TYPE django_query_cache_entries gauge',
+            f'django_query_cache_entries {len(backend)}',
+            '# HELP django_query_cache_evictions_total Least recently used results dropped from the local query cache',
+            '# TYPE django_query_cache_evictions_total counter',
+            f'django_query_cache_evictions_total {backend.evictions}',
+        ]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,167 @@
+"""
+Full-text search over the clinical narrative.
+
+Medical histories and study results are copied into SearchEntry (one row per
+record, kept in sync by core.signals) and indexed per backend:
+- SQLite: an FTS5 table over core_searchentry kept up to date by triggers,
+  ranked with bm25() and highlighted with snippet()
+- PostgreSQL: a GIN index on to_tsvector('spanish', body), ranked with
+  ts_rank() and highlighted with ts_headline()
+The rebuild_search_index command repopulates SearchEntry from scratch, as
+core/migrations/0006_backfill_search_entries.py does once on upgrade.
+"""
+import re
+
+from django.apps import apps
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from .models import SearchEntry
+
+FTS_TABLE = 'core_searchentry_fts'
+TS_CONFIG = 'spanish'
+RESULT_LIMIT = 50
+
+# Highlight markers, replaced by <mark> once the snippet is escaped
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+# model label -> (kind, title, indexed text fields)
+SOURCES = {
+    'patients.MedicalHistory': ('MEDICAL_HISTORY', lambda obj: 'Historia Clínica', [
+        'clinical_background', 'surgical_background', 'personal_background', 'family_background',
+        'gynecological_background', 'physical_exam', 'phenotype',
+    ]),
+    'treatments.StudyResult': ('STUDY_RESULT', lambda obj: obj.study_name, ['study_name', 'result_text']),
+}
+
+# The FTS5 table, its triggers and the GIN index are created by
+# core/migrations/0003_search_entry.py
+
+
+def _source(instance):
+    return SOURCES[instance._meta.label]
+
+
+def _patient_id(instance):
+    if instance._meta.label == 'treatments.StudyResult':
+        return instance.treatment.patient_id
+    return instance.patient_id
+
+
+def build_entry(instance):
+    """Unsaved SearchEntry for a source record"""
+    kind, title, fields = _source(instance)
+    return SearchEntry(
+        kind=kind,
+        object_id=instance.pk,
+        patient_id=_patient_id(instance),
+        title=title(instance)[:200],
+        body='\n'.join(getattr(instance, field) for field in fields if getattr(instance, field)),
+    )
+
+
+def index_instance(instance):
+    entry = build_entry(instance)
+    SearchEntry.objects.update_or_create(
+        kind=entry.kind,
+        object_id=entry.object_id,
+        defaults={'patient_id': entry.patient_id, 'title': entry.title, 'body': entry.body},
+    )
+
+
+def unindex_instance(instance):
+    kind = _source(instance)[0]
+    SearchEntry.objects.filter(kind=kind, object_id=instance.pk).delete()
+
+
+def reassign_study_results(treatment):
+    """Move the entries of a treatment's study results to its current patient"""
+    SearchEntry.objects.filter(
+        kind='STUDY_RESULT',
+        object_id__in=treatment.study_results.values('id'),
+    ).update(patient_id=treatment.patient_id)
+
+
+def rebuild_index(batch_size=1000):
+    """Repopulate SearchEntry from every source model. Returns the entry count"""
+    SearchEntry.objects.all().delete()
+    total = 0
+    for label in SOURCES:
+        queryset = apps.get_model(label).objects.all()
+        if label == 'treatments.StudyResult':
+            queryset = queryset.select_related('treatment')
+        entries = [build_entry(instance) for instance in queryset.iterator(chunk_size=batch_size)]
+        SearchEntry.objects.bulk_create(entries, batch_size=batch_size)
+        total += len(entries)
+    return total
+
+
+def _terms(query):
+    return re.findall(r'\w+', query)
+
+
+def _scope(patient_ids):
+    if patient_ids is None:
+        return '', []
+    subquery, params = patient_ids.query.sql_with_params()
+    return f'AND e.patient_id IN ({subquery})', list(params)
+
+
+def _sqlite_search(terms, limit, patient_ids):
+    # Every term quoted, so user input is never parsed as FTS5 syntax
+    match = ' '.join(f'"{term}"' for term in terms)
+    scope, scope_params = _scope(patient_ids)
+    sql = f"""
+        SELECT e.id, e.kind, e.object_id, e.patient_id, e.title,
+               snippet({FTS_TABLE}, 0, %s, %s, '…', 16) AS snippet
+        FROM {FTS_TABLE}
+        JOIN core_searchentry e ON e.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s {scope}
+        ORDER BY bm25({FTS_TABLE})
+        LIMIT %s
+    """
+    return sql, [MARK_START, MARK_END, match, *scope_params, limit]
+
+
+def _postgresql_search(terms, limit, patient_ids):
+    scope, scope_params = _scope(patient_ids)
+    sql = f"""
+        SELECT e.id, e.kind, e.object_id, e.patient_id, e.title,
+               ts_headline('{TS_CONFIG}', e.body, q.query, %s) AS snippet
+        FROM core_searchentry e, plainto_tsquery('{TS_CONFIG}', %s) AS q(query)
+        WHERE to_tsvector('{TS_CONFIG}', e.body) @@ q.query {scope}
+        ORDER BY ts_rank(to_tsvector('{TS_CONFIG}', e.body), q.query) DESC
+        LIMIT %s
+    """
+    options = f'StartSel={MARK_START}, StopSel={MARK_END}, MaxWords=30, MinWords=10'
+    return sql, [options, ' '.join(terms), *scope_params, limit]
+
+
+def search(query, limit=RESULT_LIMIT, patient_ids=None):
+    """
+    Ranked matches for a free-text query, best first. Each result is a dict
+    with the SearchEntry columns plus an HTML-safe snippet. patient_ids, a
+    values() queryset of patient ids, restricts the matches to those
+    patients before ranking and limiting.
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+    if connection.vendor == 'postgresql':
+        sql, params = _postgresql_search(terms, limit, patient_ids)
+    else:
+        sql, params = _sqlite_search(terms, limit, patient_ids)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    kinds = dict(SearchEntry.KIND_CHOICES)
+    for result in results:
+        result['kind_display'] = kinds[result['kind']]
+        result['snippet'] = mark_safe(
+            escape(result['snippet']).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+        )
+    return results
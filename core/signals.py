@@ -0,0 +1,176 @@
+"""
+Signal handlers keeping the dashboard counters in sync with regular saves,
+the references of content-addressed files up to date, the search index
+in step with the clinical texts, the change log appended and the model
+generations bumped
+"""
+from functools import partial
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import FileField
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import post_init, post_save, post_delete
+from . import changelog, counters, generations, search
+from .models import ChangeLogEntry
+from .storage import ContentAddressedStorage
+
+
+def _snapshot(instance):
+    values = {}
+    for field in counters.tracked_fields(instance._meta.label):
+        if field not in instance.__dict__:
+            # Deferred field: the previous value is unknown
+            return None
+        values[field] = instance.__dict__[field]
+    return values
+
+
+def _recompute_model_counters(model):
+    counters.recompute([
+        name for name, (model_label, filters) in counters.COUNTERS.items()
+        if model_label == model._meta.label
+    ])
+
+
+def remember_counted_values(sender, instance, **kwargs):
+    instance._counter_snapshot = _snapshot(instance)
+
+
+# Counters move once the save commits: a rolled back save leaves them alone
+# and, outside a transaction, the row is already stored when they move
+
+def update_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = None if created else instance._counter_snapshot
+    after = _snapshot(instance)
+    if not created and before is None:
+        transaction.on_commit(partial(_recompute_model_counters, sender))
+    else:
+        transaction.on_commit(partial(counters.record_change, sender, before, after))
+    instance._counter_snapshot = after
+
+
+def update_counters_on_delete(sender, instance, **kwargs):
+    if instance._counter_snapshot is None:
+        transaction.on_commit(partial(_recompute_model_counters, sender))
+    else:
+        transaction.on_commit(partial(counters.record_change, sender, instance._counter_snapshot, None))
+
+
+for model_label in counters.tracked_models():
+    post_init.connect(remember_counted_values, sender=model_label, dispatch_uid=f'counters_init_{model_label}')
+    post_save.connect(update_counters_on_save, sender=model_label, dispatch_uid=f'counters_save_{model_label}')
+    post_delete.connect(update_counters_on_delete, sender=model_label, dispatch_uid=f'counters_delete_{model_label}')
+
+
+def _content_addressed_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage)
+    ]
+
+
+def remember_file_names(sender, instance, **kwargs):
+    instance._stored_file_names = {
+        field.attname: str(instance.__dict__.get(field.attname) or '')
+        for field in _content_addressed_fields(sender)
+    }
+
+
+def release_replaced_files(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    current = {}
+    for field in _content_addressed_fields(sender):
+        name = getattr(instance, field.attname).name or ''
+        previous = instance._stored_file_names.get(field.attname, '')
+        if previous and previous != name:
+            field.storage.delete(previous)
+        current[field.attname] = name
+    instance._stored_file_names = current
+
+
+def release_deleted_files(sender, instance, **kwargs):
+    for field in _content_addressed_fields(sender):
+        name = getattr(instance, field.attname).name
+        if name:
+            field.storage.delete(name)
+
+
+for model in apps.get_models():
+    if _content_addressed_fields(model):
+        post_init.connect(remember_file_names, sender=model, dispatch_uid=f'cas_init_{model._meta.label}')
+        post_save.connect(release_replaced_files, sender=model, dispatch_uid=f'cas_save_{model._meta.label}')
+        post_delete.connect(release_deleted_files, sender=model, dispatch_uid=f'cas_delete_{model._meta.label}')
+
+
+def update_search_entry(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_instance(instance)
+
+
+def remove_search_entry(sender, instance, **kwargs):
+    search.unindex_instance(instance)
+
+
+for model_label in search.SOURCES:
+    post_save.connect(update_search_entry, sender=model_label, dispatch_uid=f'search_save_{model_label}')
+    post_delete.connect(remove_search_entry, sender=model_label, dispatch_uid=f'search_delete_{model_label}')
+
+
+def remember_treatment_patient(sender, instance, **kwargs):
+    instance._indexed_patient_id = instance.__dict__.get('patient_id')
+
+
+def reassign_study_result_entries(sender, instance, created, raw=False, **kwargs):
+    # Study result entries carry the patient of their treatment
+    if raw or created or instance._indexed_patient_id == instance.patient_id:
+        return
+    search.reassign_study_results(instance)
+    instance._indexed_patient_id = instance.patient_id
+
+
+post_init.connect(remember_treatment_patient, sender='treatments.Treatment', dispatch_uid='search_treatment_init')
+post_save.connect(reassign_study_result_entries, sender='treatments.Treatment', dispatch_uid='search_treatment_save')
+
+
+def log_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    ChangeLogEntry.objects.create(
+        model=sender._meta.label.lower(),
+        object_id=instance.pk,
+        action='CREATE' if created else 'UPDATE',
+    )
+
+
+def log_delete(sender, instance, **kwargs):
+    ChangeLogEntry.objects.create(model=sender._meta.label.lower(), object_id=instance.pk, action='DELETE')
+
+
+for model_label in changelog.TRACKED_MODELS:
+    post_save.connect(log_save, sender=model_label, dispatch_uid=f'changelog_save_{model_label}')
+    post_delete.connect(log_delete, sender=model_label, dispatch_uid=f'changelog_delete_{model_label}')
+
+
+def bump_generation_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and set(update_fields) <= generations.IGNORED_UPDATE_FIELDS:
+        return
+    generations.bump(sender)
+
+
+def bump_generation_on_delete(sender, instance, **kwargs):
+    generations.bump(sender)
+
+
+for model_label in generations.TRACKED_MODELS:
+    post_save.connect(bump_generation_on_save, sender=model_label, dispatch_uid=f'generation_save_{model_label}')
+    post_delete.connect(bump_generation_on_delete, sender=model_label, dispatch_uid=f'generation_delete_{model_label}')
+
+request_started.connect(generations.start_request, dispatch_uid='generations_request_started')
+request_finished.connect(generations.finish_request, dispatch_uid='generations_request_finished')
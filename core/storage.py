@@ -0,0 +1,137 @@
+"""
+Content-addressed file storage.
+
+Uploads are streamed to a temporary file in chunks while being hashed and
+then stored once as cas/<2 hex>/<sha256><ext>, whatever the original name.
+Uploading the same document again only adds a reference (StoredBlob); the
+file is removed when the last reference goes away. A stored file never
+changes, so its URL can be cached indefinitely.
+
+Model fields using this storage release their references through the
+signals in core.signals, since Django never deletes files by itself.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+from .models import StoredBlob
+
+PREFIX = 'cas/'
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that deduplicates files by content"""
+    
+    def _save(self, name, content):
+        directory = self.path(PREFIX)
+        os.makedirs(directory, exist_ok=True)
+        
+        digest = hashlib.sha256()
+        size = 0
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as temp_file:
+            try:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    size += len(chunk)
+                    temp_file.write(chunk)
+            except BaseException:
+                os.unlink(temp_file.name)
+                raise
+        
+        extension = os.path.splitext(name)[1].lower()
+        hex_digest = digest.hexdigest()
+        blob_name = f'{PREFIX}{hex_digest[:2]}/{hex_digest}{extension}'
+        full_path = self.path(blob_name)
+        
+        while True:
+            with transaction.atomic():
+                StoredBlob.objects.get_or_create(name=blob_name, defaults={'size': size})
+                # Reuse or place the file under the row lock, so a pending
+                # _remove_unreferenced() cannot unlink it after the decision
+                blob = StoredBlob.objects.select_for_update().filter(name=blob_name).first()
+                if blob is None:
+                    # Removed by _remove_unreferenced() in the meantime
+                    continue
+                if os.path.exists(full_path):
+                    os.unlink(temp_file.name)
+                else:
+                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                    os.replace(temp_file.name, full_path)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(full_path, self.file_permissions_mode)
+                StoredBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+            return blob_name
+    
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content, an existing file is reused
+        return name
+    
+    def delete(self, name):
+        """Drop one reference; the file goes when nobody uses it anymore"""
+        if not name or not name.startswith(PREFIX):
+            # Files stored before content addressing are not reference counted
+            return
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(name=name).first()
+            if blob is None or blob.ref_count == 0:
+                return
+            StoredBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+        if blob.ref_count == 1:
+            # The row stays at zero references until the removal, giving an
+            # upload of the same content a row to wait on
+            transaction.on_commit(lambda: self._remove_unreferenced(name))
+    
+    def _remove_unreferenced(self, name):
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(name=name).first()
+            if blob is None or blob.ref_count > 0:
+                # Removed already, or the same content was uploaded again
+                return
+            blob.delete()
+            super().delete(name)
+
+
+@deconstructible
+class HashNamedStorage(FileSystemStorage):
+    """
+    FileSystemStorage for files named after the hash of their content.
+    A file is always stored at exactly its name: one already there holds the
+    same bytes and is replaced atomically, so concurrent writers of the same
+    content never produce renamed duplicates.
+    """
+    
+    def get_available_name(self, name, max_length=None):
+        return name
+    
+    def _save(self, name, content):
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as temp_file:
+            try:
+                for chunk in content.chunks():
+                    temp_file.write(chunk)
+            except BaseException:
+                os.unlink(temp_file.name)
+                raise
+        os.replace(temp_file.name, full_path)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return name
+
+
+def content_addressed_storage():
+    """Storage callable for model file fields"""
+    return _storage
+
+
+_storage = ContentAddressedStorage()
@@ -0,0 +1,295 @@
+"""
+Deterministic synthetic clinic data.
+
+generate() fills the database with staff, patients, treatments and their
+laboratory records using bulk_create, from a seeded random generator: the
+same arguments always produce the same rows. Patients are processed
+chunk_size at a time, each chunk in its own transaction, so memory stays
+flat and millions of laboratory rows can be written in a few minutes.
+Chunks are spread over the last `months` months (created_at/updated_at are
+back-dated per chunk), so date filters and monthly rollups see a history.
+
+bulk_create sends no signals, so the derived data that signals normally
+maintain is rebuilt at the end (dashboard counters, search index, outcome
+rollups); the change log is not written, the generated rows are a starting
+point rather than changes.
+"""
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+FIRST_NAMES = ['María', 'Lucía', 'Sofía', 'Valentina', 'Camila', 'Martina', 'Julieta', 'Paula',
+               'Florencia', 'Carolina', 'Agustina', 'Victoria', 'Ana', 'Laura', 'Natalia', 'Inés']
+LAST_NAMES = ['González', 'Rodríguez', 'Gómez', 'Fernández', 'López', 'Díaz', 'Martínez', 'Pérez',
+              'García', 'Sánchez', 'Romero', 'Sosa', 'Álvarez', 'Torres', 'Ruiz', 'Ramírez']
+BACKGROUNDS = ['Hipotiroidismo controlado', 'Endometriosis grado II', 'Síndrome de ovario poliquístico',
+               'Sin antecedentes relevantes', 'Miomatosis uterina', 'Reserva ovárica disminuida']
+
+STAFF_PASSWORD = 'synthetic123'
+BATCH_SIZE = 2000
+
+# State of a retrieved oocyte before fertilization, with its weight
+RETRIEVAL_STATES = [('VERY_IMMATURE', 10), ('IMMATURE', 15), ('MATURE', 65), ('DISCARDED', 10)]
+# Outcome of embryos that are not transferred
+KEPT_EMBRYO_STATES = [('CRYOPRESERVED', 60), ('DEVELOPING', 15), ('DISCARDED', 25)]
+# Probability of each outcome given the previous one was positive
+SAC_GIVEN_BETA = 0.8
+CLINICAL_GIVEN_SAC = 0.9
+LIVE_BIRTH_GIVEN_CLINICAL = 0.8
+
+
+class Dataset:
+    """Staff of the generated clinic and row counts per model"""
+
+    def __init__(self):
+        self.admin = None
+        self.director = None
+        self.doctors = []
+        self.lab_operators = []
+        self.rack = None
+        self.counts = {}
+
+
+def _bulk(model, objects):
+    return model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+
+
+def _weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def _backdate(model, rows, moment):
+    """Move created_at/updated_at of freshly inserted rows (a pk range) to moment"""
+    if not rows:
+        return
+    fields = {field: moment for field in ('created_at', 'updated_at')
+              if any(f.name == field for f in model._meta.concrete_fields)}
+    model.objects.filter(pk__gte=rows[0].pk, pk__lte=rows[-1].pk).update(**fields)
+
+
+def _staff(role, username, first_name, last_name, dni, password):
+    User = get_user_model()
+    return User(
+        username=username, first_name=first_name, last_name=last_name, role=role, dni=dni,
+        email=f'{username}@synthetic.test', password=password,
+        is_staff=role == 'ADMIN', is_superuser=role == 'ADMIN',
+    )
+
+
+def generate(seed=1, patients=1000, treatments_per_patient=1, puncture_rate=2 / 3, oocytes_per_puncture=10,
+             fertilization_rate=0.5, transfer_rate=0.4, pregnancy_rate=0.45, doctors=5, lab_operators=3,
+             months=24, chunk_size=1000, prefix='syn', progress=None):
+    """
+    Create a clinic of the given size and return its Dataset.
+    - every patient gets treatments_per_patient treatments (the last one
+      active), each with monitoring days, a study result and a medical order
+    - puncture_rate of the treatments get a puncture with about
+      oocytes_per_puncture oocytes (±50%)
+    - fertilization_rate of the mature oocytes become embryos, and
+      transfer_rate of the embryos are transferred
+    - pregnancy_rate of the transfers give a positive beta; later outcomes
+      follow fixed conditional rates
+    prefix keeps usernames, DNIs and sample ids apart, so several datasets
+    can live in the same database. progress(done, total) is called after
+    every chunk of patients.
+    """
+    from laboratory.models import CryoCanister, CryoRack, CryoTank
+
+    User = get_user_model()
+    rng = random.Random(seed)
+    dataset = Dataset()
+    # Hashing once keeps the generator fast; every user shares the password
+    password = make_password(STAFF_PASSWORD)
+    dni = 40_000_000 + seed * 1_000_000
+
+    with transaction.atomic():
+        staff = [_staff('ADMIN', f'{prefix}_admin', 'Admin', 'Sintético', str(dni), password),
+                 _staff('MEDICAL_DIRECTOR', f'{prefix}_director', 'Directora', 'Sintética', str(dni + 1), password)]
+        staff += [_staff('DOCTOR', f'{prefix}_doctor{index}', rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+                         str(dni + 10 + index), password) for index in range(doctors)]
+        staff += [_staff('LAB_OPERATOR', f'{prefix}_lab{index}', rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+                         str(dni + 500 + index), password) for index in range(lab_operators)]
+        staff = _bulk(User, staff)
+        dataset.admin, dataset.director = staff[0], staff[1]
+        dataset.doctors = staff[2:2 + doctors]
+        dataset.lab_operators = staff[2 + doctors:]
+
+        tank = CryoTank.objects.create(code=f'{prefix.upper()}-T1', description='Tanque sintético')
+        dataset.rack = CryoRack.objects.create(tank=tank, code='R1')
+        _bulk(CryoCanister, [CryoCanister(rack=dataset.rack, code=f'C{index}') for index in range(1, 6)])
+
+    options = {
+        'treatments_per_patient': treatments_per_patient,
+        'puncture_rate': puncture_rate,
+        'oocytes_per_puncture': oocytes_per_puncture,
+        'fertilization_rate': fertilization_rate,
+        'transfer_rate': transfer_rate,
+        'pregnancy_rate': pregnancy_rate,
+        'treating': [dataset.director] + dataset.doctors,
+        'operators': [dataset.director] + dataset.lab_operators,
+        'password': password,
+        'prefix': prefix,
+        'dni': dni + 1000,
+    }
+    # The newest chunk starts three weeks ago, so its punctures and transfers are done
+    end = timezone.now() - timedelta(days=21)
+    span = timedelta(days=30 * months)
+    chunks = max(1, -(-patients // chunk_size))
+    for chunk in range(chunks):
+        first = chunk * chunk_size
+        last = min(first + chunk_size, patients)
+        # Oldest chunk first, so ids grow with time as in production
+        moment = end - span + span * (chunk + 1) / chunks
+        with transaction.atomic():
+            counts = _generate_chunk(rng, range(first, last), moment, options)
+        for label, count in counts.items():
+            dataset.counts[label] = dataset.counts.get(label, 0) + count
+        if progress:
+            progress(last, patients)
+
+    rebuild_derived_data()
+    return dataset
+
+
+def _generate_chunk(rng, indexes, moment, options):
+    from patients.models import MedicalHistory, Patient, PatientSearchWord
+    from treatments.models import MedicalOrder, MonitoringDay, StudyResult, Treatment
+    from laboratory.models import Embryo, EmbryoTransfer, Oocyte, Puncture
+
+    User = get_user_model()
+    prefix = options['prefix']
+
+    users = _bulk(User, [
+        User(
+            username=f'{prefix}_patient{index}', first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES), role='PATIENT', dni=str(options['dni'] + index),
+            email=f'{prefix}_patient{index}@synthetic.test', password=options['password'],
+            biological_sex='F', date_of_birth=date(1975, 1, 1) + timedelta(days=rng.randrange(20 * 365)),
+            date_joined=moment,
+        )
+        for index in indexes
+    ])
+    patients = _bulk(Patient, [
+        Patient(user=user, search_key=Patient.build_search_key(user)) for user in users
+    ])
+    PatientSearchWord.store({patient.pk: patient.search_key for patient in patients})
+    _bulk(MedicalHistory, [
+        MedicalHistory(patient=patient, clinical_background=rng.choice(BACKGROUNDS),
+                       gynecological_background=rng.choice(BACKGROUNDS))
+        for patient in patients
+    ])
+
+    treatments = []
+    for patient in patients:
+        for number in range(options['treatments_per_patient'], 0, -1):
+            treatments.append(Treatment(
+                patient=patient, doctor=rng.choice(options['treating']),
+                objective=rng.choice(['PREGNANCY', 'PREGNANCY', 'OOCYTE_PRESERVATION', 'EMBRYO_PRESERVATION']),
+                status='ACTIVE' if number == 1 else rng.choice(['COMPLETED', 'CANCELLED']),
+                stimulation_protocol='Protocolo antagonista', medication_type='FSH recombinante',
+                medication_dose='150 UI', medication_duration='10 días',
+            ))
+    treatments = _bulk(Treatment, treatments)
+
+    moment_date = moment.date()
+    _bulk(MonitoringDay, [
+        MonitoringDay(treatment=treatment, date=moment_date + timedelta(days=offset))
+        for treatment in treatments
+        for offset in (2, 4, 6)
+    ])
+    _bulk(StudyResult, [
+        StudyResult(treatment=treatment, study_type='HORMONAL', study_name='Perfil hormonal',
+                    result_text=f'AMH {rng.uniform(0.5, 5):.1f} ng/ml, FSH {rng.uniform(3, 12):.1f} UI/l')
+        for treatment in treatments
+    ])
+    _bulk(MedicalOrder, [
+        MedicalOrder(treatment=treatment, order_type='STUDY', description='Ecografía transvaginal')
+        for treatment in treatments
+    ])
+
+    punctured = [treatment for treatment in treatments if rng.random() < options['puncture_rate']]
+    punctures = _bulk(Puncture, [
+        Puncture(treatment=treatment, operator=rng.choice(options['operators']),
+                 date=moment + timedelta(days=12, hours=rng.randrange(8, 14)),
+                 operating_room=str(rng.randint(1, 3)))
+        for treatment in punctured
+    ])
+
+    mean = options['oocytes_per_puncture']
+    oocytes = []
+    for treatment, puncture in zip(punctured, punctures):
+        for number in range(1, rng.randint(max(1, mean // 2), max(1, mean * 3 // 2)) + 1):
+            initial = _weighted(rng, RETRIEVAL_STATES)
+            state = initial
+            if initial == 'MATURE':
+                if treatment.objective == 'OOCYTE_PRESERVATION':
+                    state = 'CRYOPRESERVED'
+                elif rng.random() < options['fertilization_rate']:
+                    state = 'FERTILIZED'
+            oocytes.append(Oocyte(
+                puncture=puncture, patient_id=treatment.patient_id,
+                oocyte_id=f'{prefix.upper()}-OV-{puncture.id}-{number:02d}',
+                initial_state=initial, current_state=state,
+            ))
+    oocytes = _bulk(Oocyte, oocytes)
+
+    embryos = []
+    for oocyte in oocytes:
+        if oocyte.current_state != 'FERTILIZED':
+            continue
+        if rng.random() < options['transfer_rate']:
+            state = 'TRANSFERRED'
+        else:
+            state = _weighted(rng, KEPT_EMBRYO_STATES)
+        pgt_performed = rng.random() < 0.3
+        embryos.append(Embryo(
+            oocyte=oocyte, patient_id=oocyte.patient_id, embryo_id=oocyte.oocyte_id.replace('-OV-', '-EM-'),
+            fertilization_technique=rng.choice(['IVF', 'ICSI']), sperm_source=rng.choice(['PARTNER', 'DONOR']),
+            quality=rng.randint(1, 5), current_state=state, pgt_performed=pgt_performed,
+            pgt_result=rng.random() < 0.7 if pgt_performed else None,
+        ))
+    embryos = _bulk(Embryo, embryos)
+
+    transfers = []
+    for embryo in embryos:
+        if embryo.current_state != 'TRANSFERRED':
+            continue
+        performed = moment_date + timedelta(days=rng.randint(17, 20))
+        beta = rng.random() < options['pregnancy_rate']
+        sac = beta and rng.random() < SAC_GIVEN_BETA
+        clinical = sac and rng.random() < CLINICAL_GIVEN_SAC
+        transfers.append(EmbryoTransfer(
+            embryo=embryo, scheduled_date=performed, performed_date=performed, beta_positive=beta,
+            gestational_sac=sac, clinical_pregnancy=clinical,
+            live_birth=clinical and rng.random() < LIVE_BIRTH_GIVEN_CLINICAL,
+        ))
+    transfers = _bulk(EmbryoTransfer, transfers)
+
+    for model, rows in [(Patient, patients), (Treatment, treatments), (Puncture, punctures),
+                        (Oocyte, oocytes), (Embryo, embryos), (EmbryoTransfer, transfers)]:
+        _backdate(model, rows, moment)
+
+    return {
+        'patients': len(patients),
+        'treatments': len(treatments),
+        'punctures': len(punctures),
+        'oocytes': len(oocytes),
+        'embryos': len(embryos),
+        'transfers': len(transfers),
+    }
+
+
+def rebuild_derived_data():
+    """Recompute what signals maintain for regular saves"""
+    from laboratory.analytics import refresh_outcome_rollups
+    from . import counters, generations, search
+
+    counters.recompute()
+    generations.bump(*generations.TRACKED_MODELS)
+    search.rebuild_index()
+    refresh_outcome_rollups(full=True)
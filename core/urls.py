@@ -10,4 +10,6 @@ urlpatterns = [
     path('notifications/', views.notifications_placeholder, name='notifications_placeholder'),
     path('patient-treatments/', views.patient_treatments, name='patient_treatments'),
     path('patient-orders/', views.patient_orders, name='patient_orders'),
+    path('search/', views.clinical_search, name='clinical_search'),
+    path('metrics/', views.metrics, name='metrics'),
 ]
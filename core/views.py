@@ -1,5 +1,31 @@
+import os
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models import Count, Q
+from django.http import Http404, HttpResponse, HttpResponseForbidden
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.utils._os import safe_join
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_safe
+from . import generations, querycache
+from .counters import get_counters
+from .search import search
+from .media import file_response
+from .metrics import registry as metrics_registry
+
+DASHBOARD_SIZE = 10
+PATIENT_DASHBOARD_SIZE = 5
+
+# Models whose rows each dashboard shows; their generations key its fragments
+DASHBOARD_MODELS = {
+    'patient': ['treatments.Treatment', 'treatments.MedicalOrder', 'users.User'],
+    'doctor': ['patients.Patient', 'treatments.Treatment', 'users.User'],
+    'lab_operator': [
+        'laboratory.Puncture', 'laboratory.Oocyte', 'laboratory.Embryo', 'treatments.Treatment', 'users.User',
+    ],
+}
 
 
 def home(request):
@@ -11,7 +37,13 @@ def home(request):
 
 @login_required
 def dashboard(request):
-    """Main dashboard - different views based on user role"""
+    """
+    Main dashboard - different views based on user role.
+    Lists are bounded and their querysets stay lazy: the templates render
+    them inside {% cache %} fragments keyed by user, role and the
+    generations of the models shown (see core.generations), so a cached
+    dashboard costs a single query for the generations.
+    """
     context = {
         'user': request.user,
     }
@@ -21,13 +53,17 @@ def dashboard(request):
         patient = request.user.patient_profile
         from treatments.models import Treatment, MedicalOrder
         
-        treatments = Treatment.objects.filter(patient=patient).order_by('-created_at')[:5]
-        recent_orders = MedicalOrder.objects.filter(treatment__patient=patient).order_by('-created_at')[:5]
+        treatments = Treatment.objects.filter(patient=patient)
+        orders = MedicalOrder.objects.filter(treatment__patient=patient)
         
         context.update({
             'patient': patient,
-            'treatments': treatments,
-            'recent_orders': recent_orders,
+            'treatments': treatments.select_related('doctor').order_by('-created_at')[:PATIENT_DASHBOARD_SIZE],
+            'recent_orders': orders.order_by('-created_at')[:PATIENT_DASHBOARD_SIZE],
+            # Callables are only evaluated when the fragment is rendered
+            'active_treatment_count': treatments.filter(status='ACTIVE').count,
+            'order_count': orders.count,
+            'generation': generations.token(*DASHBOARD_MODELS['patient']),
         })
         return render(request, 'core/dashboard_patient.html', context)
     
@@ -37,50 +73,51 @@ def dashboard(request):
         from treatments.models import Treatment
         
         if request.user.is_medical_director():
-            print('Entró director médico')
-            patients = Patient.objects.all()[:10]
-            treatments = Treatment.objects.all().order_by('-created_at')[:10]
+            patients = Patient.objects.all()
+            treatments = Treatment.objects.all()
+            counts = get_counters('total_patients', 'active_treatments')
+            patient_count = counts['total_patients']
+            active_treatment_count = counts['active_treatments']
         else:
-            treatments = Treatment.objects.filter(doctor=request.user).order_by('-created_at')
-            patient_ids = treatments.values_list('patient_id', flat=True).distinct()
-            patients = Patient.objects.filter(id__in=patient_ids)[:10]
+            from treatments.queries import doctor_patient_ids, doctor_patients_subquery
+            
+            treatments = Treatment.objects.filter(doctor=request.user)
+            patients = Patient.objects.filter(id__in=doctor_patients_subquery(request.user.id))
+            patient_count = len(doctor_patient_ids(request.user.id))
+            # Callables are only evaluated when the fragment is rendered
+            active_treatment_count = treatments.filter(status='ACTIVE').count
         
         context.update({
-            'patients': patients,
-            'treatments': treatments,
+            'patients': patients.select_related('user').order_by('-created_at')[:DASHBOARD_SIZE],
+            'treatments': treatments.select_related('patient__user').order_by('-created_at')[:DASHBOARD_SIZE],
+            'patient_count': patient_count,
+            'active_treatment_count': active_treatment_count,
+            'generation': generations.token(*DASHBOARD_MODELS['doctor']),
         })
         return render(request, 'core/dashboard_doctor.html', context)
     
     elif request.user.is_lab_operator():
         # Lab operator dashboard
-        from laboratory.models import Puncture, Oocyte, Embryo
+        from laboratory.models import Puncture
         
-        recent_punctures = Puncture.objects.all().order_by('-created_at')[:10]
-        pending_oocytes = Oocyte.objects.filter(current_state__in=['VERY_IMMATURE', 'IMMATURE', 'MATURE']).count()
-        developing_embryos = Embryo.objects.filter(current_state='DEVELOPING').count()
+        recent_punctures = (
+            Puncture.objects.select_related('treatment__patient__user')
+            .annotate(oocyte_count=Count('oocytes'))
+            .order_by('-created_at')[:DASHBOARD_SIZE]
+        )
         
         context.update({
             'recent_punctures': recent_punctures,
-            'pending_oocytes': pending_oocytes,
-            'developing_embryos': developing_embryos,
+            # Callables are only evaluated when the fragment is rendered
+            'puncture_count': Puncture.objects.count,
+            'generation': generations.token(*DASHBOARD_MODELS['lab_operator']),
+            **get_counters('pending_oocytes', 'developing_embryos'),
         })
         return render(request, 'core/dashboard_lab.html', context)
     
     elif request.user.is_admin():
         # Admin dashboard
-        from users.models import User
-        from patients.models import Patient
-        from treatments.models import Treatment
-        
-        total_users = User.objects.count()
-        total_patients = Patient.objects.count()
-        active_treatments = Treatment.objects.filter(status='ACTIVE').count()
-        
-        context.update({
-            'total_users': total_users,
-            'total_patients': total_patients,
-            'active_treatments': active_treatments,
-        })
+        context.update(get_counters('total_users', 'total_patients', 'active_treatments'))
         return render(request, 'core/dashboard_admin.html', context)
     
     return render(request, 'core/dashboard.html', context)
@@ -124,3 +161,80 @@ def patient_orders(request):
     if not request.user.is_patient():
         return redirect('dashboard')
     return redirect('my_orders')
+
+
+@login_required
+@require_safe
+def serve_media(request, path):
+    """Serve an uploaded file to staff or to the patient it belongs to"""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    
+    if request.user.is_patient():
+        from treatments.models import Treatment
+        
+        # Content-addressed files can be shared, any reference of the patient grants access
+        owns_file = Treatment.objects.filter(
+            Q(consent_document=path) | Q(study_results__result_file=path) | Q(medical_orders__pdf_file=path),
+            patient__user=request.user,
+        ).exists()
+        if not owns_file:
+            raise Http404
+    elif not (request.user.is_doctor() or request.user.is_lab_operator() or request.user.is_admin()):
+        raise Http404
+    
+    return file_response(request, path, full_path)
+
+
+@login_required
+def clinical_search(request):
+    """Doctors search medical histories and study results by text"""
+    if not request.user.is_doctor():
+        messages.error(request, 'No tiene permisos para ver esta página.')
+        return redirect('dashboard')
+    
+    query = request.GET.get('q', '').strip()
+    # Same scope as patient_list: only the medical director sees every patient
+    patient_ids = None
+    if not request.user.is_medical_director():
+        from treatments.queries import doctor_patients_subquery
+        patient_ids = doctor_patients_subquery(request.user.id)
+    results = search(query, patient_ids=patient_ids) if query else []
+    
+    if results:
+        from patients.models import Patient
+        from treatments.models import StudyResult
+        
+        patients = Patient.objects.select_related('user').in_bulk({result['patient_id'] for result in results})
+        study_treatments = dict(StudyResult.objects.filter(
+            id__in=[result['object_id'] for result in results if result['kind'] == 'STUDY_RESULT']
+        ).values_list('id', 'treatment_id'))
+        for result in results:
+            result['patient'] = patients.get(result['patient_id'])
+            result['treatment_id'] = study_treatments.get(result['object_id'])
+    
+    return render(request, 'core/clinical_search.html', {
+        'query': query,
+        'results': results,
+    })
+
+
+@require_safe
+def metrics(request):
+    """Per-view metrics in the Prometheus text format, for administrators or a scraper token"""
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    token_ok = bool(settings.METRICS_TOKEN) and constant_time_compare(
+        authorization, f'Bearer {settings.METRICS_TOKEN}'
+    )
+    user = request.user
+    staff_ok = user.is_authenticated and (user.is_staff or user.is_admin() or user.is_medical_director())
+    if not (token_ok or staff_ok):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics_registry.render() + querycache.render_metrics(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
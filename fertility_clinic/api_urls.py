@@ -0,0 +1,20 @@
+"""
+Version 1 of the REST API, mounted at /api/v1/
+"""
+from django.urls import path
+from rest_framework.routers import DefaultRouter
+from core.api import ChangeFeedView
+from laboratory.api import OocyteViewSet, EmbryoViewSet, EmbryoTransferViewSet
+from patients.api import PatientViewSet
+from treatments.api import TreatmentViewSet
+
+router = DefaultRouter()
+router.register('patients', PatientViewSet, basename='patient')
+router.register('treatments', TreatmentViewSet, basename='treatment')
+router.register('oocytes', OocyteViewSet, basename='oocyte')
+router.register('embryos', EmbryoViewSet, basename='embryo')
+router.register('transfers', EmbryoTransferViewSet, basename='transfer')
+
+urlpatterns = router.urls + [
+    path('changes/', ChangeFeedView.as_view(), name='changes'),
+]
@@ -13,7 +13,11 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = config('SECRET_KEY', default='django-insecure-dev-key-change-in-production')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = config('DEBUG', default=True, cast=bool)
+
+# The debug toolbar instruments every request (SQL capture, template
+# context snapshots); keep it off when measuring performance.
+DEBUG_TOOLBAR = config('DEBUG_TOOLBAR', default=DEBUG, cast=bool)
 
 ALLOWED_HOSTS = ['*']
 
@@ -34,7 +38,6 @@ INSTALLED_APPS = [
     'crispy_forms',
     'crispy_bootstrap4',
     'django_filters',
-    'debug_toolbar',
     
     # Local apps
     'core',
@@ -45,6 +48,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -53,14 +57,18 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'fertility_clinic.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports render time to core.metrics
+        'BACKEND': 'core.metrics.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -82,6 +90,13 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Take the write lock when a transaction starts: a read-then-write
+        # transaction otherwise fails with "database is locked" under
+        # concurrent writers instead of waiting for the timeout
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -118,6 +133,33 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 # Media files
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Media is served by core.views.serve_media after a permission check.
+# Set to 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache) to let the
+# front-end server transfer the bytes; nginx needs an internal location at
+# MEDIA_ACCEL_PREFIX aliased to MEDIA_ROOT.
+MEDIA_OFFLOAD = config('MEDIA_OFFLOAD', default='')
+MEDIA_ACCEL_PREFIX = config('MEDIA_ACCEL_PREFIX', default='/protected-media/')
+
+# External obras sociales catalog, copied locally by refresh_coverage_catalog
+MEDICAL_COVERAGE_CATALOG_URL = config(
+    'MEDICAL_COVERAGE_CATALOG_URL',
+    default='https://ueozxvwsckonkqypfasa.supabase.co/functions/v1/getObrasSociales',
+)
+
+# Per-view metrics (core.metrics), served at /metrics/ to administrators.
+# A scraper without a session sends "Authorization: Bearer <METRICS_TOKEN>".
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Generational query cache (core.querycache): 'local' keeps results in each
+# process (LRU, at most QUERY_CACHE_MAX_ENTRIES), 'shared' in the default
+# cache, which must then be one all processes reach (Redis, Memcached)
+QUERY_CACHE_BACKEND = config('QUERY_CACHE_BACKEND', default='local')
+QUERY_CACHE_MAX_ENTRIES = config('QUERY_CACHE_MAX_ENTRIES', default=2000, cast=int)
+
+# Change feed (core.changelog): seconds new entries wait before being served,
+# so writers still committing lower ids catch up. A heuristic, raise it if
+# write transactions run longer; not applied on SQLite
+CHANGELOG_SETTLE_SECONDS = config('CHANGELOG_SETTLE_SECONDS', default=2, cast=float)
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -145,6 +187,8 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
+    'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.NamespaceVersioning',
+    'ALLOWED_VERSIONS': ['v1'],
 }
 
 # CORS
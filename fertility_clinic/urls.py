@@ -4,7 +4,7 @@ URL configuration for fertility_clinic project.
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from core.views import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -13,11 +13,12 @@ urlpatterns = [
     path('patients/', include('patients.urls')),
     path('treatments/', include('treatments.urls')),
     path('laboratory/', include('laboratory.urls')),
+    path('api/v1/', include(('fertility_clinic.api_urls', 'api'), namespace='v1')),
+    path(f"{settings.MEDIA_URL.strip('/')}/<path:path>", serve_media, name='media'),
 ]
 
-if settings.DEBUG:
+if settings.DEBUG_TOOLBAR:
     import debug_toolbar
     urlpatterns = [
         path('__debug__/', include(debug_toolbar.urls)),
     ] + urlpatterns
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Puncture, Oocyte, OocyteStateHistory, Embryo, EmbryoTransfer
+from .models import (
+    Puncture, Oocyte, OocyteStateHistory, Embryo, EmbryoTransfer,
+    CryoTank, CryoRack, CryoCanister, CryoStraw
+)
 
 
 @admin.register(Puncture)
@@ -33,3 +36,28 @@ class EmbryoAdmin(admin.ModelAdmin):
 class EmbryoTransferAdmin(admin.ModelAdmin):
     list_display = ['embryo', 'scheduled_date', 'performed_date', 'beta_positive', 'clinical_pregnancy', 'live_birth']
     list_filter = ['beta_positive', 'clinical_pregnancy', 'live_birth']
+
+
+@admin.register(CryoTank)
+class CryoTankAdmin(admin.ModelAdmin):
+    list_display = ['code', 'description']
+    search_fields = ['code']
+
+
+@admin.register(CryoRack)
+class CryoRackAdmin(admin.ModelAdmin):
+    list_display = ['code', 'tank']
+    list_filter = ['tank']
+
+
+@admin.register(CryoCanister)
+class CryoCanisterAdmin(admin.ModelAdmin):
+    list_display = ['code', 'rack', 'capacity']
+    list_filter = ['rack__tank']
+
+
+@admin.register(CryoStraw)
+class CryoStrawAdmin(admin.ModelAdmin):
+    list_display = ['canister', 'position', 'oocyte', 'embryo', 'stored_at']
+    list_select_related = ['canister__rack__tank', 'oocyte', 'embryo']
+    search_fields = ['oocyte__oocyte_id', 'embryo__embryo_id']
@@ -0,0 +1,143 @@
+"""
+Embryo outcome rollups.
+
+Outcomes are grouped by cohort month (the month the embryo was created),
+so an embryo always stays in the same month. An incremental refresh finds
+the months touched since the last watermark (through Embryo, EmbryoTransfer
+or Treatment updated_at) and rebuilds only those months.
+"""
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Case, When, Value, CharField, Count, Q, Sum, DateField
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from core.changelog import settle_delay
+from core.filters import start_of_day
+from .models import Embryo, EmbryoOutcomeRollup, RollupWatermark
+
+WATERMARK_NAME = 'embryo_outcomes'
+
+OUTCOME_FIELDS = ['beta_positive', 'gestational_sac', 'clinical_pregnancy', 'live_birth']
+METRIC_FIELDS = ['embryos', 'transfers'] + OUTCOME_FIELDS
+
+PGT_STATUS = Case(
+    When(pgt_performed=False, then=Value('NOT_PERFORMED')),
+    When(pgt_result__isnull=True, then=Value('PENDING')),
+    When(pgt_result=True, then=Value('OK')),
+    default=Value('NOT_OK'),
+    output_field=CharField(),
+)
+
+
+def _month_range(month):
+    next_month = (month.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return start_of_day(month), start_of_day(next_month)
+
+
+def _months_query(months):
+    query = Q()
+    for month in months:
+        start, end = _month_range(month)
+        query |= Q(created_at__gte=start, created_at__lt=end)
+    return query
+
+
+def _aggregate(embryos):
+    outcome_counts = {
+        field: Count('transfer', filter=Q(**{f'transfer__{field}': True}))
+        for field in OUTCOME_FIELDS
+    }
+    return embryos.annotate(
+        month=TruncMonth('created_at', output_field=DateField()),
+        pgt_status=PGT_STATUS,
+    ).values(
+        'month', 'oocyte__puncture__treatment__doctor', 'fertilization_technique',
+        'sperm_source', 'quality', 'pgt_status',
+    ).annotate(
+        embryos=Count('id'),
+        transfers=Count('transfer', filter=Q(transfer__performed_date__isnull=False)),
+        **outcome_counts
+    ).order_by()
+
+
+def changed_months(since):
+    """Cohort months with embryos, transfers or treatments updated after since"""
+    changed = Embryo.objects.filter(
+        Q(updated_at__gt=since) |
+        Q(transfer__updated_at__gt=since) |
+        Q(oocyte__puncture__treatment__updated_at__gt=since)
+    )
+    return sorted(set(
+        changed.annotate(month=TruncMonth('created_at', output_field=DateField()))
+        .values_list('month', flat=True)
+    ))
+
+
+def refresh_outcome_rollups(full=False):
+    """
+    Rebuild the rollup rows of every month changed since the last refresh
+    (or all months when full is True). Returns the rebuilt months, or None
+    for a full rebuild.
+    """
+    started_at = timezone.now()
+    watermark = RollupWatermark.objects.filter(name=WATERMARK_NAME).first()
+    if watermark is None:
+        full = True
+
+    with transaction.atomic():
+        if full:
+            months = None
+            EmbryoOutcomeRollup.objects.all().delete()
+            embryos = Embryo.objects.all()
+        else:
+            months = changed_months(watermark.watermark)
+            if months:
+                EmbryoOutcomeRollup.objects.filter(month__in=months).delete()
+            embryos = Embryo.objects.filter(_months_query(months)) if months else Embryo.objects.none()
+
+        EmbryoOutcomeRollup.objects.bulk_create([
+            EmbryoOutcomeRollup(
+                month=row['month'],
+                doctor_id=row['oocyte__puncture__treatment__doctor'],
+                fertilization_technique=row['fertilization_technique'],
+                sperm_source=row['sperm_source'],
+                quality=row['quality'],
+                pgt_status=row['pgt_status'],
+                **{field: row[field] for field in METRIC_FIELDS}
+            )
+            for row in _aggregate(embryos).iterator()
+        ], batch_size=500)
+
+        # Changes committed while this refresh ran are picked up next time.
+        # A writer may stamp updated_at before started_at and commit after
+        # the reads above, so the next run looks back over the same settle
+        # window as the change feed (CHANGELOG_SETTLE_SECONDS)
+        RollupWatermark.objects.update_or_create(
+            name=WATERMARK_NAME,
+            defaults={'watermark': started_at - settle_delay()},
+        )
+    return months
+
+
+def outcome_report(group_by, date_from=None, date_to=None):
+    """Outcome totals and rates grouped by one rollup dimension"""
+    rollups = EmbryoOutcomeRollup.objects.all()
+    if date_from:
+        rollups = rollups.filter(month__gte=date_from.replace(day=1))
+    if date_to:
+        rollups = rollups.filter(month__lte=date_to)
+
+    group_fields = [group_by]
+    if group_by == 'doctor':
+        group_fields = ['doctor', 'doctor__first_name', 'doctor__last_name']
+
+    rows = list(
+        rollups.values(*group_fields)
+        .annotate(**{field: Sum(field) for field in METRIC_FIELDS})
+        .order_by(group_by)
+    )
+    for row in rows:
+        transfers = row['transfers']
+        for field in OUTCOME_FIELDS:
+            row[f'{field}_rate'] = row[field] * 100 / transfers if transfers else None
+    return rows
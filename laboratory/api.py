@@ -0,0 +1,43 @@
+from core.api import IsLabOperator, ReadOnlyAPIViewSet
+from core.filters import UpdatedSinceFilterSet
+from .models import Oocyte, Embryo, EmbryoTransfer
+from .serializers import OocyteSerializer, EmbryoSerializer, EmbryoTransferSerializer
+
+
+class OocyteFilter(UpdatedSinceFilterSet):
+    class Meta:
+        model = Oocyte
+        fields = ['patient', 'puncture', 'current_state']
+
+
+class EmbryoFilter(UpdatedSinceFilterSet):
+    class Meta:
+        model = Embryo
+        fields = ['patient', 'oocyte', 'current_state']
+
+
+class EmbryoTransferFilter(UpdatedSinceFilterSet):
+    class Meta:
+        model = EmbryoTransfer
+        fields = ['embryo', 'embryo__patient']
+
+
+class OocyteViewSet(ReadOnlyAPIViewSet):
+    permission_classes = [IsLabOperator]
+    queryset = Oocyte.objects.select_related('puncture')
+    serializer_class = OocyteSerializer
+    filterset_class = OocyteFilter
+
+
+class EmbryoViewSet(ReadOnlyAPIViewSet):
+    permission_classes = [IsLabOperator]
+    queryset = Embryo.objects.all()
+    serializer_class = EmbryoSerializer
+    filterset_class = EmbryoFilter
+
+
+class EmbryoTransferViewSet(ReadOnlyAPIViewSet):
+    permission_classes = [IsLabOperator]
+    queryset = EmbryoTransfer.objects.select_related('embryo')
+    serializer_class = EmbryoTransferSerializer
+    filterset_class = EmbryoTransferFilter
@@ -0,0 +1,31 @@
+import django_filters
+from core.filters import CreatedDateRangeFilterSet
+from .models import Puncture, Oocyte, Embryo
+
+
+class PunctureFilter(CreatedDateRangeFilterSet):
+    """Filters for the puncture list"""
+
+    class Meta:
+        model = Puncture
+        fields = []
+
+
+class OocyteFilter(CreatedDateRangeFilterSet):
+    """Filters for the oocyte list"""
+
+    current_state = django_filters.ChoiceFilter(choices=Oocyte.STATE_CHOICES, label='Estado')
+
+    class Meta:
+        model = Oocyte
+        fields = ['current_state']
+
+
+class EmbryoFilter(CreatedDateRangeFilterSet):
+    """Filters for the embryo list"""
+
+    current_state = django_filters.ChoiceFilter(choices=Embryo.STATE_CHOICES, label='Estado')
+
+    class Meta:
+        model = Embryo
+        fields = ['current_state']
@@ -1,5 +1,7 @@
 from django import forms
-from .models import Puncture, Oocyte, Embryo, EmbryoTransfer
+from django.db import IntegrityError, transaction
+from .models import Puncture, Oocyte, Embryo, EmbryoTransfer, CryoCanister, CryoStraw
+from .services import store_sample
 
 
 class PunctureForm(forms.ModelForm):
@@ -22,15 +24,116 @@ class OocyteForm(forms.ModelForm):
         fields = ['oocyte_id', 'initial_state']
 
 
-class OocyteUpdateForm(forms.ModelForm):
+class CryoLocationFormMixin(forms.Form):
+    """
+    Cryostorage location fields for oocyte and embryo update forms.
+    The straw is created, moved or released when the form is saved.
+    """
+    
+    storage_canister = forms.ModelChoiceField(
+        queryset=CryoCanister.objects.select_related('rack__tank'),
+        required=False,
+        label='Canister',
+    )
+    straw_position = forms.IntegerField(min_value=1, required=False, label='Posición de Pajuela')
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        straw = self._current_straw()
+        if straw:
+            self.fields['storage_canister'].initial = straw.canister_id
+            self.fields['straw_position'].initial = straw.position
+        elif self.instance.nitrogen_tube or self.instance.rack_number:
+            # Stored before structured locations, see place_legacy_samples
+            self.fields['storage_canister'].help_text = (
+                f'Ubicación anterior: tubo {self.instance.nitrogen_tube or "-"}, '
+                f'rack {self.instance.rack_number or "-"}'
+            )
+    
+    def _current_straw(self):
+        if not self.instance.pk:
+            return None
+        try:
+            return self.instance.cryo_straw
+        except CryoStraw.DoesNotExist:
+            return None
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('current_state') != 'CRYOPRESERVED':
+            return cleaned_data
+        
+        canister = cleaned_data.get('storage_canister')
+        position = cleaned_data.get('straw_position')
+        straw = self._current_straw()
+        if not canister and not position and straw:
+            return cleaned_data
+        if not canister or not position:
+            raise forms.ValidationError('Indique canister y posición para criopreservar.')
+        if position > canister.capacity:
+            raise forms.ValidationError(f'El canister tiene {canister.capacity} posiciones.')
+        
+        occupied = CryoStraw.objects.filter(canister=canister, position=position)
+        if straw:
+            occupied = occupied.exclude(pk=straw.pk)
+        if occupied.exists():
+            raise forms.ValidationError('La posición seleccionada ya está ocupada.')
+        return cleaned_data
+    
+    def save(self, commit=True):
+        """
+        Raises IntegrityError, with the error added to the form, when another
+        sample took the position after clean() checked it; nothing is saved
+        """
+        if not commit:
+            return super().save(commit)
+        with transaction.atomic():
+            instance = super().save(commit)
+            self._save_cryo_location(instance)
+        return instance
+    
+    def _save_cryo_location(self, instance):
+        straw = self._current_straw()
+        if instance.current_state != 'CRYOPRESERVED':
+            if straw:
+                straw.delete()
+            return
+        
+        canister = self.cleaned_data.get('storage_canister')
+        position = self.cleaned_data.get('straw_position')
+        if not canister or not position:
+            return
+        try:
+            with transaction.atomic():
+                if straw:
+                    straw.canister = canister
+                    straw.position = position
+                    straw.save()
+                else:
+                    store_sample(instance, canister, position)
+        except IntegrityError:
+            self.add_error('straw_position', 'Otra muestra ocupó esta posición mientras se guardaba. Elija otra.')
+            raise
+
+
+class OocyteUpdateForm(CryoLocationFormMixin, forms.ModelForm):
     """Form for updating oocyte state"""
     
     class Meta:
         model = Oocyte
-        fields = ['current_state', 'maturation_time', 'discard_reason', 'nitrogen_tube', 'rack_number']
+        fields = ['current_state', 'maturation_time', 'discard_reason']
         widgets = {
             'discard_reason': forms.Textarea(attrs={'rows': 2}),
         }
+    
+    def clean_current_state(self):
+        new_state = self.cleaned_data['current_state']
+        old_state = self.instance.current_state
+        if new_state != old_state and not Oocyte.can_transition(old_state, new_state):
+            raise forms.ValidationError(
+                f'No se puede pasar de {self.instance.get_current_state_display()} a este estado.'
+            )
+        return new_state
 
 
 class EmbryoForm(forms.ModelForm):
@@ -41,12 +144,12 @@ class EmbryoForm(forms.ModelForm):
         fields = ['embryo_id', 'fertilization_technique', 'sperm_source', 'quality']
 
 
-class EmbryoUpdateForm(forms.ModelForm):
+class EmbryoUpdateForm(CryoLocationFormMixin, forms.ModelForm):
     """Form for updating embryo"""
     
     class Meta:
         model = Embryo
-        fields = ['current_state', 'pgt_performed', 'pgt_result', 'nitrogen_tube', 'rack_number', 'discard_reason']
+        fields = ['current_state', 'pgt_performed', 'pgt_result', 'discard_reason']
         widgets = {
             'discard_reason': forms.Textarea(attrs={'rows': 2}),
         }
@@ -64,3 +167,117 @@ class EmbryoTransferForm(forms.ModelForm):
             'performed_date': forms.DateInput(attrs={'type': 'date'}),
             'notes': forms.Textarea(attrs={'rows': 3}),
         }
+
+
+class OocyteBatchForm(forms.Form):
+    """
+    Form for registering every oocyte of a puncture at once.
+    Either a count with an ID prefix, or an explicit list with one
+    "ID,ESTADO" per line.
+    """
+    
+    INITIAL_STATE_CHOICES = [
+        choice for choice in Oocyte.STATE_CHOICES
+        if choice[0] in ['VERY_IMMATURE', 'IMMATURE', 'MATURE']
+    ]
+    MAX_BATCH_SIZE = 100
+    
+    id_prefix = forms.CharField(max_length=80, required=False, label='Prefijo de ID')
+    count = forms.IntegerField(min_value=1, max_value=MAX_BATCH_SIZE, required=False, label='Cantidad')
+    initial_state = forms.ChoiceField(choices=INITIAL_STATE_CHOICES, required=False, label='Estado Inicial')
+    oocyte_list = forms.CharField(
+        required=False,
+        label='Listado de Óvulos',
+        help_text='Un óvulo por línea: ID,ESTADO (ej: P12-01,MATURE)',
+        widget=forms.Textarea(attrs={'rows': 6}),
+    )
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.errors:
+            return cleaned_data
+        
+        if cleaned_data.get('oocyte_list'):
+            entries = self._parse_list(cleaned_data['oocyte_list'])
+        elif cleaned_data.get('id_prefix') and cleaned_data.get('count'):
+            if not cleaned_data.get('initial_state'):
+                raise forms.ValidationError('Seleccione el estado inicial de los óvulos.')
+            width = max(2, len(str(cleaned_data['count'])))
+            entries = [
+                (f"{cleaned_data['id_prefix']}{str(i).zfill(width)}", cleaned_data['initial_state'])
+                for i in range(1, cleaned_data['count'] + 1)
+            ]
+        else:
+            raise forms.ValidationError('Ingrese un listado de óvulos o un prefijo y una cantidad.')
+        
+        ids = [oocyte_id for oocyte_id, state in entries]
+        duplicated = sorted({oocyte_id for oocyte_id in ids if ids.count(oocyte_id) > 1})
+        if duplicated:
+            raise forms.ValidationError(f"IDs repetidos en el lote: {', '.join(duplicated)}")
+        
+        # Single query for the unique check of the whole batch
+        existing = sorted(Oocyte.objects.filter(oocyte_id__in=ids).values_list('oocyte_id', flat=True))
+        if existing:
+            raise forms.ValidationError(f"Ya existen óvulos con estos IDs: {', '.join(existing)}")
+        
+        cleaned_data['entries'] = entries
+        return cleaned_data
+    
+    def _parse_list(self, text):
+        valid_states = dict(self.INITIAL_STATE_CHOICES)
+        max_length = Oocyte._meta.get_field('oocyte_id').max_length
+        entries = []
+        for line_number, line in enumerate(text.splitlines(), start=1):
+            line = line.strip()
+            if not line:
+                continue
+            oocyte_id, _, state = (part.strip() for part in line.partition(','))
+            state = state.upper() or self.cleaned_data.get('initial_state')
+            if not oocyte_id or len(oocyte_id) > max_length:
+                raise forms.ValidationError(f'Línea {line_number}: ID de óvulo inválido.')
+            if state not in valid_states:
+                raise forms.ValidationError(f'Línea {line_number}: estado inicial inválido.')
+            entries.append((oocyte_id, state))
+        if len(entries) > self.MAX_BATCH_SIZE:
+            raise forms.ValidationError(f'Se pueden registrar hasta {self.MAX_BATCH_SIZE} óvulos por lote.')
+        if not entries:
+            raise forms.ValidationError('El listado de óvulos está vacío.')
+        return entries
+
+
+class OocyteTransitionForm(forms.Form):
+    """Form for moving a group of oocytes from one state to another"""
+    
+    from_state = forms.ChoiceField(choices=Oocyte.STATE_CHOICES, label='Estado Actual')
+    to_state = forms.ChoiceField(choices=Oocyte.STATE_CHOICES, label='Nuevo Estado')
+    notes = forms.CharField(max_length=500, required=False, label='Notas')
+    discard_reason = forms.CharField(max_length=500, required=False, label='Motivo de Descarte')
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        from_state = cleaned_data.get('from_state')
+        to_state = cleaned_data.get('to_state')
+        if from_state and to_state and not Oocyte.can_transition(from_state, to_state):
+            raise forms.ValidationError('La transición de estado seleccionada no está permitida.')
+        if to_state == 'CRYOPRESERVED':
+            raise forms.ValidationError('Para criopreservar, asigne canister y posición desde la ficha de cada óvulo.')
+        if to_state == 'DISCARDED' and not cleaned_data.get('discard_reason'):
+            raise forms.ValidationError('Indique el motivo de descarte.')
+        return cleaned_data
+
+
+class OutcomeReportForm(forms.Form):
+    """Grouping and period of the outcome report"""
+    
+    GROUP_BY_CHOICES = [
+        ('month', 'Mes'),
+        ('doctor', 'Médico'),
+        ('fertilization_technique', 'Técnica de Fertilización'),
+        ('sperm_source', 'Origen del Esperma'),
+        ('quality', 'Calidad'),
+        ('pgt_status', 'Estado PGT'),
+    ]
+    
+    group_by = forms.ChoiceField(choices=GROUP_BY_CHOICES, required=False, label='Agrupar por')
+    date_from = forms.DateField(required=False, label='Desde', widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(required=False, label='Hasta', widget=forms.DateInput(attrs={'type': 'date'}))
@@ -0,0 +1,19 @@
+"""
+Give a straw to the cryopreserved samples stored before structured locations
+Run with: python manage.py place_legacy_cryo_samples (once, after migrating)
+"""
+from django.core.management.base import BaseCommand
+from laboratory.services import LEGACY_CANISTER_CODE, place_legacy_samples
+
+
+class Command(BaseCommand):
+    help = 'Map the old nitrogen_tube / rack_number texts of cryopreserved samples to straws'
+
+    def handle(self, *args, **options):
+        placed, unparsed = place_legacy_samples()
+        self.stdout.write(f'✓ Muestras ubicadas en canisters {LEGACY_CANISTER_CODE}: {placed}')
+        for sample, reason in unparsed:
+            self.stdout.write(
+                f'! {sample._meta.verbose_name} {sample} sin ubicar '
+                f'(tubo "{sample.nitrogen_tube}", rack "{sample.rack_number}"): {reason}'
+            )
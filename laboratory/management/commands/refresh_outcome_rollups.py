@@ -0,0 +1,23 @@
+"""
+Refresh the embryo outcome rollups read by the medical director report
+Run with: python manage.py refresh_outcome_rollups [--full]
+"""
+from django.core.management.base import BaseCommand
+from laboratory.analytics import refresh_outcome_rollups
+
+
+class Command(BaseCommand):
+    help = 'Refresh the embryo outcome rollups incrementally from updated_at watermarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Rebuild every month (also picks up deleted embryos)')
+
+    def handle(self, *args, **options):
+        months = refresh_outcome_rollups(full=options['full'])
+        if months is None:
+            self.stdout.write('✓ Resúmenes reconstruidos por completo')
+        elif months:
+            self.stdout.write(f"✓ Meses actualizados: {', '.join(f'{month:%m/%Y}' for month in months)}")
+        else:
+            self.stdout.write('✓ Sin cambios desde la última actualización')
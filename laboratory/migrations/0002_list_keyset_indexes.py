@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laboratory', '0001_initial'),
+        ('treatments', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='embryo',
+            index=models.Index(fields=['created_at', 'id'], name='lab_embryo_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='embryo',
+            index=models.Index(fields=['current_state', 'created_at', 'id'], name='lab_embryo_state_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='oocyte',
+            index=models.Index(fields=['created_at', 'id'], name='lab_oocyte_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='oocyte',
+            index=models.Index(fields=['current_state', 'created_at', 'id'], name='lab_oocyte_state_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='puncture',
+            index=models.Index(fields=['created_at', 'id'], name='lab_puncture_created_idx'),
+        ),
+    ]
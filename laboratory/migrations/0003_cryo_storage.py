@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laboratory', '0002_list_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CryoRack',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=20, verbose_name='Código')),
+            ],
+            options={
+                'verbose_name': 'Rack',
+                'verbose_name_plural': 'Racks',
+                'ordering': ['tank__code', 'code'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CryoTank',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=20, unique=True, verbose_name='Código')),
+                ('description', models.CharField(blank=True, max_length=200, verbose_name='Descripción')),
+            ],
+            options={
+                'verbose_name': 'Tanque de Nitrógeno',
+                'verbose_name_plural': 'Tanques de Nitrógeno',
+                'ordering': ['code'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CryoCanister',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=20, verbose_name='Código')),
+                ('capacity', models.PositiveSmallIntegerField(default=10, verbose_name='Capacidad (pajuelas)')),
+                ('rack', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='canisters', to='laboratory.cryorack')),
+            ],
+            options={
+                'verbose_name': 'Canister',
+                'verbose_name_plural': 'Canisters',
+                'ordering': ['rack__tank__code', 'rack__code', 'code'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CryoStraw',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(verbose_name='Posición')),
+                ('stored_at', models.DateTimeField(auto_now_add=True)),
+                ('canister', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='straws', to='laboratory.cryocanister')),
+                ('embryo', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cryo_straw', to='laboratory.embryo')),
+                ('oocyte', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cryo_straw', to='laboratory.oocyte')),
+            ],
+            options={
+                'verbose_name': 'Pajuela',
+                'verbose_name_plural': 'Pajuelas',
+            },
+        ),
+        migrations.AddField(
+            model_name='cryorack',
+            name='tank',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='racks', to='laboratory.cryotank'),
+        ),
+        migrations.AddConstraint(
+            model_name='cryocanister',
+            constraint=models.UniqueConstraint(fields=('rack', 'code'), name='lab_cryocanister_unique_code'),
+        ),
+        migrations.AddConstraint(
+            model_name='cryostraw',
+            constraint=models.UniqueConstraint(fields=('canister', 'position'), name='lab_cryostraw_unique_slot'),
+        ),
+        migrations.AddConstraint(
+            model_name='cryostraw',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('embryo__isnull', True), ('oocyte__isnull', False)), models.Q(('embryo__isnull', False), ('oocyte__isnull', True)), _connector='OR'), name='lab_cryostraw_single_sample'),
+        ),
+        migrations.AddConstraint(
+            model_name='cryorack',
+            constraint=models.UniqueConstraint(fields=('tank', 'code'), name='lab_cryorack_unique_code'),
+        ),
+    ]
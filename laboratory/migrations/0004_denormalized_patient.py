@@ -0,0 +1,56 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_patient(apps, schema_editor):
+    Puncture = apps.get_model('laboratory', 'Puncture')
+    Oocyte = apps.get_model('laboratory', 'Oocyte')
+    Embryo = apps.get_model('laboratory', 'Embryo')
+    
+    Oocyte.objects.update(patient_id=Subquery(
+        Puncture.objects.filter(pk=OuterRef('puncture_id')).values('treatment__patient_id')[:1]
+    ))
+    Embryo.objects.update(patient_id=Subquery(
+        Oocyte.objects.filter(pk=OuterRef('oocyte_id')).values('patient_id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laboratory', '0003_cryo_storage'),
+        ('patients', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='oocyte',
+            name='patient',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='oocytes', to='patients.patient'),
+        ),
+        migrations.AddField(
+            model_name='embryo',
+            name='patient',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='embryos', to='patients.patient'),
+        ),
+        migrations.RunPython(backfill_patient, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='oocyte',
+            name='patient',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='oocytes', to='patients.patient'),
+        ),
+        migrations.AlterField(
+            model_name='embryo',
+            name='patient',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='embryos', to='patients.patient'),
+        ),
+        migrations.AddIndex(
+            model_name='embryo',
+            index=models.Index(fields=['patient', 'current_state'], name='lab_embryo_patient_state_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='oocyte',
+            index=models.Index(fields=['patient', 'current_state'], name='lab_oocyte_patient_state_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laboratory', '0004_denormalized_patient'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('watermark', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Marca de Actualización',
+                'verbose_name_plural': 'Marcas de Actualización',
+            },
+        ),
+        migrations.CreateModel(
+            name='EmbryoOutcomeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Mes')),
+                ('fertilization_technique', models.CharField(choices=[('IVF', 'FIV - Fertilización In Vitro'), ('ICSI', 'ICSI - Inyección Intracitoplasmática')], max_length=10, verbose_name='Técnica de Fertilización')),
+                ('sperm_source', models.CharField(choices=[('PARTNER', 'Pareja'), ('DONOR', 'Donante')], max_length=10, verbose_name='Origen del Esperma')),
+                ('quality', models.IntegerField(verbose_name='Calidad')),
+                ('pgt_status', models.CharField(choices=[('NOT_PERFORMED', 'No Realizado'), ('PENDING', 'Pendiente'), ('OK', 'OK'), ('NOT_OK', 'No OK')], max_length=20, verbose_name='Estado PGT')),
+                ('embryos', models.PositiveIntegerField(default=0, verbose_name='Embriones')),
+                ('transfers', models.PositiveIntegerField(default=0, verbose_name='Transferencias')),
+                ('beta_positive', models.PositiveIntegerField(default=0, verbose_name='Beta Positiva')),
+                ('gestational_sac', models.PositiveIntegerField(default=0, verbose_name='Saco Gestacional')),
+                ('clinical_pregnancy', models.PositiveIntegerField(default=0, verbose_name='Embarazo Clínico')),
+                ('live_birth', models.PositiveIntegerField(default=0, verbose_name='Nacido Vivo')),
+                ('doctor', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resumen de Resultados',
+                'verbose_name_plural': 'Resúmenes de Resultados',
+                'indexes': [models.Index(fields=['month'], name='lab_outcome_month_idx')],
+            },
+        ),
+    ]
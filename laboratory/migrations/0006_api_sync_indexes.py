@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laboratory', '0005_outcome_rollups'),
+        ('patients', '0005_api_sync_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='embryo',
+            index=models.Index(fields=['updated_at', 'id'], name='lab_embryo_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='embryotransfer',
+            index=models.Index(fields=['updated_at', 'id'], name='lab_transfer_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='oocyte',
+            index=models.Index(fields=['updated_at', 'id'], name='lab_oocyte_updated_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.conf import settings
+from patients.models import Patient
 from treatments.models import Treatment
 
 
@@ -23,6 +25,9 @@ class Puncture(models.Model):
     class Meta:
         verbose_name = 'Punción'
         verbose_name_plural = 'Punciones'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='lab_puncture_created_idx'),
+        ]
 
 
 class Oocyte(models.Model):
@@ -39,7 +44,19 @@ class Oocyte(models.Model):
         ('CRYOPRESERVED', 'Criopreservado'),
     ]
     
+    # Legal state changes; FERTILIZED and DISCARDED are final
+    ALLOWED_TRANSITIONS = {
+        'VERY_IMMATURE': ['IMMATURE', 'MATURE', 'DISCARDED'],
+        'IMMATURE': ['MATURE', 'DISCARDED'],
+        'MATURE': ['FERTILIZED', 'CRYOPRESERVED', 'DISCARDED'],
+        'CRYOPRESERVED': ['MATURE', 'DISCARDED'],
+        'FERTILIZED': [],
+        'DISCARDED': [],
+    }
+    
     puncture = models.ForeignKey(Puncture, on_delete=models.CASCADE, related_name='oocytes')
+    # Denormalized from puncture.treatment.patient, maintained by laboratory.signals
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='oocytes', db_index=False)
     oocyte_id = models.CharField(max_length=100, unique=True, verbose_name='ID del Óvulo')
     
     initial_state = models.CharField(max_length=20, choices=STATE_CHOICES, verbose_name='Estado Inicial')
@@ -58,9 +75,19 @@ class Oocyte(models.Model):
     def __str__(self):
         return f"{self.oocyte_id} - {self.get_current_state_display()}"
     
+    @classmethod
+    def can_transition(cls, from_state, to_state):
+        return to_state in cls.ALLOWED_TRANSITIONS.get(from_state, [])
+    
     class Meta:
         verbose_name = 'Óvulo'
         verbose_name_plural = 'Óvulos'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='lab_oocyte_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='lab_oocyte_updated_idx'),
+            models.Index(fields=['current_state', 'created_at', 'id'], name='lab_oocyte_state_created_idx'),
+            models.Index(fields=['patient', 'current_state'], name='lab_oocyte_patient_state_idx'),
+        ]
 
 
 class OocyteStateHistory(models.Model):
@@ -105,6 +132,8 @@ class Embryo(models.Model):
     ]
     
     oocyte = models.OneToOneField(Oocyte, on_delete=models.CASCADE, related_name='embryo')
+    # Denormalized from oocyte.patient, maintained by laboratory.signals
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='embryos', db_index=False)
     embryo_id = models.CharField(max_length=100, unique=True, verbose_name='ID del Embrión')
     
     fertilization_technique = models.CharField(max_length=10, choices=FERTILIZATION_TECHNIQUE_CHOICES, verbose_name='Técnica de Fertilización')
@@ -132,6 +161,12 @@ class Embryo(models.Model):
     class Meta:
         verbose_name = 'Embrión'
         verbose_name_plural = 'Embriones'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='lab_embryo_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='lab_embryo_updated_idx'),
+            models.Index(fields=['current_state', 'created_at', 'id'], name='lab_embryo_state_created_idx'),
+            models.Index(fields=['patient', 'current_state'], name='lab_embryo_patient_state_idx'),
+        ]
 
 
 class EmbryoTransfer(models.Model):
@@ -160,3 +195,161 @@ class EmbryoTransfer(models.Model):
     class Meta:
         verbose_name = 'Transferencia de Embrión'
         verbose_name_plural = 'Transferencias de Embriones'
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='lab_transfer_updated_idx'),
+        ]
+
+
+class CryoTank(models.Model):
+    """
+    Liquid nitrogen tank
+    """
+    
+    code = models.CharField(max_length=20, unique=True, verbose_name='Código')
+    description = models.CharField(max_length=200, blank=True, verbose_name='Descripción')
+    
+    def __str__(self):
+        return f"Tanque {self.code}"
+    
+    class Meta:
+        verbose_name = 'Tanque de Nitrógeno'
+        verbose_name_plural = 'Tanques de Nitrógeno'
+        ordering = ['code']
+
+
+class CryoRack(models.Model):
+    """
+    Rack inside a nitrogen tank
+    """
+    
+    tank = models.ForeignKey(CryoTank, on_delete=models.PROTECT, related_name='racks')
+    code = models.CharField(max_length=20, verbose_name='Código')
+    
+    def __str__(self):
+        return f"{self.tank} / Rack {self.code}"
+    
+    class Meta:
+        verbose_name = 'Rack'
+        verbose_name_plural = 'Racks'
+        ordering = ['tank__code', 'code']
+        constraints = [
+            models.UniqueConstraint(fields=['tank', 'code'], name='lab_cryorack_unique_code'),
+        ]
+
+
+class CryoCanister(models.Model):
+    """
+    Canister inside a rack, holding numbered straw positions
+    """
+    
+    rack = models.ForeignKey(CryoRack, on_delete=models.PROTECT, related_name='canisters')
+    code = models.CharField(max_length=20, verbose_name='Código')
+    capacity = models.PositiveSmallIntegerField(default=10, verbose_name='Capacidad (pajuelas)')
+    
+    def __str__(self):
+        return f"{self.rack} / Canister {self.code}"
+    
+    def clean(self):
+        super().clean()
+        if self.pk and self.straws.filter(position__gt=self.capacity).exists():
+            raise ValidationError({
+                'capacity': 'Hay pajuelas almacenadas en posiciones mayores a la nueva capacidad.'
+            })
+    
+    class Meta:
+        verbose_name = 'Canister'
+        verbose_name_plural = 'Canisters'
+        ordering = ['rack__tank__code', 'rack__code', 'code']
+        constraints = [
+            models.UniqueConstraint(fields=['rack', 'code'], name='lab_cryocanister_unique_code'),
+        ]
+
+
+class CryoStraw(models.Model):
+    """
+    Straw stored in a canister position, holding one oocyte or one embryo.
+    A position can only be occupied once, whatever the sample type.
+    """
+    
+    canister = models.ForeignKey(CryoCanister, on_delete=models.PROTECT, related_name='straws')
+    position = models.PositiveSmallIntegerField(verbose_name='Posición')
+    oocyte = models.OneToOneField(Oocyte, on_delete=models.CASCADE, null=True, blank=True, related_name='cryo_straw')
+    embryo = models.OneToOneField(Embryo, on_delete=models.CASCADE, null=True, blank=True, related_name='cryo_straw')
+    
+    stored_at = models.DateTimeField(auto_now_add=True)
+    
+    @property
+    def sample(self):
+        return self.oocyte or self.embryo
+    
+    def __str__(self):
+        return f"{self.canister} / Posición {self.position}"
+    
+    class Meta:
+        verbose_name = 'Pajuela'
+        verbose_name_plural = 'Pajuelas'
+        constraints = [
+            models.UniqueConstraint(fields=['canister', 'position'], name='lab_cryostraw_unique_slot'),
+            models.CheckConstraint(
+                condition=(
+                    models.Q(oocyte__isnull=False, embryo__isnull=True) |
+                    models.Q(oocyte__isnull=True, embryo__isnull=False)
+                ),
+                name='lab_cryostraw_single_sample',
+            ),
+        ]
+
+
+class EmbryoOutcomeRollup(models.Model):
+    """
+    Precomputed embryo and transfer outcome counts per cohort month
+    (embryo creation month), doctor, technique, sperm source, quality and
+    PGT status. Rebuilt by the refresh_outcome_rollups command.
+    """
+    
+    PGT_STATUS_CHOICES = [
+        ('NOT_PERFORMED', 'No Realizado'),
+        ('PENDING', 'Pendiente'),
+        ('OK', 'OK'),
+        ('NOT_OK', 'No OK'),
+    ]
+    
+    month = models.DateField(verbose_name='Mes')
+    doctor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='+')
+    fertilization_technique = models.CharField(max_length=10, choices=Embryo.FERTILIZATION_TECHNIQUE_CHOICES, verbose_name='Técnica de Fertilización')
+    sperm_source = models.CharField(max_length=10, choices=Embryo.SPERM_SOURCE_CHOICES, verbose_name='Origen del Esperma')
+    quality = models.IntegerField(verbose_name='Calidad')
+    pgt_status = models.CharField(max_length=20, choices=PGT_STATUS_CHOICES, verbose_name='Estado PGT')
+    
+    embryos = models.PositiveIntegerField(default=0, verbose_name='Embriones')
+    transfers = models.PositiveIntegerField(default=0, verbose_name='Transferencias')
+    beta_positive = models.PositiveIntegerField(default=0, verbose_name='Beta Positiva')
+    gestational_sac = models.PositiveIntegerField(default=0, verbose_name='Saco Gestacional')
+    clinical_pregnancy = models.PositiveIntegerField(default=0, verbose_name='Embarazo Clínico')
+    live_birth = models.PositiveIntegerField(default=0, verbose_name='Nacido Vivo')
+    
+    def __str__(self):
+        return f"Resultados {self.month:%m/%Y} - {self.get_fertilization_technique_display()} - Calidad {self.quality}"
+    
+    class Meta:
+        verbose_name = 'Resumen de Resultados'
+        verbose_name_plural = 'Resúmenes de Resultados'
+        indexes = [
+            models.Index(fields=['month'], name='lab_outcome_month_idx'),
+        ]
+
+
+class RollupWatermark(models.Model):
+    """
+    Last refresh point of an incrementally maintained rollup
+    """
+    
+    name = models.CharField(max_length=50, unique=True)
+    watermark = models.DateTimeField()
+    
+    def __str__(self):
+        return f"{self.name}: {self.watermark}"
+    
+    class Meta:
+        verbose_name = 'Marca de Actualización'
+        verbose_name_plural = 'Marcas de Actualización'
@@ -0,0 +1,37 @@
+from rest_framework import serializers
+from core.api import SparseFieldsetMixin
+from .models import Oocyte, Embryo, EmbryoTransfer
+
+
+class OocyteSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    treatment = serializers.IntegerField(source='puncture.treatment_id', read_only=True)
+    
+    class Meta:
+        model = Oocyte
+        fields = [
+            'id', 'oocyte_id', 'patient', 'puncture', 'treatment', 'initial_state', 'current_state',
+            'maturation_time', 'discard_reason', 'created_at', 'updated_at',
+        ]
+
+
+class EmbryoSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    
+    class Meta:
+        model = Embryo
+        fields = [
+            'id', 'embryo_id', 'patient', 'oocyte', 'fertilization_technique', 'sperm_source',
+            'quality', 'current_state', 'pgt_performed', 'pgt_result', 'discard_reason',
+            'created_at', 'updated_at',
+        ]
+
+
+class EmbryoTransferSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    patient = serializers.IntegerField(source='embryo.patient_id', read_only=True)
+    
+    class Meta:
+        model = EmbryoTransfer
+        fields = [
+            'id', 'embryo', 'patient', 'scheduled_date', 'performed_date', 'beta_positive',
+            'gestational_sac', 'clinical_pregnancy', 'live_birth', 'notes',
+            'created_at', 'updated_at',
+        ]
@@ -0,0 +1,202 @@
+"""
+Bulk write operations and storage queries for the laboratory
+"""
+from collections import Counter, namedtuple
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from core import changelog, counters, generations
+from .models import Oocyte, Embryo, OocyteStateHistory, CryoTank, CryoRack, CryoCanister, CryoStraw
+
+# Canister receiving the samples of the old free-text locations
+LEGACY_CANISTER_CODE = 'LEGADO'
+
+
+class IllegalTransition(ValueError):
+    """Raised when a state change is not allowed by Oocyte.ALLOWED_TRANSITIONS"""
+
+
+TransitionResult = namedtuple('TransitionResult', ['transitioned', 'skipped'])
+
+
+def register_oocytes(puncture, entries, changed_by):
+    """
+    Register a batch of oocytes for a puncture.
+    entries is a list of (oocyte_id, initial_state) pairs. Oocytes and their
+    initial state history are written with one bulk INSERT per table.
+    """
+    patient_id = puncture.treatment.patient_id
+    with transaction.atomic():
+        oocytes = Oocyte.objects.bulk_create([
+            Oocyte(
+                puncture=puncture,
+                patient_id=patient_id,
+                oocyte_id=oocyte_id,
+                initial_state=state,
+                current_state=state,
+            )
+            for oocyte_id, state in entries
+        ])
+        OocyteStateHistory.objects.bulk_create([
+            OocyteStateHistory(
+                oocyte=oocyte,
+                from_state='',
+                to_state=oocyte.initial_state,
+                notes='Estado inicial',
+                changed_by=changed_by,
+            )
+            for oocyte in oocytes
+        ])
+        for state, count in Counter(oocyte.current_state for oocyte in oocytes).items():
+            counters.record_change(Oocyte, None, {'current_state': state}, count=count)
+        changelog.record(Oocyte, [oocyte.pk for oocyte in oocytes], 'CREATE')
+        generations.bump(Oocyte)
+    return oocytes
+
+
+def transition_oocytes(oocytes, from_state, to_state, changed_by, notes='', **fields):
+    """
+    Move every oocyte of the queryset that is still in from_state to to_state.
+    The state change is a single conditional UPDATE and the history rows a
+    single bulk INSERT. Oocytes whose state already changed are left untouched
+    and reported as skipped; both result lists hold oocyte_id codes.
+    Extra keyword arguments are written alongside the new state
+    (e.g. discard_reason). Cryopreservation is not allowed here, since every
+    oocyte needs its own straw (see store_sample).
+    """
+    if not Oocyte.can_transition(from_state, to_state):
+        raise IllegalTransition(f'{from_state} -> {to_state}')
+    if to_state == 'CRYOPRESERVED':
+        raise IllegalTransition(f'{from_state} -> {to_state} needs a straw per oocyte')
+    
+    with transaction.atomic():
+        rows = list(oocytes.select_for_update().values_list('id', 'oocyte_id', 'current_state'))
+        matched = [pk for pk, code, state in rows if state == from_state]
+        
+        if matched:
+            if from_state == 'CRYOPRESERVED':
+                CryoStraw.objects.filter(oocyte_id__in=matched).delete()
+            Oocyte.objects.filter(id__in=matched, current_state=from_state).update(
+                current_state=to_state,
+                updated_at=timezone.now(),
+                **fields
+            )
+            OocyteStateHistory.objects.bulk_create([
+                OocyteStateHistory(
+                    oocyte_id=pk,
+                    from_state=from_state,
+                    to_state=to_state,
+                    notes=notes,
+                    changed_by=changed_by,
+                )
+                for pk in matched
+            ])
+            counters.record_change(
+                Oocyte,
+                {'current_state': from_state},
+                {'current_state': to_state},
+                count=len(matched),
+            )
+            changelog.record(Oocyte, matched, 'UPDATE')
+            generations.bump(Oocyte)
+    
+    return TransitionResult(
+        transitioned=[code for pk, code, state in rows if state == from_state],
+        skipped=[code for pk, code, state in rows if state != from_state],
+    )
+
+
+def store_sample(sample, canister, position):
+    """Place an oocyte or embryo in a canister position"""
+    field = 'oocyte' if isinstance(sample, Oocyte) else 'embryo'
+    return CryoStraw.objects.create(canister=canister, position=position, **{field: sample})
+
+
+def place_legacy_samples():
+    """
+    Give a straw to every cryopreserved oocyte and embryo located only by the
+    old nitrogen_tube and rack_number texts. The tube names the tank and the
+    rack number the rack, created when missing. The old fields carry no
+    canister or position, so the samples take consecutive positions of a
+    LEGADO canister in that rack, grown as needed, until they are moved to
+    their real slot from the sample form. Returns (placed, unparsed), where
+    unparsed lists (sample, reason) pairs of the samples left without straw.
+    """
+    max_length = CryoTank._meta.get_field('code').max_length
+    placed = 0
+    unparsed = []
+    canisters = {}
+    with transaction.atomic():
+        for model in (Oocyte, Embryo):
+            samples = model.objects.filter(
+                current_state='CRYOPRESERVED',
+                cryo_straw__isnull=True,
+            ).order_by('pk')
+            for sample in samples.iterator():
+                tank_code = sample.nitrogen_tube.strip()
+                rack_code = sample.rack_number.strip()
+                if not tank_code or not rack_code:
+                    unparsed.append((sample, 'sin tubo o rack'))
+                    continue
+                if len(tank_code) > max_length or len(rack_code) > max_length:
+                    unparsed.append((sample, f'tubo o rack de más de {max_length} caracteres'))
+                    continue
+                
+                key = (tank_code, rack_code)
+                if key not in canisters:
+                    tank, created = CryoTank.objects.get_or_create(code=tank_code)
+                    rack, created = CryoRack.objects.get_or_create(tank=tank, code=rack_code)
+                    canister, created = CryoCanister.objects.get_or_create(
+                        rack=rack, code=LEGACY_CANISTER_CODE, defaults={'capacity': 0},
+                    )
+                    last = canister.straws.aggregate(last=Max('position'))['last'] or 0
+                    canisters[key] = [canister, last]
+                canister, last = canisters[key]
+                canisters[key][1] = last + 1
+                store_sample(sample, canister, last + 1)
+                placed += 1
+        
+        for canister, last in canisters.values():
+            if canister.capacity < last:
+                canister.capacity = last
+                canister.save(update_fields=['capacity'])
+    return placed, unparsed
+
+
+def rack_occupancy(tank_code, rack_code):
+    """
+    Occupancy map of a rack, built from a single query.
+    Returns one entry per canister with every straw position and the sample
+    stored in it (sample_type is None for free positions).
+    """
+    rows = CryoCanister.objects.filter(
+        rack__tank__code=tank_code,
+        rack__code=rack_code,
+    ).order_by('code', 'straws__position').values_list(
+        'code', 'capacity', 'straws__position',
+        'straws__oocyte__oocyte_id', 'straws__embryo__embryo_id',
+    )
+    
+    canisters = {}
+    for code, capacity, position, oocyte_id, embryo_id in rows:
+        canister = canisters.setdefault(code, {'capacity': capacity, 'occupied': {}})
+        if position is not None:
+            if oocyte_id:
+                canister['occupied'][position] = ('oocyte', oocyte_id)
+            else:
+                canister['occupied'][position] = ('embryo', embryo_id)
+    
+    occupancy = []
+    for code, canister in canisters.items():
+        slots = []
+        for position in range(1, canister['capacity'] + 1):
+            sample_type, sample_id = canister['occupied'].get(position, (None, None))
+            slots.append({'position': position, 'sample_type': sample_type, 'sample_id': sample_id})
+        occupancy.append({
+            'canister': code,
+            'capacity': canister['capacity'],
+            # Never negative, even for straws left beyond a reduced capacity
+            'free': max(0, canister['capacity'] - len(canister['occupied'])),
+            'slots': slots,
+        })
+    return occupancy
@@ -0,0 +1,86 @@
+"""
+Keep the denormalized patient of Oocyte and Embryo in sync with the
+treatment chain it is copied from (Treatment -> Puncture -> Oocyte -> Embryo)
+"""
+from django.db.models.signals import post_init, pre_save, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from core import changelog, generations
+from treatments.models import Treatment
+from .models import Puncture, Oocyte, Embryo
+
+# Field each model takes the patient from
+PARENT_FIELDS = {
+    Treatment: 'patient_id',
+    Puncture: 'treatment_id',
+    Oocyte: 'puncture_id',
+    Embryo: 'oocyte_id',
+}
+
+
+def remember_parent(sender, instance, **kwargs):
+    instance._loaded_parent_id = instance.__dict__.get(PARENT_FIELDS[sender])
+
+
+def _parent_changed(instance):
+    loaded = getattr(instance, '_loaded_parent_id', None)
+    return loaded is not None and loaded != getattr(instance, PARENT_FIELDS[type(instance)])
+
+
+def _reassign_patient(queryset, patient_id):
+    ids = list(queryset.values_list('id', flat=True))
+    if ids:
+        queryset.model.objects.filter(id__in=ids).update(patient_id=patient_id, updated_at=timezone.now())
+        changelog.record(queryset.model, ids, 'UPDATE')
+        generations.bump(queryset.model)
+
+
+for model in PARENT_FIELDS:
+    post_init.connect(remember_parent, sender=model, dispatch_uid=f'patient_parent_{model.__name__}')
+
+
+@receiver(pre_save, sender=Oocyte)
+def set_oocyte_patient(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if instance.patient_id is None or _parent_changed(instance):
+        instance.patient_id = Puncture.objects.values_list(
+            'treatment__patient_id', flat=True
+        ).get(pk=instance.puncture_id)
+
+
+@receiver(pre_save, sender=Embryo)
+def set_embryo_patient(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if instance.patient_id is None or _parent_changed(instance):
+        instance.patient_id = instance.oocyte.patient_id
+
+
+@receiver(post_save, sender=Treatment)
+def propagate_treatment_patient(sender, instance, created, **kwargs):
+    if not created and _parent_changed(instance):
+        _reassign_patient(Oocyte.objects.filter(puncture__treatment=instance), instance.patient_id)
+        _reassign_patient(Embryo.objects.filter(oocyte__puncture__treatment=instance), instance.patient_id)
+    instance._loaded_parent_id = instance.patient_id
+
+
+@receiver(post_save, sender=Puncture)
+def propagate_puncture_patient(sender, instance, created, **kwargs):
+    if not created and _parent_changed(instance):
+        patient_id = Treatment.objects.values_list('patient_id', flat=True).get(pk=instance.treatment_id)
+        _reassign_patient(Oocyte.objects.filter(puncture=instance), patient_id)
+        _reassign_patient(Embryo.objects.filter(oocyte__puncture=instance), patient_id)
+    instance._loaded_parent_id = instance.treatment_id
+
+
+@receiver(post_save, sender=Oocyte)
+def propagate_oocyte_patient(sender, instance, created, **kwargs):
+    if not created and _parent_changed(instance):
+        _reassign_patient(Embryo.objects.filter(oocyte=instance), instance.patient_id)
+    instance._loaded_parent_id = instance.puncture_id
+
+
+@receiver(post_save, sender=Embryo)
+def reset_embryo_parent(sender, instance, **kwargs):
+    instance._loaded_parent_id = instance.oocyte_id
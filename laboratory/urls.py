@@ -6,6 +6,7 @@ urlpatterns = [
     path('puncture/register/<int:treatment_id>/', views.register_puncture, name='register_puncture'),
     path('puncture/<int:puncture_id>/', views.puncture_detail, name='puncture_detail'),
     path('puncture/<int:puncture_id>/add-oocyte/', views.add_oocyte, name='add_oocyte'),
+    path('puncture/<int:puncture_id>/transition-oocytes/', views.transition_puncture_oocytes, name='transition_puncture_oocytes'),
     path('oocyte/', views.oocyte_list, name='oocyte_list'),
     path('oocyte/<int:oocyte_id>/', views.oocyte_detail, name='oocyte_detail'),
     path('oocyte/<int:oocyte_id>/update/', views.update_oocyte, name='update_oocyte'),
@@ -14,5 +15,7 @@ urlpatterns = [
     path('embryo/<int:embryo_id>/', views.embryo_detail, name='embryo_detail'),
     path('embryo/<int:embryo_id>/update/', views.update_embryo, name='update_embryo'),
     path('embryo/<int:embryo_id>/schedule-transfer/', views.schedule_transfer, name='schedule_transfer'),
+    path('storage/<str:tank_code>/<str:rack_code>/', views.cryo_rack_occupancy, name='cryo_rack_occupancy'),
+    path('reports/outcomes/', views.outcome_report, name='outcome_report'),
     path('my-biological-products/', views.my_biological_products, name='my_biological_products'),
 ]
@@ -1,13 +1,19 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db import transaction
+from django.http import JsonResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from core.pagination import KeysetPaginator
 from treatments.models import Treatment
-from .models import Puncture, Oocyte, OocyteStateHistory, Embryo, EmbryoTransfer
+from .models import Puncture, Oocyte, OocyteStateHistory, Embryo, EmbryoTransfer, CryoRack
+from .filters import PunctureFilter, OocyteFilter, EmbryoFilter
+from .services import register_oocytes, transition_oocytes, rack_occupancy
 from .forms import (
-    PunctureForm, OocyteForm, OocyteUpdateForm, 
-    EmbryoForm, EmbryoUpdateForm, EmbryoTransferForm
+    PunctureForm, OocyteForm, OocyteUpdateForm, OocyteBatchForm, OocyteTransitionForm,
+    EmbryoForm, EmbryoUpdateForm, EmbryoTransferForm, OutcomeReportForm
 )
+from .analytics import outcome_report as build_outcome_report
 
 
 @login_required
@@ -17,9 +23,16 @@ def puncture_list(request):
         messages.error(request, 'No tiene permisos para ver esta página.')
         return redirect('dashboard')
     
-    punctures = Puncture.objects.all().order_by('-created_at')
+    punctures = Puncture.objects.select_related(
+        'treatment__patient__user', 'operator'
+    ).annotate(oocyte_count=Count('oocytes'))
+    puncture_filter = PunctureFilter(request.GET, queryset=punctures)
+    page = KeysetPaginator(puncture_filter.qs).get_page(request.GET)
     
-    return render(request, 'laboratory/puncture_list.html', {'punctures': punctures})
+    return render(request, 'laboratory/puncture_list.html', {
+        'punctures': page,
+        'filter': puncture_filter,
+    })
 
 
 @login_required
@@ -29,9 +42,14 @@ def oocyte_list(request):
         messages.error(request, 'No tiene permisos para ver esta página.')
         return redirect('dashboard')
     
-    oocytes = Oocyte.objects.all().order_by('-created_at')
+    oocytes = Oocyte.objects.select_related('patient__user')
+    oocyte_filter = OocyteFilter(request.GET, queryset=oocytes)
+    page = KeysetPaginator(oocyte_filter.qs).get_page(request.GET)
     
-    return render(request, 'laboratory/oocyte_list.html', {'oocytes': oocytes})
+    return render(request, 'laboratory/oocyte_list.html', {
+        'oocytes': page,
+        'filter': oocyte_filter,
+    })
 
 
 @login_required
@@ -41,9 +59,14 @@ def embryo_list(request):
         messages.error(request, 'No tiene permisos para ver esta página.')
         return redirect('dashboard')
     
-    embryos = Embryo.objects.all().order_by('-created_at')
+    embryos = Embryo.objects.select_related('patient__user', 'oocyte')
+    embryo_filter = EmbryoFilter(request.GET, queryset=embryos)
+    page = KeysetPaginator(embryo_filter.qs).get_page(request.GET)
     
-    return render(request, 'laboratory/embryo_list.html', {'embryos': embryos})
+    return render(request, 'laboratory/embryo_list.html', {
+        'embryos': page,
+        'filter': embryo_filter,
+    })
 
 
 @login_required
@@ -80,15 +103,77 @@ def puncture_detail(request, puncture_id):
         messages.error(request, 'No tiene permisos para ver esta información.')
         return redirect('dashboard')
     
-    puncture = get_object_or_404(Puncture, id=puncture_id)
-    oocytes = puncture.oocytes.all()
+    puncture = get_object_or_404(
+        Puncture.objects.select_related('treatment__patient__user', 'operator'),
+        id=puncture_id
+    )
+    
+    # Batch registration of the oocytes obtained in the puncture
+    if request.method == 'POST':
+        batch_form = OocyteBatchForm(request.POST)
+        if batch_form.is_valid():
+            try:
+                oocytes = register_oocytes(puncture, batch_form.cleaned_data['entries'], request.user)
+            except IntegrityError:
+                # A concurrent batch took some of the IDs after the form checked them
+                batch_form.add_error(None, 'Otro registro simultáneo ya usó alguno de estos IDs. Revise el lote e intente nuevamente.')
+            else:
+                messages.success(request, f'{len(oocytes)} óvulos registrados exitosamente.')
+                return redirect('puncture_detail', puncture_id=puncture.id)
+    else:
+        batch_form = OocyteBatchForm()
+    
+    oocytes = puncture.oocytes.order_by('oocyte_id')
     
     return render(request, 'laboratory/puncture_detail.html', {
         'puncture': puncture,
         'oocytes': oocytes,
+        'batch_form': batch_form,
+        'transition_form': OocyteTransitionForm(),
     })
 
 
+@login_required
+def transition_puncture_oocytes(request, puncture_id):
+    """Lab operator moves the selected oocytes of a puncture to a new state"""
+    if not request.user.is_lab_operator():
+        messages.error(request, 'Solo los operadores de laboratorio pueden actualizar óvulos.')
+        return redirect('dashboard')
+    
+    puncture = get_object_or_404(Puncture, id=puncture_id)
+    
+    if request.method != 'POST':
+        return redirect('puncture_detail', puncture_id=puncture.id)
+    
+    form = OocyteTransitionForm(request.POST)
+    oocyte_ids = [pk for pk in request.POST.getlist('oocyte_ids') if pk.isdigit()]
+    if not oocyte_ids:
+        messages.error(request, 'Seleccione al menos un óvulo.')
+    elif not form.is_valid():
+        messages.error(request, ' '.join(form.non_field_errors()) or 'Datos de transición inválidos.')
+    else:
+        fields = {}
+        if form.cleaned_data['to_state'] == 'DISCARDED':
+            fields['discard_reason'] = form.cleaned_data['discard_reason']
+        result = transition_oocytes(
+            puncture.oocytes.filter(id__in=oocyte_ids),
+            form.cleaned_data['from_state'],
+            form.cleaned_data['to_state'],
+            request.user,
+            notes=form.cleaned_data['notes'] or f'Actualizado en lote por {request.user.get_full_name()}',
+            **fields
+        )
+        if result.transitioned:
+            messages.success(request, f'{len(result.transitioned)} óvulos actualizados exitosamente.')
+        if result.skipped:
+            messages.warning(
+                request,
+                f"Omitidos por haber cambiado de estado: {', '.join(result.skipped)}"
+            )
+    
+    return redirect('puncture_detail', puncture_id=puncture.id)
+
+
 @login_required
 def add_oocyte(request, puncture_id):
     """Lab operator adds oocyte to puncture"""
@@ -133,11 +218,11 @@ def oocyte_detail(request, oocyte_id):
         messages.error(request, 'No tiene permisos para ver esta información.')
         return redirect('dashboard')
     
-    oocyte = get_object_or_404(Oocyte, id=oocyte_id)
+    oocyte = get_object_or_404(Oocyte.objects.select_related('patient'), id=oocyte_id)
     
     # Patients can only see their own oocytes
     if request.user.is_patient():
-        if oocyte.puncture.treatment.patient.user != request.user:
+        if oocyte.patient.user_id != request.user.id:
             messages.error(request, 'No tiene permisos para ver este óvulo.')
             return redirect('my_biological_products')
     
@@ -162,20 +247,24 @@ def update_oocyte(request, oocyte_id):
     if request.method == 'POST':
         form = OocyteUpdateForm(request.POST, instance=oocyte)
         if form.is_valid():
-            oocyte = form.save()
-            
-            # Create state history if state changed
-            if old_state != oocyte.current_state:
-                OocyteStateHistory.objects.create(
-                    oocyte=oocyte,
-                    from_state=old_state,
-                    to_state=oocyte.current_state,
-                    notes=f'Actualizado por {request.user.get_full_name()}',
-                    changed_by=request.user
-                )
-            
-            messages.success(request, 'Óvulo actualizado exitosamente.')
-            return redirect('oocyte_detail', oocyte_id=oocyte.id)
+            try:
+                oocyte = form.save()
+            except IntegrityError:
+                # The straw position was taken concurrently, the form shows why
+                oocyte.refresh_from_db()
+            else:
+                # Create state history if state changed
+                if old_state != oocyte.current_state:
+                    OocyteStateHistory.objects.create(
+                        oocyte=oocyte,
+                        from_state=old_state,
+                        to_state=oocyte.current_state,
+                        notes=f'Actualizado por {request.user.get_full_name()}',
+                        changed_by=request.user
+                    )
+                
+                messages.success(request, 'Óvulo actualizado exitosamente.')
+                return redirect('oocyte_detail', oocyte_id=oocyte.id)
     else:
         form = OocyteUpdateForm(instance=oocyte)
     
@@ -236,11 +325,11 @@ def embryo_detail(request, embryo_id):
         messages.error(request, 'No tiene permisos para ver esta información.')
         return redirect('dashboard')
     
-    embryo = get_object_or_404(Embryo, id=embryo_id)
+    embryo = get_object_or_404(Embryo.objects.select_related('patient'), id=embryo_id)
     
     # Patients can only see their own embryos
     if request.user.is_patient():
-        if embryo.oocyte.puncture.treatment.patient.user != request.user:
+        if embryo.patient.user_id != request.user.id:
             messages.error(request, 'No tiene permisos para ver este embrión.')
             return redirect('my_biological_products')
     
@@ -267,9 +356,14 @@ def update_embryo(request, embryo_id):
     if request.method == 'POST':
         form = EmbryoUpdateForm(request.POST, instance=embryo)
         if form.is_valid():
-            form.save()
-            messages.success(request, 'Embrión actualizado exitosamente.')
-            return redirect('embryo_detail', embryo_id=embryo.id)
+            try:
+                form.save()
+            except IntegrityError:
+                # The straw position was taken concurrently, the form shows why
+                embryo.refresh_from_db()
+            else:
+                messages.success(request, 'Embrión actualizado exitosamente.')
+                return redirect('embryo_detail', embryo_id=embryo.id)
     else:
         form = EmbryoUpdateForm(instance=embryo)
     
@@ -322,26 +416,61 @@ def my_biological_products(request):
         messages.error(request, 'Esta página es solo para pacientes.')
         return redirect('dashboard')
     
-    patient = request.user.patient_profile
-    
-    # Get all punctures for this patient
-    from treatments.models import Treatment
-    treatments = Treatment.objects.filter(patient=patient)
-    punctures = Puncture.objects.filter(treatment__in=treatments)
-    
-    # Get cryopreserved oocytes
-    oocytes = Oocyte.objects.filter(
-        puncture__in=punctures,
+    # Cryopreserved oocytes and embryos, by their denormalized patient
+    oocytes = list(Oocyte.objects.filter(
+        patient__user=request.user,
         current_state='CRYOPRESERVED'
-    )
-    
-    # Get cryopreserved embryos
-    embryos = Embryo.objects.filter(
-        oocyte__puncture__in=punctures,
+    ).select_related('puncture'))
+    embryos = list(Embryo.objects.filter(
+        patient__user=request.user,
         current_state='CRYOPRESERVED'
-    )
+    ).select_related('oocyte'))
+    
+    fertilization_rate = len(embryos) * 100 / len(oocytes) if oocytes else 0
     
     return render(request, 'laboratory/my_biological_products.html', {
         'oocytes': oocytes,
         'embryos': embryos,
+        'total_products': len(oocytes) + len(embryos),
+        'fertilization_rate': fertilization_rate,
+    })
+
+
+@login_required
+def cryo_rack_occupancy(request, tank_code, rack_code):
+    """Occupancy map of a cryostorage rack (JSON)"""
+    if not request.user.is_lab_operator():
+        return JsonResponse({'error': 'No tiene permisos para ver esta información.'}, status=403)
+    
+    canisters = rack_occupancy(tank_code, rack_code)
+    if not canisters and not CryoRack.objects.filter(tank__code=tank_code, code=rack_code).exists():
+        return JsonResponse({'error': 'Rack no encontrado.'}, status=404)
+    
+    return JsonResponse({
+        'tank': tank_code,
+        'rack': rack_code,
+        'free': sum(canister['free'] for canister in canisters),
+        'canisters': canisters,
+    })
+
+
+@login_required
+def outcome_report(request):
+    """Medical director report of embryo and transfer outcomes (reads the rollups only)"""
+    if not request.user.is_medical_director():
+        messages.error(request, 'Solo el director médico puede ver este reporte.')
+        return redirect('dashboard')
+    
+    form = OutcomeReportForm(request.GET or None)
+    group_by, date_from, date_to = 'month', None, None
+    if form.is_valid():
+        group_by = form.cleaned_data['group_by'] or 'month'
+        date_from = form.cleaned_data['date_from']
+        date_to = form.cleaned_data['date_to']
+    
+    return render(request, 'laboratory/outcome_report.html', {
+        'form': form,
+        'group_by': group_by,
+        'group_label': dict(OutcomeReportForm.GROUP_BY_CHOICES)[group_by],
+        'rows': build_outcome_report(group_by, date_from, date_to),
     })
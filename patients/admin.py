@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Patient, MedicalHistory, Partner
+from .models import Patient, MedicalHistory, Partner, MedicalCoverage
 
 
 @admin.register(Patient)
@@ -38,3 +38,10 @@ class MedicalHistoryAdmin(admin.ModelAdmin):
 class PartnerAdmin(admin.ModelAdmin):
     list_display = ['first_name', 'last_name', 'dni', 'patient']
     search_fields = ['first_name', 'last_name', 'dni']
+
+
+@admin.register(MedicalCoverage)
+class MedicalCoverageAdmin(admin.ModelAdmin):
+    list_display = ['name', 'acronym', 'external_id', 'active', 'updated_at']
+    search_fields = ['name', 'acronym']
+    list_filter = ['active']
@@ -0,0 +1,25 @@
+from core.api import IsDoctorOrLabOperator, ReadOnlyAPIViewSet
+from core.filters import UpdatedSinceFilterSet
+from treatments.queries import doctor_patients_subquery
+from .models import Patient
+from .serializers import PatientSerializer
+
+
+class PatientFilter(UpdatedSinceFilterSet):
+    class Meta:
+        model = Patient
+        fields = ['medical_coverage_id']
+
+
+class PatientViewSet(ReadOnlyAPIViewSet):
+    permission_classes = [IsDoctorOrLabOperator]
+    serializer_class = PatientSerializer
+    filterset_class = PatientFilter
+    
+    def get_queryset(self):
+        patients = Patient.objects.select_related('user')
+        user = self.request.user
+        if not user.is_medical_director():
+            # Same scope as the patient list: patients with a treatment of the user
+            patients = patients.filter(id__in=doctor_patients_subquery(user.id))
+        return patients
@@ -0,0 +1,177 @@
+"""
+Medical coverage catalog.
+
+The external obras-sociales endpoint is only called by fetch_remote_catalog,
+from the refresh_coverage_catalog command; it writes the MedicalCoverage
+table. Requests read that table through an in-process cache: after
+CACHE_TTL seconds the cached catalog is still served while a background
+thread reloads it (stale-while-revalidate), so no request ever waits on the
+network and only the very first one in a process reads the table.
+
+Deployments run the command right after migrating. Until it has run, the
+table is empty and the forms make the coverage optional (see
+relax_when_empty) instead of offering an empty required select.
+"""
+import threading
+import time
+from collections import defaultdict
+
+import requests
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from core import changelog
+from .models import MedicalCoverage, Patient
+
+CACHE_TTL = 300
+REMOTE_TIMEOUT = 10
+
+UNAVAILABLE_HELP = (
+    'El catálogo de coberturas no está disponible en este momento. '
+    'Puede dejar este campo vacío y completarlo más adelante desde su perfil.'
+)
+
+_lock = threading.Lock()
+_catalog = None
+_loaded_at = 0.0
+_reloading = False
+
+
+def _load():
+    global _catalog, _loaded_at
+    catalog = dict(
+        (coverage.external_id, coverage.label)
+        for coverage in MedicalCoverage.objects.filter(active=True)
+    )
+    with _lock:
+        _catalog = catalog
+        _loaded_at = time.monotonic()
+    return catalog
+
+
+def _reload_in_background():
+    global _reloading
+    try:
+        _load()
+    finally:
+        _reloading = False
+        connection.close()
+
+
+def get_catalog():
+    """{external_id: label} of the active coverages, ordered by name"""
+    global _reloading
+    catalog = _catalog
+    if catalog is None:
+        return _load()
+    if time.monotonic() - _loaded_at > CACHE_TTL:
+        with _lock:
+            start = not _reloading
+            _reloading = True
+        if start:
+            threading.Thread(target=_reload_in_background, daemon=True).start()
+    return catalog
+
+
+def invalidate():
+    """Drop the cached catalog of this process"""
+    global _catalog
+    with _lock:
+        _catalog = None
+
+
+def coverage_choices():
+    """Choices for a coverage form field"""
+    return [(str(external_id), label) for external_id, label in get_catalog().items()]
+
+
+def relax_when_empty(field):
+    """
+    Make a coverage form field optional while the catalog is empty, so that
+    registration and profile forms still validate without it
+    """
+    if not get_catalog():
+        field.required = False
+        field.help_text = UNAVAILABLE_HELP
+
+
+def coverage_label(external_id):
+    """Display name of a coverage, '' when unknown"""
+    try:
+        return get_catalog().get(int(external_id), '')
+    except (TypeError, ValueError):
+        return ''
+
+
+def fetch_remote_catalog():
+    """Coverage rows from the external endpoint (network call)"""
+    response = requests.get(settings.MEDICAL_COVERAGE_CATALOG_URL, timeout=REMOTE_TIMEOUT)
+    response.raise_for_status()
+    return response.json().get('data', [])
+
+
+def store_catalog(rows):
+    """
+    Replace the local snapshot with the given remote rows. Coverages missing
+    from the remote list are kept but marked inactive, since patients may
+    still reference them. Returns (stored, deactivated) counts.
+    """
+    coverages = [
+        MedicalCoverage(
+            external_id=int(row['id']),
+            name=row['nombre'][:150],
+            acronym=(row.get('sigla') or '')[:30],
+            active=True,
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        MedicalCoverage.objects.bulk_create(
+            coverages,
+            update_conflicts=True,
+            unique_fields=['external_id'],
+            update_fields=['name', 'acronym', 'active', 'updated_at'],
+            batch_size=500,
+        )
+        deactivated = MedicalCoverage.objects.filter(active=True).exclude(
+            external_id__in=[coverage.external_id for coverage in coverages]
+        ).update(active=False)
+    invalidate()
+    return len(coverages), deactivated
+
+
+def resync_patient_coverage_names(chunk_size=2000):
+    """
+    Rewrite Patient.medical_coverage_name from the local catalog.
+    Patients are read in primary key order, chunk_size rows at a time, and
+    only the rows whose name changed are written back: one UPDATE ... WHERE
+    id IN (...) per distinct name in the chunk, which stays far cheaper than
+    the per-row CASE of bulk_update. Unknown coverage ids keep their current
+    name. Returns (checked, updated) counts.
+    """
+    labels = {coverage.external_id: coverage.label for coverage in MedicalCoverage.objects.all()}
+    checked = updated = 0
+    last_id = 0
+    while True:
+        rows = list(
+            Patient.objects.filter(pk__gt=last_id, medical_coverage_id__isnull=False)
+            .order_by('pk')
+            .values_list('pk', 'medical_coverage_id', 'medical_coverage_name')[:chunk_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        checked += len(rows)
+        changed = defaultdict(list)
+        for pk, coverage_id, name in rows:
+            label = labels.get(coverage_id, name)[:100]
+            if label != name:
+                changed[label].append(pk)
+        with transaction.atomic():
+            for label, pks in changed.items():
+                updated += Patient.objects.filter(pk__in=pks).update(
+                    medical_coverage_name=label,
+                    updated_at=timezone.now(),
+                )
+                changelog.record(Patient, pks, 'UPDATE')
+    return checked, updated
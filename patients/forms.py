@@ -1,13 +1,41 @@
 from django import forms
+from .coverage import coverage_choices, coverage_label, relax_when_empty
 from .models import Patient, MedicalHistory, Partner
 
 
 class PatientProfileForm(forms.ModelForm):
     """Form for patients to complete their profile - only patient-specific fields"""
     
+    medical_coverage = forms.TypedChoiceField(
+        choices=coverage_choices,
+        coerce=int,
+        empty_value=None,
+        label='Cobertura Médica',
+    )
+    
     class Meta:
         model = Patient
-        fields = ['occupation', 'medical_coverage_id', 'medical_coverage_name', 'member_number']
+        fields = ['occupation', 'member_number']
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.initial.setdefault('medical_coverage', self.instance.medical_coverage_id)
+        field = self.fields['medical_coverage']
+        current = self.instance.medical_coverage_id
+        if current is not None and not coverage_label(current):
+            # Deactivated upstream but still the patient's coverage
+            field.choices = [*field.choices, (str(current), self.instance.medical_coverage_name or str(current))]
+        relax_when_empty(field)
+    
+    def save(self, commit=True):
+        coverage_id = self.cleaned_data['medical_coverage']
+        # Left empty only while the catalog is unavailable: keep the current one
+        if coverage_id is not None:
+            self.instance.medical_coverage_name = (
+                coverage_label(coverage_id) or self.instance.medical_coverage_name
+            )
+            self.instance.medical_coverage_id = coverage_id
+        return super().save(commit)
 
 
 class MedicalHistoryForm(forms.ModelForm):
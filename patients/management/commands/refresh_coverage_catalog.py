@@ -0,0 +1,21 @@
+"""
+Refresh the local medical coverage catalog from the external endpoint
+Run with: python manage.py refresh_coverage_catalog (e.g. daily from cron)
+"""
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from patients.coverage import fetch_remote_catalog, store_catalog
+
+
+class Command(BaseCommand):
+    help = 'Download the obras sociales catalog into the local MedicalCoverage table'
+
+    def handle(self, *args, **options):
+        try:
+            rows = fetch_remote_catalog()
+        except (requests.RequestException, ValueError) as e:
+            # The previous snapshot stays in place
+            raise CommandError(f'No se pudo descargar el catálogo de coberturas: {e}')
+        
+        stored, deactivated = store_catalog(rows)
+        self.stdout.write(f'✓ Coberturas actualizadas: {stored}, dadas de baja: {deactivated}')
@@ -0,0 +1,42 @@
+"""
+Refresh the coverage name stored on every patient from the coverage catalog
+Run with: python manage.py resync_coverage_names [--refresh-catalog | --catalog-file FILE]
+(e.g. nightly from cron)
+"""
+import json
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from patients.coverage import fetch_remote_catalog, store_catalog, resync_patient_coverage_names
+
+
+class Command(BaseCommand):
+    help = 'Resync Patient.medical_coverage_name with the current coverage catalog'
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group()
+        source.add_argument('--refresh-catalog', action='store_true',
+                            help='Download the catalog first (MEDICAL_COVERAGE_CATALOG_URL)')
+        source.add_argument('--catalog-file',
+                            help='Load the catalog first from a JSON file shaped like the API response')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        rows = None
+        if options['catalog_file']:
+            try:
+                with open(options['catalog_file'], encoding='utf-8') as catalog_file:
+                    rows = json.load(catalog_file).get('data', [])
+            except (OSError, ValueError) as e:
+                raise CommandError(f'No se pudo leer el catálogo de coberturas: {e}')
+        elif options['refresh_catalog']:
+            try:
+                rows = fetch_remote_catalog()
+            except (requests.RequestException, ValueError) as e:
+                raise CommandError(f'No se pudo descargar el catálogo de coberturas: {e}')
+        if rows is not None:
+            stored, deactivated = store_catalog(rows)
+            self.stdout.write(f'✓ Coberturas actualizadas: {stored}, dadas de baja: {deactivated}')
+        
+        checked, updated = resync_patient_coverage_names(options['chunk_size'])
+        self.stdout.write(f'✓ Pacientes revisados: {checked}, actualizados: {updated}')
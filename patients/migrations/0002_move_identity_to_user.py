@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:38
+
+from django.db import migrations, models
+
+
+def copy_identity_to_user(apps, schema_editor):
+    Patient = apps.get_model('patients', 'Patient')
+    User = apps.get_model('users', 'User')
+    users = []
+    for patient in Patient.objects.select_related('user'):
+        user = patient.user
+        user.dni = user.dni or patient.dni
+        user.date_of_birth = user.date_of_birth or patient.date_of_birth
+        user.biological_sex = user.biological_sex or patient.biological_sex
+        users.append(user)
+    User.objects.bulk_update(users, ['dni', 'date_of_birth', 'biological_sex'], batch_size=500)
+    Patient.objects.update(medical_coverage_name=models.F('medical_coverage'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0001_initial'),
+        ('users', '0002_user_biological_sex_user_date_of_birth_user_dni_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='medical_coverage_id',
+            field=models.IntegerField(blank=True, null=True, verbose_name='ID Cobertura Médica'),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='medical_coverage_name',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Nombre Cobertura Médica'),
+        ),
+        migrations.RunPython(copy_identity_to_user, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='patient',
+            name='biological_sex',
+        ),
+        migrations.RemoveField(
+            model_name='patient',
+            name='date_of_birth',
+        ),
+        migrations.RemoveField(
+            model_name='patient',
+            name='dni',
+        ),
+        migrations.RemoveField(
+            model_name='patient',
+            name='medical_coverage',
+        ),
+    ]
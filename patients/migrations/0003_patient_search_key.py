@@ -0,0 +1,62 @@
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+TRIGRAM_INDEX = 'patient_search_key_trgm'
+
+
+def normalize_search_text(value):
+    # Copy of patients.models.normalize_search_text as of this migration
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    folded = ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+    return ' '.join(re.findall(r'[a-z0-9]+', folded))
+
+
+def build_search_keys(apps, schema_editor):
+    Patient = apps.get_model('patients', 'Patient')
+    patients = list(Patient.objects.select_related('user'))
+    for patient in patients:
+        user = patient.user
+        patient.search_key = ' ' + normalize_search_text(f'{user.last_name} {user.first_name} {user.dni or ""}')
+    Patient.objects.bulk_update(patients, ['search_key'], batch_size=500)
+
+
+def create_trigram_index(apps, schema_editor):
+    # Substring matches on PostgreSQL; SQLite uses the B-tree index for prefixes only
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} ON patients_patient '
+            f'USING gin (search_key gin_trgm_ops)'
+        )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {TRIGRAM_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0002_move_identity_to_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='search_key',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(build_search_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['search_key'], name='patient_search_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['created_at', 'id'], name='patient_created_idx'),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
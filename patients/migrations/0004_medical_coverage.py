@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0003_patient_search_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MedicalCoverage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('external_id', models.IntegerField(unique=True, verbose_name='ID Externo')),
+                ('name', models.CharField(max_length=150, verbose_name='Nombre')),
+                ('acronym', models.CharField(blank=True, max_length=30, verbose_name='Sigla')),
+                ('active', models.BooleanField(default=True, verbose_name='Vigente')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Cobertura Médica',
+                'verbose_name_plural': 'Coberturas Médicas',
+                'ordering': ['name'],
+            },
+        ),
+    ]
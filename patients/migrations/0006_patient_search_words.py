@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def use_binary_collation(apps, schema_editor):
+    # Prefix ranges over the words must follow byte order, not the locale
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'ALTER TABLE patients_patientsearchword ALTER COLUMN word TYPE varchar(100) COLLATE "C"'
+        )
+
+
+def store_search_words(apps, schema_editor):
+    Patient = apps.get_model('patients', 'Patient')
+    PatientSearchWord = apps.get_model('patients', 'PatientSearchWord')
+    words = []
+    for patient_id, search_key in Patient.objects.values_list('id', 'search_key').iterator():
+        words.extend(
+            PatientSearchWord(patient_id=patient_id, word=word[:100])
+            for word in sorted(set(search_key.split()))
+        )
+        if len(words) >= 5000:
+            PatientSearchWord.objects.bulk_create(words)
+            words = []
+    PatientSearchWord.objects.bulk_create(words)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0005_api_sync_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PatientSearchWord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(max_length=100)),
+            ],
+            options={
+                'verbose_name': 'Palabra de Búsqueda',
+                'verbose_name_plural': 'Palabras de Búsqueda',
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='patient',
+            name='patient_search_key_idx',
+        ),
+        migrations.AddField(
+            model_name='patientsearchword',
+            name='patient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_words', to='patients.patient'),
+        ),
+        migrations.RunPython(use_binary_collation, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='patientsearchword',
+            index=models.Index(fields=['word', 'patient'], name='patient_search_word_idx'),
+        ),
+        migrations.RunPython(store_search_words, migrations.RunPython.noop),
+    ]
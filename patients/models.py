@@ -1,7 +1,17 @@
+import re
+import unicodedata
+
 from django.db import models
 from django.conf import settings
 
 
+def normalize_search_text(value):
+    """Lower-case, accent-folded words separated by single spaces"""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    folded = ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+    return ' '.join(re.findall(r'[a-z0-9]+', folded))
+
+
 class Patient(models.Model):
     """
     Patient model - extends User with medical information
@@ -13,16 +23,93 @@ class Patient(models.Model):
     medical_coverage_name = models.CharField(max_length=100, blank=True, verbose_name='Nombre Cobertura Médica')
     member_number = models.CharField(max_length=50, blank=True, verbose_name='Número de Socio')
     
+    # " apellido nombre dni", normalized; kept in sync with the user by patients.signals
+    search_key = models.CharField(max_length=255, blank=True, editable=False)
+    
     # Medical history will be created when first appointment is made
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
-        return f"{self.user.get_full_name()} - DNI: {self.dni}"
+        return f"{self.user.get_full_name()} - DNI: {self.user.dni}"
+    
+    @staticmethod
+    def build_search_key(user):
+        # Leading space so that ' term' matches the start of any word
+        return ' ' + normalize_search_text(f'{user.last_name} {user.first_name} {user.dni or ""}')
     
     class Meta:
         verbose_name = 'Paciente'
         verbose_name_plural = 'Pacientes'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='patient_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='patient_updated_idx'),
+        ]
+
+
+class PatientSearchWord(models.Model):
+    """
+    One word of Patient.search_key, so that word-prefix searches can use a
+    B-tree index. Kept in sync by patients.signals.
+    """
+    
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='search_words')
+    word = models.CharField(max_length=100)
+    
+    @classmethod
+    def store(cls, search_keys):
+        """Replace the words of each patient, search_keys being {patient_id: search_key}"""
+        cls.objects.filter(patient_id__in=list(search_keys)).delete()
+        cls.objects.bulk_create([
+            cls(patient_id=patient_id, word=word[:100])
+            for patient_id, search_key in search_keys.items()
+            for word in sorted(set(search_key.split()))
+        ], batch_size=1000)
+    
+    @classmethod
+    def patient_ids_with_prefix(cls, term):
+        """Subquery of the patients with a word starting with term (already normalized)"""
+        # A range rather than LIKE 'term%': words are [a-z0-9] only, '{' sorts
+        # right after 'z', and a binary-collated B-tree serves the range on
+        # every backend (the column is COLLATE "C" on PostgreSQL)
+        return cls.objects.filter(word__gte=term, word__lt=term + '{').values('patient_id')
+    
+    def __str__(self):
+        return self.word
+    
+    class Meta:
+        verbose_name = 'Palabra de Búsqueda'
+        verbose_name_plural = 'Palabras de Búsqueda'
+        indexes = [
+            models.Index(fields=['word', 'patient'], name='patient_search_word_idx'),
+        ]
+
+
+class MedicalCoverage(models.Model):
+    """
+    Local snapshot of the external medical coverage (obras sociales) catalog.
+    Refreshed by the refresh_coverage_catalog command, read through
+    patients.coverage.
+    """
+    
+    external_id = models.IntegerField(unique=True, verbose_name='ID Externo')
+    name = models.CharField(max_length=150, verbose_name='Nombre')
+    acronym = models.CharField(max_length=30, blank=True, verbose_name='Sigla')
+    active = models.BooleanField(default=True, verbose_name='Vigente')
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    @property
+    def label(self):
+        return f"{self.name} ({self.acronym})" if self.acronym else self.name
+    
+    def __str__(self):
+        return self.label
+    
+    class Meta:
+        verbose_name = 'Cobertura Médica'
+        verbose_name_plural = 'Coberturas Médicas'
+        ordering = ['name']
 
 
 class MedicalHistory(models.Model):
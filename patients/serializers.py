@@ -0,0 +1,21 @@
+from rest_framework import serializers
+from core.api import SparseFieldsetMixin
+from .models import Patient
+
+
+class PatientSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    first_name = serializers.CharField(source='user.first_name')
+    last_name = serializers.CharField(source='user.last_name')
+    email = serializers.EmailField(source='user.email')
+    phone = serializers.CharField(source='user.phone')
+    dni = serializers.CharField(source='user.dni')
+    date_of_birth = serializers.DateField(source='user.date_of_birth')
+    biological_sex = serializers.CharField(source='user.biological_sex')
+    
+    class Meta:
+        model = Patient
+        fields = [
+            'id', 'first_name', 'last_name', 'email', 'phone', 'dni', 'date_of_birth', 'biological_sex',
+            'occupation', 'medical_coverage_id', 'medical_coverage_name', 'member_number',
+            'created_at', 'updated_at',
+        ]
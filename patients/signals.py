@@ -0,0 +1,52 @@
+"""
+Keep Patient.search_key, its words (and updated_at) in step with the user data
+"""
+from django.conf import settings
+from django.db.models.signals import post_init, pre_save, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from core import changelog
+from .models import Patient, PatientSearchWord
+
+
+@receiver(post_init, sender=Patient)
+def remember_search_key(sender, instance, **kwargs):
+    instance._stored_search_key = instance.__dict__.get('search_key')
+
+
+@receiver(pre_save, sender=Patient)
+def set_search_key(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance.search_key = Patient.build_search_key(instance.user)
+
+
+@receiver(post_save, sender=Patient)
+def store_search_words(sender, instance, created, raw=False, **kwargs):
+    if raw or (not created and instance.search_key == instance._stored_search_key):
+        return
+    PatientSearchWord.store({instance.pk: instance.search_key})
+    instance._stored_search_key = instance.search_key
+
+
+# User fields that are part of the patient as exposed by the API
+PATIENT_USER_FIELDS = {'first_name', 'last_name', 'email', 'phone', 'dni', 'date_of_birth', 'biological_sex'}
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def update_search_key(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or created:
+        return
+    if update_fields is not None and not PATIENT_USER_FIELDS.intersection(update_fields):
+        # e.g. the last_login update on every login
+        return
+    # Also moves updated_at so incremental API syncs pick up the change
+    patient_ids = list(Patient.objects.filter(user=instance).values_list('id', flat=True))
+    if patient_ids:
+        search_key = Patient.build_search_key(instance)
+        Patient.objects.filter(id__in=patient_ids).update(
+            search_key=search_key,
+            updated_at=timezone.now(),
+        )
+        PatientSearchWord.store({patient_id: search_key for patient_id in patient_ids})
+        changelog.record(Patient, patient_ids, 'UPDATE')
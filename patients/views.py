@@ -2,7 +2,8 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import models
-from .models import Patient, MedicalHistory
+from core.pagination import KeysetPaginator
+from .models import Patient, MedicalHistory, PatientSearchWord, normalize_search_text
 from .forms import PatientProfileForm
 
 
@@ -36,24 +37,23 @@ def patient_list(request):
     
     # Medical directors can see all patients
     if request.user.is_medical_director():
-        patients = Patient.objects.all().select_related('user')
+        patients = Patient.objects.all()
     else:
         # Doctors see only their patients (patients with treatments assigned to them)
-        from treatments.models import Treatment
-        patient_ids = Treatment.objects.filter(doctor=request.user).values_list('patient_id', flat=True).distinct()
-        patients = Patient.objects.filter(id__in=patient_ids).select_related('user')
+        from treatments.queries import doctor_patients_subquery
+        patients = Patient.objects.filter(id__in=doctor_patients_subquery(request.user.id))
     
-    # Search functionality
+    # Search functionality: every term must start a word of the name or DNI,
+    # ignoring case and accents ("gonz" finds "González")
     search_query = request.GET.get('search', '')
-    if search_query:
-        patients = patients.filter(
-            models.Q(user__first_name__icontains=search_query) |
-            models.Q(user__last_name__icontains=search_query) |
-            models.Q(dni__icontains=search_query)
-        )
+    for term in normalize_search_text(search_query).split():
+        patients = patients.filter(id__in=PatientSearchWord.patient_ids_with_prefix(term))
+    
+    patients = patients.select_related('user').annotate(treatment_count=models.Count('treatments'))
+    page = KeysetPaginator(patients, per_page=25).get_page(request.GET)
     
     return render(request, 'patients/patient_list.html', {
-        'patients': patients,
+        'patients': page,
         'search_query': search_query
     })
 
@@ -69,8 +69,8 @@ def patient_detail(request, patient_id):
     
     # Check permissions (medical directors can see all)
     if not request.user.is_medical_director():
-        from treatments.models import Treatment
-        if not Treatment.objects.filter(patient=patient, doctor=request.user).exists():
+        from treatments.queries import doctor_patient_ids
+        if patient.id not in doctor_patient_ids(request.user.id):
             messages.error(request, 'No tiene permisos para ver este paciente.')
             return redirect('patient_list')
     
@@ -0,0 +1,19 @@
+from core.api import IsClinicStaff, ReadOnlyAPIViewSet
+from core.filters import UpdatedSinceFilterSet
+from .models import Treatment
+from .serializers import TreatmentSerializer
+
+
+class TreatmentFilter(UpdatedSinceFilterSet):
+    class Meta:
+        model = Treatment
+        fields = ['patient', 'doctor', 'status', 'objective']
+
+
+class TreatmentViewSet(ReadOnlyAPIViewSet):
+    # Doctors and administrators list every treatment, lab operators open any
+    permission_classes = [IsClinicStaff]
+    # patient and doctor are serialized as ids, no joins needed
+    queryset = Treatment.objects.all()
+    serializer_class = TreatmentSerializer
+    filterset_class = TreatmentFilter
@@ -0,0 +1,17 @@
+import django_filters
+from core.filters import CreatedDateRangeFilterSet
+from .models import Treatment
+from .queries import doctor_choices
+
+
+class TreatmentFilter(CreatedDateRangeFilterSet):
+    """Filters for the treatment list"""
+
+    status = django_filters.ChoiceFilter(choices=Treatment.STATUS_CHOICES, label='Estado')
+    objective = django_filters.ChoiceFilter(choices=Treatment.OBJECTIVE_CHOICES, label='Objetivo')
+    # Cached choices instead of a queryset: no user query to render or validate
+    doctor = django_filters.ChoiceFilter(choices=doctor_choices, label='Médico')
+
+    class Meta:
+        model = Treatment
+        fields = ['status', 'objective', 'doctor']
@@ -1,5 +1,6 @@
+from datetime import timedelta
 from django import forms
-from .models import Treatment, MonitoringDay, StudyResult, MedicalOrder
+from .models import Treatment, StudyResult, MedicalOrder
 from patients.models import MedicalHistory, Partner
 
 
@@ -66,17 +67,6 @@ class StimulationProtocolForm(forms.ModelForm):
         }
 
 
-class MonitoringDayForm(forms.ModelForm):
-    """Form for adding monitoring day notes"""
-    
-    class Meta:
-        model = MonitoringDay
-        fields = ['notes', 'completed']
-        widgets = {
-            'notes': forms.Textarea(attrs={'rows': 3}),
-        }
-
-
 class MedicalOrderForm(forms.ModelForm):
     """Form for creating medical orders"""
     
@@ -86,3 +76,69 @@ class MedicalOrderForm(forms.ModelForm):
         widgets = {
             'description': forms.Textarea(attrs={'rows': 4}),
         }
+
+
+class DateListField(forms.Field):
+    """Field for a repeated date input (e.g. one checkbox per day)"""
+    
+    widget = forms.MultipleHiddenInput
+    
+    def to_python(self, value):
+        date_field = forms.DateField()
+        dates = []
+        for item in value or []:
+            if not item:
+                continue
+            try:
+                dates.append(date_field.clean(item))
+            except forms.ValidationError:
+                raise forms.ValidationError(f'Fecha de monitoreo inválida: {item}')
+        return dates
+
+
+class MonitoringScheduleForm(forms.Form):
+    """
+    Form for scheduling monitoring days.
+    Days can be picked one by one and/or generated from a recurrence rule
+    ("every N days from day X to day Y" of the stimulation, day 1 being
+    the start date).
+    """
+    
+    MAX_DAYS = 60
+    
+    monitoring_dates = DateListField(required=False)
+    start_date = forms.DateField(
+        required=False,
+        label='Inicio de la estimulación (día 1)',
+        widget=forms.DateInput(attrs={'type': 'date'}),
+    )
+    from_day = forms.IntegerField(min_value=1, max_value=MAX_DAYS, required=False, label='Desde el día')
+    to_day = forms.IntegerField(min_value=1, max_value=MAX_DAYS, required=False, label='Hasta el día')
+    every = forms.IntegerField(min_value=1, max_value=MAX_DAYS, required=False, initial=1, label='Cada (días)')
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        # The picked days are hidden inputs: show their errors with the form's
+        for error in self.errors.pop('monitoring_dates', []):
+            self.add_error(None, error)
+        if self.errors:
+            return cleaned_data
+        
+        dates = set(cleaned_data.get('monitoring_dates') or [])
+        rule = [cleaned_data.get(name) for name in ['start_date', 'from_day', 'to_day']]
+        if any(rule):
+            if not all(rule):
+                raise forms.ValidationError('Complete la fecha de inicio y el rango de días de la recurrencia.')
+            start_date, from_day, to_day = rule
+            if from_day > to_day:
+                raise forms.ValidationError('El día inicial debe ser anterior o igual al día final.')
+            every = cleaned_data.get('every') or 1
+            dates.update(
+                start_date + timedelta(days=day - 1)
+                for day in range(from_day, to_day + 1, every)
+            )
+        
+        if not dates:
+            raise forms.ValidationError('Seleccione al menos un día o defina una recurrencia.')
+        cleaned_data['dates'] = sorted(dates)
+        return cleaned_data
@@ -0,0 +1,32 @@
+"""
+Worker rendering the PDFs of new medical orders off the request path
+Run with: python manage.py render_order_pdfs [--loop] [--interval 5] [--retry-failed]
+"""
+import time
+from django.core.management.base import BaseCommand
+from treatments.models import MedicalOrder
+from treatments.services import render_pending_order_pdfs
+
+
+class Command(BaseCommand):
+    help = 'Render pending medical order PDFs (reusing cached files with the same content)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new orders')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls with --loop')
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--retry-failed', action='store_true', help='Queue failed orders again')
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            MedicalOrder.objects.filter(pdf_status='FAILED').update(pdf_status='PENDING')
+        
+        while True:
+            rendered, reused, failed = render_pending_order_pdfs(options['batch_size'])
+            if rendered or reused or failed:
+                self.stdout.write(f'✓ PDFs generados: {rendered}, reutilizados: {reused}, con error: {failed}')
+            if rendered + reused + failed == options['batch_size']:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
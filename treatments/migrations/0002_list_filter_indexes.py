@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('treatments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='treatment',
+            index=models.Index(fields=['created_at', 'id'], name='treat_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treatment',
+            index=models.Index(fields=['doctor', 'status', 'created_at'], name='treat_doctor_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treatment',
+            index=models.Index(fields=['status', 'created_at'], name='treat_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treatment',
+            index=models.Index(fields=['objective', 'created_at'], name='treat_objective_created_idx'),
+        ),
+    ]
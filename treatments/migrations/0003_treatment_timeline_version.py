@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('treatments', '0002_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='treatment',
+            name='timeline_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
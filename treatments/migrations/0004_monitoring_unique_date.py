@@ -0,0 +1,27 @@
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_days(apps, schema_editor):
+    MonitoringDay = apps.get_model('treatments', 'MonitoringDay')
+    keep = (
+        MonitoringDay.objects.values('treatment', 'date')
+        .annotate(keep_id=Min('id'))
+        .values_list('keep_id', flat=True)
+    )
+    MonitoringDay.objects.exclude(id__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('treatments', '0003_treatment_timeline_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_days, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='monitoringday',
+            constraint=models.UniqueConstraint(fields=['treatment', 'date'], name='treat_monitoring_unique_date'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+def mark_existing_pdfs_ready(apps, schema_editor):
+    MedicalOrder = apps.get_model('treatments', 'MedicalOrder')
+    MedicalOrder.objects.exclude(pdf_file='').exclude(pdf_file__isnull=True).update(pdf_status='READY')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('treatments', '0004_monitoring_unique_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicalorder',
+            name='pdf_status',
+            field=models.CharField(choices=[('PENDING', 'En preparación'), ('READY', 'Disponible'), ('FAILED', 'Error')], default='PENDING', max_length=10, verbose_name='Estado del PDF'),
+        ),
+        migrations.AddField(
+            model_name='medicalorder',
+            name='pdf_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.RunPython(mark_existing_pdfs_ready, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='medicalorder',
+            index=models.Index(fields=['pdf_status', 'created_at'], name='treat_order_pdf_status_idx'),
+        ),
+    ]
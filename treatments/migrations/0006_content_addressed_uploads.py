@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:35
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('treatments', '0005_medical_order_pdf_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='studyresult',
+            name='result_file',
+            field=models.FileField(blank=True, null=True, storage=core.storage.content_addressed_storage, upload_to='study_results/', verbose_name='Archivo de Resultado'),
+        ),
+        migrations.AlterField(
+            model_name='treatment',
+            name='consent_document',
+            field=models.FileField(blank=True, null=True, storage=core.storage.content_addressed_storage, upload_to='consents/', verbose_name='Consentimiento Firmado'),
+        ),
+    ]
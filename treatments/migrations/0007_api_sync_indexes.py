@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0005_api_sync_indexes'),
+        ('treatments', '0006_content_addressed_uploads'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='treatment',
+            index=models.Index(fields=['updated_at', 'id'], name='treat_updated_idx'),
+        ),
+    ]
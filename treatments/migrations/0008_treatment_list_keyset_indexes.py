@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0006_patient_search_words'),
+        ('treatments', '0007_api_sync_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='treatment',
+            name='treat_doctor_status_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='treatment',
+            name='treat_status_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='treatment',
+            name='treat_objective_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='treatment',
+            index=models.Index(fields=['doctor', 'created_at', 'id'], name='treat_doctor_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treatment',
+            index=models.Index(fields=['doctor', 'status', 'created_at', 'id'], name='treat_doctor_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treatment',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='treat_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treatment',
+            index=models.Index(fields=['objective', 'created_at', 'id'], name='treat_objective_created_idx'),
+        ),
+    ]
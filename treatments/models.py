@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from core.storage import content_addressed_storage
 from patients.models import Patient
 
 
@@ -35,7 +36,11 @@ class Treatment(models.Model):
     # Study results
     oocytes_viable = models.BooleanField(null=True, blank=True, verbose_name='Óvulos Viables')
     sperm_viable = models.BooleanField(null=True, blank=True, verbose_name='Esperma Viable')
-    consent_document = models.FileField(upload_to='consents/', null=True, blank=True, verbose_name='Consentimiento Firmado')
+    consent_document = models.FileField(upload_to='consents/', storage=content_addressed_storage, null=True, blank=True, verbose_name='Consentimiento Firmado')
+    
+    # Bumped on every write to monitoring days, study results or medical orders;
+    # part of the cache key of the rendered timeline
+    timeline_version = models.PositiveIntegerField(default=0, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -43,10 +48,29 @@ class Treatment(models.Model):
     def __str__(self):
         return f"Tratamiento {self.id} - {self.patient} - {self.get_status_display()}"
     
+    @classmethod
+    def bump_timeline_version(cls, *treatment_ids):
+        """Invalidate the cached timeline of the given treatments"""
+        cls.objects.filter(id__in=treatment_ids).update(timeline_version=models.F('timeline_version') + 1)
+    
     class Meta:
         verbose_name = 'Tratamiento'
         verbose_name_plural = 'Tratamientos'
         ordering = ['-created_at']
+        # Treatment list filters served in (created_at, id) keyset order
+        # without a sort: none or date range only (treat_created_idx),
+        # doctor (treat_doctor_created_idx), doctor + status
+        # (treat_doctor_status_idx), status (treat_status_created_idx) and
+        # objective (treat_objective_created_idx). Objective + doctor and
+        # status + objective use one index and filter the other column.
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='treat_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='treat_updated_idx'),
+            models.Index(fields=['doctor', 'created_at', 'id'], name='treat_doctor_created_idx'),
+            models.Index(fields=['doctor', 'status', 'created_at', 'id'], name='treat_doctor_status_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='treat_status_created_idx'),
+            models.Index(fields=['objective', 'created_at', 'id'], name='treat_objective_created_idx'),
+        ]
 
 
 class MonitoringDay(models.Model):
@@ -68,6 +92,9 @@ class MonitoringDay(models.Model):
         verbose_name = 'Día de Monitoreo'
         verbose_name_plural = 'Días de Monitoreo'
         ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(fields=['treatment', 'date'], name='treat_monitoring_unique_date'),
+        ]
 
 
 class StudyResult(models.Model):
@@ -85,7 +112,7 @@ class StudyResult(models.Model):
     treatment = models.ForeignKey(Treatment, on_delete=models.CASCADE, related_name='study_results')
     study_type = models.CharField(max_length=20, choices=STUDY_TYPE_CHOICES, verbose_name='Tipo de Estudio')
     study_name = models.CharField(max_length=200, verbose_name='Nombre del Estudio')
-    result_file = models.FileField(upload_to='study_results/', null=True, blank=True, verbose_name='Archivo de Resultado')
+    result_file = models.FileField(upload_to='study_results/', storage=content_addressed_storage, null=True, blank=True, verbose_name='Archivo de Resultado')
     result_text = models.TextField(blank=True, verbose_name='Resultado (Texto)')
     
     created_at = models.DateTimeField(auto_now_add=True)
@@ -108,10 +135,19 @@ class MedicalOrder(models.Model):
         ('PRESCRIPTION', 'Receta Médica'),
     ]
     
+    PDF_STATUS_CHOICES = [
+        ('PENDING', 'En preparación'),
+        ('READY', 'Disponible'),
+        ('FAILED', 'Error'),
+    ]
+    
     treatment = models.ForeignKey(Treatment, on_delete=models.CASCADE, related_name='medical_orders')
     order_type = models.CharField(max_length=20, choices=ORDER_TYPE_CHOICES, verbose_name='Tipo de Orden')
     description = models.TextField(verbose_name='Descripción')
     pdf_file = models.FileField(upload_to='medical_orders/', null=True, blank=True, verbose_name='Archivo PDF')
+    # Rendered by the render_order_pdfs worker, cached by content hash
+    pdf_status = models.CharField(max_length=10, choices=PDF_STATUS_CHOICES, default='PENDING', verbose_name='Estado del PDF')
+    pdf_hash = models.CharField(max_length=64, blank=True, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -122,6 +158,9 @@ class MedicalOrder(models.Model):
         verbose_name = 'Orden Médica'
         verbose_name_plural = 'Órdenes Médicas'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['pdf_status', 'created_at'], name='treat_order_pdf_status_idx'),
+        ]
 
 
 class Payment(models.Model):
@@ -0,0 +1,100 @@
+"""
+PDF documents for medical orders.
+
+Documents are plain text pages written with the standard Helvetica font, so
+no PDF library is needed and the same order content always produces the
+same bytes. The content hash includes TEMPLATE_VERSION: bump it whenever
+the layout changes so cached files are rendered again.
+"""
+import hashlib
+import textwrap
+
+TEMPLATE_VERSION = 1
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 56
+LINE_HEIGHT = 16
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN) // LINE_HEIGHT
+WRAP_WIDTH = 90
+
+
+def order_lines(order):
+    """Text lines of a medical order document"""
+    treatment = order.treatment
+    patient = treatment.patient.user
+    doctor = treatment.doctor
+    lines = [
+        'Clínica de Fertilidad',
+        order.get_order_type_display().upper(),
+        '',
+        f'Fecha: {order.created_at:%d/%m/%Y}',
+        f'Paciente: {patient.get_full_name()}',
+        f'DNI: {patient.dni or "-"}',
+        f'Tratamiento #{treatment.id}',
+        '',
+    ]
+    for paragraph in order.description.splitlines() or ['']:
+        lines.extend(textwrap.wrap(paragraph, WRAP_WIDTH) or [''])
+    lines.extend([
+        '',
+        '',
+        f'Dr./Dra. {doctor.get_full_name()}' if doctor else '',
+    ])
+    return lines
+
+
+def content_hash(lines):
+    """Cache key of a document: its text plus the template version"""
+    digest = hashlib.sha256(f'v{TEMPLATE_VERSION}\n'.encode())
+    digest.update('\n'.join(lines).encode())
+    return digest.hexdigest()
+
+
+def _escape(line):
+    text = line.encode('cp1252', errors='replace')
+    return text.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def _page_stream(lines):
+    stream = [b'BT', b'/F1 11 Tf', f'{LINE_HEIGHT} TL'.encode(),
+              f'{MARGIN} {PAGE_HEIGHT - MARGIN} Td'.encode()]
+    for line in lines:
+        stream.append(b'(' + _escape(line) + b") '")
+    stream.append(b'ET')
+    return b'\n'.join(stream)
+
+
+def render_pdf(lines):
+    """PDF file content (bytes) for a list of text lines"""
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+
+    # Objects 1-3 are the catalog, page tree and font; each page adds a
+    # page object followed by its content stream
+    page_ids = [4 + 2 * index for index in range(len(pages))]
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [' + b' '.join(b'%d 0 R' % pid for pid in page_ids)
+        + b'] /Count %d >>' % len(pages),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+    ]
+    for page_id, page_lines in zip(page_ids, pages):
+        stream = _page_stream(page_lines)
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] ' % (PAGE_WIDTH, PAGE_HEIGHT)
+            + b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % (page_id + 1)
+        )
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+
+    output = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref_offset = len(output)
+    output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        output += b'%010d 00000 n \n' % offset
+    output += b'trailer\n<< /Size %d /Root 1 0 R >>\n' % (len(objects) + 1)
+    output += b'startxref\n%d\n%%%%EOF\n' % xref_offset
+    return bytes(output)
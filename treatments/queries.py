@@ -0,0 +1,34 @@
+"""
+Cached reads of slow-changing treatment data (see core.querycache)
+"""
+from django.contrib.auth import get_user_model
+from core.querycache import cached
+from .models import Treatment
+
+DOCTOR_ROLES = ['DOCTOR', 'MEDICAL_DIRECTOR']
+
+
+def doctor_patients_subquery(doctor_id):
+    """
+    Patient ids of the doctor's treatments as a subquery, for filtering
+    querysets with id__in: unlike doctor_patient_ids it sends no parameter
+    per patient
+    """
+    return Treatment.objects.filter(doctor_id=doctor_id).values('patient_id')
+
+
+@cached('treatments.Treatment')
+def doctor_patient_ids(doctor_id):
+    """Ids of the patients with at least one treatment of the doctor, for membership checks and counts"""
+    return frozenset(
+        Treatment.objects.filter(doctor_id=doctor_id).values_list('patient_id', flat=True).distinct()
+    )
+
+
+@cached('users.User')
+def doctor_choices():
+    """(id, label) of the users treatments can be assigned to, for filter dropdowns"""
+    return [
+        (user.pk, str(user))
+        for user in get_user_model().objects.filter(role__in=DOCTOR_ROLES).order_by('last_name')
+    ]
@@ -0,0 +1,14 @@
+from rest_framework import serializers
+from core.api import SparseFieldsetMixin
+from .models import Treatment
+
+
+class TreatmentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    
+    class Meta:
+        model = Treatment
+        fields = [
+            'id', 'patient', 'doctor', 'objective', 'status',
+            'stimulation_protocol', 'medication_type', 'medication_dose', 'medication_duration',
+            'oocytes_viable', 'sperm_viable', 'created_at', 'updated_at',
+        ]
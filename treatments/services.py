@@ -0,0 +1,97 @@
+"""
+Bulk write operations for treatments
+"""
+import logging
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from core import changelog, generations
+from core.storage import HashNamedStorage
+from . import pdf
+from .models import Treatment, MonitoringDay, MedicalOrder
+
+logger = logging.getLogger(__name__)
+
+# Same location as the default storage, which serves the files
+pdf_storage = HashNamedStorage()
+
+
+def schedule_monitoring_days(treatment, dates):
+    """
+    Create the monitoring days of a treatment that do not exist yet.
+    Existing dates are skipped, and the rest are written with a single bulk
+    INSERT. Returns the dates that were added.
+    """
+    with transaction.atomic():
+        existing = set(
+            MonitoringDay.objects.filter(treatment=treatment, date__in=dates)
+            .values_list('date', flat=True)
+        )
+        new_dates = sorted(set(dates) - existing)
+        if new_dates:
+            # ignore_conflicts covers a concurrent submission of the same dates
+            MonitoringDay.objects.bulk_create(
+                [MonitoringDay(treatment=treatment, date=date) for date in new_dates],
+                ignore_conflicts=True,
+            )
+            # bulk_create sends no post_save, so invalidate the timeline and
+            # log the new rows here (ignore_conflicts leaves their ids unset)
+            Treatment.bump_timeline_version(treatment.id)
+            changelog.record(MonitoringDay, MonitoringDay.objects.filter(
+                treatment=treatment, date__in=new_dates,
+            ).values_list('id', flat=True), 'CREATE')
+    return new_dates
+
+
+def render_order_pdf(order):
+    """
+    Produce the PDF of a medical order. Files are stored under the hash of
+    their content, so an order identical to an earlier one reuses its file
+    without rendering it again. Returns True when a new file was written.
+    """
+    lines = pdf.order_lines(order)
+    digest = pdf.content_hash(lines)
+    path = f'medical_orders/{digest}.pdf'
+    rendered = not pdf_storage.exists(path)
+    if rendered:
+        pdf_storage.save(path, ContentFile(pdf.render_pdf(lines)))
+    MedicalOrder.objects.filter(pk=order.pk).update(pdf_file=path, pdf_hash=digest, pdf_status='READY')
+    changelog.record(MedicalOrder, [order.pk], 'UPDATE')
+    generations.bump(MedicalOrder)
+    return rendered
+
+
+def _claim_pending_order():
+    """The oldest pending order no other worker is rendering, locked until commit"""
+    return (
+        MedicalOrder.objects.filter(pdf_status='PENDING')
+        .select_related('treatment__patient__user', 'treatment__doctor')
+        .select_for_update(skip_locked=True, of=('self',))
+        .order_by('created_at')
+        .first()
+    )
+
+
+def render_pending_order_pdfs(batch_size=50):
+    """
+    Render the PDFs of the oldest pending orders, at most batch_size.
+    Safe to run from several workers: each order is rendered inside a
+    transaction holding its row lock, and the others skip locked rows.
+    Returns (rendered, reused, failed) counts.
+    """
+    rendered = reused = failed = 0
+    for _ in range(batch_size):
+        with transaction.atomic():
+            order = _claim_pending_order()
+            if order is None:
+                break
+            try:
+                if render_order_pdf(order):
+                    rendered += 1
+                else:
+                    reused += 1
+            except (OSError, ValueError):
+                logger.exception('No se pudo generar el PDF de la orden médica %s', order.pk)
+                MedicalOrder.objects.filter(pk=order.pk).update(pdf_status='FAILED')
+                failed += 1
+    return rendered, reused, failed
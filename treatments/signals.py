@@ -0,0 +1,18 @@
+"""
+Invalidate the cached treatment timeline when any of its entries changes
+"""
+from django.db.models.signals import post_save, post_delete
+from .models import Treatment, MonitoringDay, StudyResult, MedicalOrder
+
+TIMELINE_MODELS = [MonitoringDay, StudyResult, MedicalOrder]
+
+
+def bump_timeline_version(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    Treatment.bump_timeline_version(instance.treatment_id)
+
+
+for model in TIMELINE_MODELS:
+    post_save.connect(bump_timeline_version, sender=model, dispatch_uid=f'timeline_save_{model.__name__}')
+    post_delete.connect(bump_timeline_version, sender=model, dispatch_uid=f'timeline_delete_{model.__name__}')
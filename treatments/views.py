@@ -2,12 +2,16 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import transaction
+from core.pagination import KeysetPaginator
 from patients.models import Patient, MedicalHistory, Partner
 from .models import Treatment, MonitoringDay, StudyResult, MedicalOrder
+from .filters import TreatmentFilter
 from .forms import (
     TreatmentInitiationForm, MedicalHistoryInlineForm, PartnerInlineForm,
-    StudyResultForm, StimulationProtocolForm, MonitoringDayForm, MedicalOrderForm
+    StudyResultForm, StimulationProtocolForm, MedicalOrderForm,
+    MonitoringScheduleForm,
 )
+from .services import schedule_monitoring_days
 
 
 @login_required
@@ -17,9 +21,14 @@ def treatment_list(request):
         messages.error(request, 'No tiene permisos para ver esta página.')
         return redirect('dashboard')
     
-    treatments = Treatment.objects.all().order_by('-created_at')
+    treatments = Treatment.objects.select_related('patient__user', 'doctor')
+    treatment_filter = TreatmentFilter(request.GET, queryset=treatments)
+    page = KeysetPaginator(treatment_filter.qs).get_page(request.GET)
     
-    return render(request, 'treatments/treatment_list.html', {'treatments': treatments})
+    return render(request, 'treatments/treatment_list.html', {
+        'treatments': page,
+        'filter': treatment_filter,
+    })
 
 
 @login_required
@@ -38,19 +47,23 @@ def my_treatments(request):
 @login_required
 def treatment_detail(request, treatment_id):
     """View treatment details"""
-    treatment = get_object_or_404(Treatment, id=treatment_id)
+    treatment = get_object_or_404(
+        Treatment.objects.select_related('patient__user', 'doctor'),
+        id=treatment_id,
+    )
     
     # Check permissions
     if request.user.is_patient():
-        if treatment.patient.user != request.user:
+        if treatment.patient.user_id != request.user.id:
             messages.error(request, 'No tiene permisos para ver este tratamiento.')
             return redirect('my_treatments')
     elif not request.user.is_doctor() and not request.user.is_lab_operator():
         messages.error(request, 'No tiene permisos para ver este tratamiento.')
         return redirect('dashboard')
     
+    # Lazy querysets: they only run when the cached timeline has to be rendered
     monitoring_days = treatment.monitoring_days.all()
-    study_results = treatment.study_results.all()
+    study_results = treatment.study_results.order_by('-created_at')
     medical_orders = treatment.medical_orders.all()
     
     return render(request, 'treatments/treatment_detail.html', {
@@ -196,14 +209,23 @@ def assign_monitoring_days(request, treatment_id):
     treatment = get_object_or_404(Treatment, id=treatment_id)
     
     if request.method == 'POST':
-        dates = request.POST.getlist('monitoring_dates')
-        for date_str in dates:
-            if date_str:
-                MonitoringDay.objects.create(treatment=treatment, date=date_str)
-        messages.success(request, f'{len(dates)} días de monitoreo asignados exitosamente.')
-        return redirect('treatment_detail', treatment_id=treatment.id)
+        form = MonitoringScheduleForm(request.POST)
+        if form.is_valid():
+            dates = form.cleaned_data['dates']
+            added = schedule_monitoring_days(treatment, dates)
+            skipped = len(dates) - len(added)
+            message = f'{len(added)} días de monitoreo asignados exitosamente.'
+            if skipped:
+                message += f' {skipped} ya estaban asignados.'
+            messages.success(request, message)
+            return redirect('treatment_detail', treatment_id=treatment.id)
+    else:
+        form = MonitoringScheduleForm()
     
-    return render(request, 'treatments/assign_monitoring.html', {'treatment': treatment})
+    return render(request, 'treatments/assign_monitoring.html', {
+        'treatment': treatment,
+        'form': form,
+    })
 
 
 @login_required
@@ -221,7 +243,8 @@ def create_medical_order(request, treatment_id):
             order = form.save(commit=False)
             order.treatment = treatment
             order.save()
-            messages.success(request, 'Orden médica creada exitosamente.')
+            # The PDF is rendered by the render_order_pdfs worker
+            messages.success(request, 'Orden médica creada exitosamente. El PDF estará disponible en unos instantes.')
             return redirect('treatment_detail', treatment_id=treatment.id)
     else:
         form = MedicalOrderForm()
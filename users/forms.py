@@ -1,7 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
+from patients.coverage import coverage_choices, relax_when_empty
 from .models import User
-import requests
 
 
 class PatientRegistrationForm(UserCreationForm):
@@ -13,6 +13,7 @@ class PatientRegistrationForm(UserCreationForm):
         widget=forms.TextInput(attrs={'placeholder': 'Ej: Ingeniero, Docente, etc.'})
     )
     medical_coverage = forms.ChoiceField(
+        choices=coverage_choices,
         required=True,
         label='Cobertura Médica',
         widget=forms.Select(attrs={'class': 'form-control'}),
@@ -45,21 +46,8 @@ class PatientRegistrationForm(UserCreationForm):
         self.fields['dni'].widget.attrs.update({'placeholder': '12345678'})
         self.fields['password1'].widget.attrs.update({'placeholder': 'Mínimo 8 caracteres'})
         self.fields['password2'].widget.attrs.update({'placeholder': 'Repita la contraseña'})
+        relax_when_empty(self.fields['medical_coverage'])
 
-        try:
-            response = requests.get('https://ueozxvwsckonkqypfasa.supabase.co/functions/v1/getObrasSociales', timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                obras_sociales = data.get('data', [])
-                choices = [('', 'Seleccione una obra social')] + [
-                    (str(obra['id']), f"{obra['nombre']} ({obra['sigla']})") 
-                    for obra in obras_sociales
-                ]
-                self.fields['medical_coverage'].choices = choices
-            else:
-                self.fields['medical_coverage'].choices = [('', 'Error al cargar obras sociales')]
-        except Exception as e:
-            self.fields['medical_coverage'].choices = [('', 'Error al cargar obras sociales')]
 
 class StaffUserCreationForm(UserCreationForm):
     """Form for admin to create staff users (doctors, lab operators)"""
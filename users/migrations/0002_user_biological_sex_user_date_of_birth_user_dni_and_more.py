@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='biological_sex',
+            field=models.CharField(blank=True, choices=[('M', 'Masculino'), ('F', 'Femenino')], max_length=1, null=True, verbose_name='Sexo Biológico'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='date_of_birth',
+            field=models.DateField(blank=True, null=True, verbose_name='Fecha de Nacimiento'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='dni',
+            field=models.CharField(blank=True, max_length=20, null=True, unique=True, verbose_name='DNI'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='phone',
+            field=models.CharField(blank=True, max_length=20, verbose_name='Teléfono'),
+        ),
+    ]
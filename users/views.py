@@ -5,7 +5,7 @@ from django.contrib import messages
 from .forms import StaffUserCreationForm, UserUpdateForm
 from .forms import PatientRegistrationForm
 from .models import User
-import requests
+from patients.coverage import coverage_label
 from patients.models import Patient
 
 def login_view(request):
@@ -48,26 +48,12 @@ def register_view(request):
             user.save()
 
             medical_coverage_id = form.cleaned_data.get('medical_coverage', '')
-            medical_coverage_name = ''
-            
-            if medical_coverage_id:
-                try:
-                    response = requests.get('https://ueozxvwsckonkqypfasa.supabase.co/functions/v1/getObrasSociales', timeout=5)
-                    if response.status_code == 200:
-                        data = response.json()
-                        obras_sociales = data.get('data', [])
-                        obra = next((o for o in obras_sociales if str(o['id']) == medical_coverage_id), None)
-                        if obra:
-                            medical_coverage_name = f"{obra['nombre']} ({obra['sigla']})"
-                except Exception as e:
-                    pass
-            
             
             Patient.objects.create(
                 user=user,
                 occupation=form.cleaned_data.get('occupation', ''),
                 medical_coverage_id=int(medical_coverage_id) if medical_coverage_id else None,
-                medical_coverage_name=medical_coverage_name,
+                medical_coverage_name=coverage_label(medical_coverage_id),
                 member_number=form.cleaned_data.get('member_number', '')
             )
             